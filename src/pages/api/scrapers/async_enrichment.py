@@ -0,0 +1,238 @@
+"""
+Concurrent OpenAI enrichment on asyncio, as a staged pipeline.
+
+    fetch + clean  --pages-->  prompt  --requests-->  LLM
+    (fetch_workers)            (prompt_workers)       (in_flight)
+
+Each stage has its own concurrency and the queues between them are bounded,
+so page downloads run while earlier publications wait on the model, and a
+slow model makes the fetchers wait instead of piling pages up in memory.
+
+A requests-per-minute and a tokens-per-minute bucket keep the LLM stage inside
+the account's rate tier: each call reserves its estimated tokens up front and
+the estimate is corrected with the actual usage afterwards. Every result is
+handed to `on_result` (usually a journal append) as soon as it completes. With
+an EnrichmentCache, publications whose cleaned page was analysed before with
+the same prompt version and model are answered in the prompt stage, without a
+call. Every call is logged to the token ledger; once the run's budget is spent
+no new publications are fetched and queued requests are not sent.
+"""
+import asyncio
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import enrichment
+from enrichment_cache import EnrichmentCache
+import metrics
+import record_replay
+from rate_limiter import AsyncTokenBucket
+import token_ledger
+
+IN_FLIGHT = int(os.getenv("OPENAI_IN_FLIGHT", 8))
+# Defaults match a tier-1 gpt-4o account; raise them for higher tiers
+RPM_LIMIT = int(os.getenv("OPENAI_RPM", 500))
+TPM_LIMIT = int(os.getenv("OPENAI_TPM", 30000))
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 5))
+
+# Workers per pipeline stage and the capacity of the queues between them
+FETCH_WORKERS = int(os.getenv("ENRICH_FETCH_WORKERS", 8))
+PROMPT_WORKERS = int(os.getenv("ENRICH_PROMPT_WORKERS", 2))
+QUEUE_SIZE = int(os.getenv("ENRICH_QUEUE_SIZE", 16))
+
+_STOP = object()
+
+# Rough size of a token for Dutch prose, used to estimate before the API tells us
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+    return sum(len(m["content"]) for m in messages) // CHARS_PER_TOKEN + max_tokens
+
+
+class OpenAIRateLimiter:
+    """
+    Requests-per-minute plus tokens-per-minute limiter.
+
+    Both buckets hold at most six seconds' worth of budget, so a cold start
+    cannot fire a whole minute's quota in one burst.
+    """
+
+    def __init__(self, rpm: int = RPM_LIMIT, tpm: int = TPM_LIMIT):
+        self.requests = AsyncTokenBucket(rpm / 60, burst=max(1, rpm / 10))
+        self.tokens = AsyncTokenBucket(tpm / 60, burst=max(1, tpm / 10))
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        await self.requests.acquire()
+        await self.tokens.acquire(estimated_tokens)
+
+    def settle(self, estimated_tokens: int, used_tokens: Optional[int]) -> None:
+        """Correct the token bucket once the actual usage is known"""
+        if used_tokens is not None:
+            self.tokens.release(estimated_tokens - used_tokens)
+
+
+async def enrich_all(
+    publications: Iterable[Dict],
+    on_result: Callable[[Dict, Dict], None],
+    api_key: str,
+    profile: str = "enhanced",
+    themes: Optional[List[str]] = None,
+    types: Optional[List[str]] = None,
+    temperature: float = 0.3,
+    in_flight: int = IN_FLIGHT,
+    rpm: int = RPM_LIMIT,
+    tpm: int = TPM_LIMIT,
+    cache: Optional[EnrichmentCache] = None,
+    fetch_workers: int = FETCH_WORKERS,
+    prompt_workers: int = PROMPT_WORKERS,
+    queue_size: int = QUEUE_SIZE,
+) -> Dict[str, int]:
+    """
+    Analyse all publications concurrently with an enrichment profile.
+
+    Args:
+        on_result: called with (original, updated) for every successful analysis, as it completes
+        profile: enrichment profile, see enrichment.PROFILES
+        cache: answers are looked up in and stored to this cache
+        fetch_workers, prompt_workers, in_flight: concurrency of the fetch, prompt and LLM stages
+        queue_size: capacity of the queues between the stages
+
+    Returns:
+        Counts of "ok", "cached", "skipped" and "failed" publications, and "over_budget" for
+        requests that were built but not sent because the budget ran out
+    """
+    from openai import AsyncOpenAI
+
+    themes = themes if themes is not None else enrichment.load_themes()
+    types = types if types is not None else enrichment.load_types()
+    client = AsyncOpenAI(api_key=api_key, max_retries=MAX_RETRIES,
+                         http_client=record_replay.openai_async_http_client())
+    limiter = OpenAIRateLimiter(rpm, tpm)
+    counts = {"ok": 0, "cached": 0, "skipped": 0, "failed": 0, "over_budget": 0}
+    bron = iter(publications)
+    pages = asyncio.Queue(maxsize=queue_size)
+    requests = asyncio.Queue(maxsize=queue_size)
+
+    def done(publication: Dict, updated: Dict, soort: str) -> None:
+        on_result(publication, updated)
+        counts[soort] += 1
+        metrics.count("analyse", items=1)
+
+    async def fetch_stage() -> None:
+        # All fetchers share one iterator; next() cannot interleave between awaits
+        for publication in bron:
+            if token_ledger.over_budget():
+                return
+            await guarded(fetch, publication)
+
+    async def prompt_stage() -> None:
+        while (item := await pages.get()) is not _STOP:
+            await guarded(prepare, *item)
+
+    async def llm_stage() -> None:
+        while (item := await requests.get()) is not _STOP:
+            await guarded(analyse, *item)
+
+    async def guarded(step, publication: Dict, *args) -> None:
+        """
+        Run one item through a stage step. A worker that died would leave the other
+        stages waiting on a full queue, so any error only fails this publication.
+        """
+        try:
+            await step(publication, *args)
+        except Exception as e:
+            counts["failed"] += 1
+            metrics.count("analyse", errors=1)
+            print(f"Error analyzing publication {publication.get('titel', 'Unknown')}: {e}")
+
+    async def fetch(publication: Dict) -> None:
+        fields = enrichment.fields_to_request(publication, profile, themes, types)
+        content = await asyncio.to_thread(enrichment.fetch_content, publication, profile) if fields else None
+        if content is None:
+            counts["skipped"] += 1
+            return
+        metrics.count("analyse fetch", pages=1)
+        # Blocks while the prompt stage is behind, so at most queue_size pages wait in memory
+        await pages.put((publication, fields, content))
+
+    async def prepare(publication: Dict, fields: List[str], content: str) -> None:
+        request = enrichment.build_request(publication, content, fields, profile, themes, types)
+        cached = cache.get(request["cache_key"]) if cache is not None else None
+        if cached is not None:
+            updated = enrichment.apply_response(publication, cached, request)
+            if updated is not None:
+                done(publication, updated, "cached")
+                print(f"✓ From cache: {publication.get('titel', 'Unknown')}")
+                return
+        await requests.put((publication, request))
+
+    async def analyse(publication: Dict, request: Dict) -> None:
+        titel = publication.get('titel', 'Unknown')
+        messages = request["messages"]
+        if token_ledger.over_budget():
+            counts["over_budget"] += 1
+            return
+        estimate = estimate_tokens(messages, request["max_tokens"])
+        await limiter.acquire(estimate)
+        try:
+            start = time.perf_counter()
+            with metrics.timed("openai"):
+                response = await client.chat.completions.create(
+                    model=request["model"],
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=request["max_tokens"],
+                )
+        except Exception as e:
+            counts["failed"] += 1
+            metrics.count("analyse", errors=1)
+            print(f"Error analyzing publication {titel}: {e}")
+            return
+
+        usage = getattr(response, "usage", None)
+        limiter.settle(estimate, usage.total_tokens if usage else None)
+        token_ledger.record(request["model"], usage, time.perf_counter() - start, profile,
+                            publication.get('url', ''))
+
+        # A refusal or content filter comes back without content
+        response_text = (response.choices[0].message.content or "").strip()
+        if not response_text:
+            counts["failed"] += 1
+            metrics.count("analyse", errors=1)
+            print(f"Empty response for: {titel}")
+            return
+        try:
+            updated = enrichment.apply_response(publication, response_text, request)
+        except ValueError:
+            updated = None
+        if updated is None:
+            counts["failed"] += 1
+            metrics.count("analyse", errors=1)
+            print(f"Could not parse JSON response for: {titel}")
+            return
+
+        if cache is not None:
+            cache.put(request["cache_key"], response_text, profile, request["prompt_version"], request["model"],
+                      publication.get('url', ''))
+        done(publication, updated, "ok")
+        print(f"✓ Successfully analyzed ({counts['ok']}): {titel}")
+
+    async def run_stage(workers: int, inbox: asyncio.Queue, tasks) -> None:
+        """Wait for a stage to finish, then tell every worker of the next stage to stop"""
+        await asyncio.gather(*tasks)
+        for _ in range(workers):
+            await inbox.put(_STOP)
+
+    fetchers = [asyncio.create_task(fetch_stage()) for _ in range(fetch_workers)]
+    prompters = [asyncio.create_task(prompt_stage()) for _ in range(prompt_workers)]
+    callers = [asyncio.create_task(llm_stage()) for _ in range(in_flight)]
+    try:
+        await run_stage(prompt_workers, pages, fetchers)
+        await run_stage(in_flight, requests, prompters)
+        await asyncio.gather(*callers)
+    finally:
+        for task in fetchers + prompters + callers:
+            task.cancel()
+        await client.close()
+    return counts
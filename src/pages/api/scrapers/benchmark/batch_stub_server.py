@@ -0,0 +1,212 @@
+"""
+Local stand-in for the OpenAI Files and Batch endpoints that openai_batch.py uses.
+
+Uploaded input files are kept in memory. A batch is "validating" right after
+creation, "in_progress" for `duration_s` seconds and then "completed"; at that
+point every request gets a canned chat completion whose JSON answer fills each
+key of the prompt's answer template with a stub value. Requests whose
+custom_id is listed with --fail get a 500 in the output instead.
+
+    python benchmark/batch_stub_server.py --port 8766 --duration 3
+    python openai_batch.py basic --base-url http://127.0.0.1:8766/v1 --interval 1
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Keys in the answer template of the prompt, e.g. `"thema": "gekozen thema",`
+TEMPLATE_KEY = re.compile(r'^\s*"(\w+)":', re.MULTILINE)
+
+
+def stub_answer(messages):
+    prompt = messages[-1]["content"] if messages else ""
+    antwoord = {}
+    for key in TEMPLATE_KEY.findall(prompt):
+        if key == "relevance_score":
+            antwoord[key] = 3
+        elif key in ("keywords", "audience", "takeaways"):
+            antwoord[key] = [f"stub {key}"]
+        else:
+            antwoord[key] = f"stub {key}"
+    return json.dumps(antwoord, ensure_ascii=False)
+
+
+def stub_completion(body):
+    content = stub_answer(body.get("messages", []))
+    prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+class BatchStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, duration_s=2.0, fail_ids=()):
+        super().__init__(address, BatchStubHandler)
+        self.duration_s = duration_s
+        self.fail_ids = set(fail_ids)
+        self.files = {}
+        self.batches = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def add_file(self, filename, purpose, data):
+        file_id = f"file-{uuid.uuid4().hex[:16]}"
+        with self._lock:
+            self.files[file_id] = {"id": file_id, "object": "file", "bytes": len(data),
+                                   "created_at": int(time.time()), "filename": filename,
+                                   "purpose": purpose, "status": "processed", "_data": data}
+        return self.file_object(file_id)
+
+    def file_object(self, file_id):
+        return {k: v for k, v in self.files[file_id].items() if k != "_data"}
+
+    def create_batch(self, input_file_id, endpoint, completion_window, metadata):
+        batch_id = f"batch_{uuid.uuid4().hex[:16]}"
+        regels = [json.loads(r) for r in self.files[input_file_id]["_data"].splitlines() if r.strip()]
+        with self._lock:
+            self.batches[batch_id] = {
+                "id": batch_id, "object": "batch", "endpoint": endpoint, "errors": None,
+                "input_file_id": input_file_id, "completion_window": completion_window,
+                "status": "validating", "output_file_id": None, "error_file_id": None,
+                "created_at": int(time.time()), "in_progress_at": None, "completed_at": None,
+                "request_counts": {"total": len(regels), "completed": 0, "failed": 0},
+                "metadata": metadata, "_requests": regels, "_started": time.monotonic(),
+            }
+        return self.batch(batch_id)
+
+    def batch(self, batch_id):
+        """Current state of a batch; moves it along the statuses as time passes"""
+        with self._lock:
+            b = self.batches[batch_id]
+            verstreken = time.monotonic() - b["_started"]
+            if b["status"] == "validating" and verstreken > min(0.5, self.duration_s):
+                b["status"], b["in_progress_at"] = "in_progress", int(time.time())
+            if b["status"] == "in_progress" and verstreken > self.duration_s:
+                self._complete(b)
+            return {k: v for k, v in b.items() if not k.startswith("_")}
+
+    def _complete(self, b):
+        output, errors = [], []
+        for request in b["_requests"]:
+            custom_id = request["custom_id"]
+            if custom_id in self.fail_ids:
+                errors.append({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": custom_id,
+                               "response": {"status_code": 500, "request_id": uuid.uuid4().hex,
+                                            "body": {"error": {"message": "stub failure"}}},
+                               "error": None})
+                continue
+            output.append({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": custom_id,
+                           "response": {"status_code": 200, "request_id": uuid.uuid4().hex,
+                                        "body": stub_completion(request["body"])},
+                           "error": None})
+        for soort, regels in (("output_file_id", output), ("error_file_id", errors)):
+            if regels:
+                data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in regels).encode("utf-8")
+                file_id = f"file-{uuid.uuid4().hex[:16]}"
+                self.files[file_id] = {"id": file_id, "object": "file", "bytes": len(data),
+                                       "created_at": int(time.time()), "filename": f"{b['id']}_{soort}.jsonl",
+                                       "purpose": "batch_output", "status": "processed", "_data": data}
+                b[soort] = file_id
+        b["request_counts"].update(completed=len(output), failed=len(errors))
+        b["status"], b["completed_at"] = "completed", int(time.time())
+
+
+class BatchStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self):
+        self._send(404, {"error": {"message": f"niet gevonden: {self.path}", "type": "invalid_request_error"}})
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        server = self.server
+        pad = self.path.split("?")[0]
+        if pad == "/v1/files":
+            # multipart/form-data met de velden purpose en file
+            bericht = BytesParser(policy=email_policy).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + self._body())
+            velden, filename = {}, "input.jsonl"
+            for deel in bericht.iter_parts():
+                naam = deel.get_param("name", header="content-disposition")
+                velden[naam] = deel.get_payload(decode=True)
+                if naam == "file":
+                    filename = deel.get_filename() or filename
+            if "file" not in velden:
+                return self._send(400, {"error": {"message": "file ontbreekt"}})
+            return self._send(200, server.add_file(filename, velden.get("purpose", b"").decode(), velden["file"]))
+
+        if pad == "/v1/batches":
+            body = json.loads(self._body() or b"{}")
+            if body.get("input_file_id") not in server.files:
+                return self._send(400, {"error": {"message": "onbekend input_file_id"}})
+            return self._send(200, server.create_batch(body["input_file_id"], body.get("endpoint"),
+                                                       body.get("completion_window"), body.get("metadata")))
+        self._not_found()
+
+    def do_GET(self):
+        server = self.server
+        pad = self.path.split("?")[0]
+        m = re.fullmatch(r"/v1/batches/([\w-]+)", pad)
+        if m and m.group(1) in server.batches:
+            return self._send(200, server.batch(m.group(1)))
+        m = re.fullmatch(r"/v1/files/([\w-]+)(/content)?", pad)
+        if m and m.group(1) in server.files:
+            if m.group(2):
+                return self._send(200, server.files[m.group(1)]["_data"], "application/octet-stream")
+            return self._send(200, server.file_object(m.group(1)))
+        self._not_found()
+
+
+def start_server(port=0, duration_s=2.0, fail_ids=()):
+    """Start the server on a background thread; returns the server (use .base_url, .shutdown())"""
+    server = BatchStubServer(("127.0.0.1", port), duration_s, fail_ids)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokale stand-in voor de OpenAI Batch API")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--duration", type=float, default=2.0, help="seconden tot een batch klaar is")
+    parser.add_argument("--fail", nargs="*", default=[], help="custom_id's die een foutresponse krijgen")
+    args = parser.parse_args()
+
+    server = BatchStubServer(("127.0.0.1", args.port), args.duration, args.fail)
+    print(f"🧪 Batch-stub op {server.base_url} (batches klaar na {args.duration} s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
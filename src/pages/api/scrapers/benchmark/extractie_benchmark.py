@@ -0,0 +1,89 @@
+"""
+Benchmark of the main-text extractor (hoofdtekst.py) against the old regex cleaner.
+
+For every recorded page it measures the throughput in HTML characters per second
+and the number of tokens each cleaner hands to the model, both for the full text
+and after cutting it to the basic profile's limit (8,000 characters for the regex
+cleaner, max_content_tokens for the extractor).
+
+    python benchmark/extractie_benchmark.py
+    python benchmark/extractie_benchmark.py pagina.html=https://vng.nl/publicaties/x -n 20
+"""
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SCRAPERS_DIR = BENCHMARK_DIR.parent
+sys.path.insert(0, str(SCRAPERS_DIR))
+
+from hoofdtekst import count_tokens, extract_main_text, truncate_tokens  # noqa: E402
+
+# Opgenomen pagina's met het adres waarvan ze komen (dat bepaalt de content-selectors)
+OPGENOMEN = {
+    SCRAPERS_DIR / "debug-pagina1.html": "https://www.burgeroverheid.nl/blog/",
+    SCRAPERS_DIR / "leiden_dom_dump.html": "https://scholarlypublications.universiteitleiden.nl/search",
+}
+REGEX_MAX_CHARS = 8000
+MAX_CONTENT_TOKENS = 2000
+
+
+def regex_clean(html_content):
+    """De oude clean_html_content, zonder de afkapping"""
+    html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+    html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+    html_content = re.sub(r'<[^>]+>', ' ', html_content)
+    return re.sub(r'\s+', ' ', html_content).strip()
+
+
+def meet(functie, *args, herhalingen=5):
+    """Mediaan van de looptijd in seconden, en het resultaat"""
+    tijden = []
+    for _ in range(herhalingen):
+        start = time.perf_counter()
+        resultaat = functie(*args)
+        tijden.append(time.perf_counter() - start)
+    return statistics.median(tijden), resultaat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark van de hoofdtekst-extractie op opgenomen pagina's")
+    parser.add_argument("paginas", nargs="*", metavar="pad[=url]",
+                        help="eigen HTML-bestanden, optioneel met het adres waarvan ze komen")
+    parser.add_argument("-n", "--herhalingen", type=int, default=5, help="herhalingen per meting; de mediaan telt")
+    parser.add_argument("--model", default="gpt-4o")
+    args = parser.parse_args()
+
+    paginas = dict(OPGENOMEN)
+    if args.paginas:
+        paginas = {Path(p.split("=", 1)[0]): (p.split("=", 1)[1] if "=" in p else "") for p in args.paginas}
+
+    print(f"🧪 Hoofdtekst-extractie vs regex ({args.herhalingen}x per pagina, tokens voor {args.model})\n")
+    print(f"   {'pagina':<24}{'KB':>7}{'regex Mch/s':>13}{'extr. Mch/s':>13}"
+          f"{'tokens regex':>14}{'extr.':>8}{'bespaard':>10}{'verstuurd':>16}")
+    totaal_regex = totaal_extractie = 0
+    for pad, url in paginas.items():
+        html = pad.read_text(encoding="utf-8", errors="replace")
+        t_regex, tekst_regex = meet(regex_clean, html, herhalingen=args.herhalingen)
+        t_extractie, tekst_extractie = meet(extract_main_text, html, url, herhalingen=args.herhalingen)
+
+        tokens_regex = count_tokens(tekst_regex, args.model)
+        tokens_extractie = count_tokens(tekst_extractie, args.model)
+        verstuurd_regex = count_tokens(tekst_regex[:REGEX_MAX_CHARS], args.model)
+        verstuurd_extractie = count_tokens(truncate_tokens(tekst_extractie, MAX_CONTENT_TOKENS, args.model),
+                                           args.model)
+        totaal_regex += verstuurd_regex
+        totaal_extractie += verstuurd_extractie
+        print(f"   {pad.name[:23]:<24}{len(html) / 1024:>7.0f}{len(html) / t_regex / 1e6:>13.2f}"
+              f"{len(html) / t_extractie / 1e6:>13.2f}{tokens_regex:>14}{tokens_extractie:>8}"
+              f"{tokens_regex - tokens_extractie:>10}{f'{verstuurd_regex} → {verstuurd_extractie}':>16}")
+
+    print(f"\n✅ Per pagina verstuurd: {totaal_regex / len(paginas):.0f} → {totaal_extractie / len(paginas):.0f} tokens "
+          f"(regex afgekapt op {REGEX_MAX_CHARS} tekens, extractie op {MAX_CONTENT_TOKENS} tokens)")
+
+
+if __name__ == "__main__":
+    main()
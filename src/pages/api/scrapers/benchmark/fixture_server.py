@@ -0,0 +1,186 @@
+"""
+Local HTTP server that plays Burger & Overheid, VNG and Leiden (pages and OAI-PMH).
+
+Every response is delayed by `latency_ms` ± `jitter_ms` so concurrency changes
+show up the way they would against the real sites. Request counts per site are
+available at /_stats and are reset with /_reset.
+
+    python benchmark/fixture_server.py --port 8765 --latency 80 --jitter 40
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from fixtures import Fixtures
+
+OAI_NS = ('xmlns="http://www.openarchives.org/OAI/2.0/" '
+          'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"')
+DC_NS = ('xmlns:oai_dc="http://www.openarchives.org/OAI/2.0/oai_dc/" '
+         'xmlns:dc="http://purl.org/dc/elements/1.1/"')
+
+
+def oai_response(verb, body, request_attrs=""):
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n<OAI-PMH {OAI_NS}>'
+            f"<responseDate>{time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}</responseDate>"
+            f'<request verb="{verb}"{request_attrs}>http://localhost/oai/request</request>{body}</OAI-PMH>')
+
+
+def oai_record(r):
+    status = ' status="deleted"' if r["deleted"] else ""
+    header = (f'<header{status}>'
+              f'<identifier>{r["identifier"]}</identifier><datestamp>{r["datestamp"]}</datestamp></header>')
+    if r["deleted"]:
+        return f"<record>{header}</record>"
+    creators = "".join(f"<dc:creator>{escape(c)}</dc:creator>" for c in r["creator"])
+    return (f"<record>{header}<metadata><oai_dc:dc {DC_NS}>"
+            f"<dc:title>{escape(r['title'])}</dc:title>{creators}"
+            f"<dc:date>{r['datestamp']}</dc:date><dc:language>{r['language']}</dc:language>"
+            f"<dc:identifier>{r['handle']}</dc:identifier></oai_dc:dc></metadata></record>")
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures, latency_ms=0, jitter_ms=0):
+        super().__init__(address, FixtureHandler)
+        self.fixtures = fixtures
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.counts = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(fixtures.seed)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self):
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        time.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+    def tel(self, site):
+        with self._lock:
+            self.counts[site] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        fx = server.fixtures
+        delen = urlsplit(self.path)
+        pad, query = delen.path, parse_qs(delen.query)
+
+        if pad == "/_stats":
+            return self._send(200, json.dumps(server.stats()), "application/json")
+        if pad == "/_reset":
+            server.reset()
+            return self._send(200, "{}", "application/json")
+
+        server.delay()
+
+        m = re.fullmatch(r"/blog/page/(\d+)/?", pad)
+        if m:
+            server.tel("burgeroverheid")
+            html = fx.bo_listing(server.base_url, int(m.group(1)))
+            return self._send(200, html) if html else self._send(404, "niet gevonden")
+        m = re.fullmatch(r"/artikel/([^/]+)/?", pad)
+        if m:
+            server.tel("burgeroverheid")
+            return self._send(200, fx.bo_detail(m.group(1)))
+
+        if pad == "/vng/publicaties":
+            server.tel("vng")
+            pagina = int(query.pop("page", ["0"])[0])
+            filter_ = "&".join(f"{k}={v[0]}" for k, v in sorted(query.items()))
+            return self._send(200, fx.vng_listing(filter_, pagina))
+
+        m = re.fullmatch(r"/handle/1887/(\d+)", pad)
+        if m:
+            server.tel("leiden")
+            return self._send(200, fx.leiden_detail(m.group(1)))
+
+        if pad == "/oai/request":
+            server.tel("leiden oai")
+            return self._send(200, self._oai(query), "text/xml; charset=utf-8")
+
+        self._send(404, "niet gevonden")
+
+    def _oai(self, query):
+        fx = self.server.fixtures
+        verb = query.get("verb", [""])[0]
+        if verb == "Identify":
+            return oai_response(verb, "<Identify><repositoryName>Fixture</repositoryName>"
+                                      f"<earliestDatestamp>{fx.oai_earliest}</earliestDatestamp>"
+                                      "<granularity>YYYY-MM-DD</granularity></Identify>")
+        if verb != "ListRecords":
+            return oai_response(verb, '<error code="badVerb">Onbekend verb</error>')
+
+        if "resumptionToken" in query:
+            try:
+                van, tot, offset = query["resumptionToken"][0].split("|")
+                offset = int(offset)
+            except ValueError:
+                return oai_response(verb, '<error code="badResumptionToken">Ongeldig token</error>')
+        else:
+            van, tot, offset = query.get("from", [""])[0], query.get("until", [""])[0], 0
+
+        records, totaal, volgende = fx.oai_page(van, tot, offset)
+        if not records:
+            return oai_response(verb, '<error code="noRecordsMatch">Geen records</error>')
+        volgend_token = f"{van}|{tot}|{volgende}" if volgende is not None else ""
+        token = (f'<resumptionToken completeListSize="{totaal}" cursor="{offset}">'
+                 f'{volgend_token}</resumptionToken>')
+        return oai_response(verb, f"<ListRecords>{''.join(map(oai_record, records))}{token}</ListRecords>")
+
+
+def start_server(fixtures, port=0, latency_ms=0, jitter_ms=0):
+    """Start the server on a background thread; returns the server (use .base_url, .shutdown())"""
+    server = FixtureServer(("127.0.0.1", port), fixtures, latency_ms, jitter_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fixture-server voor de scraper-benchmark")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=50, help="vertraging per request in ms")
+    parser.add_argument("--jitter", type=float, default=20, help="± spreiding op de vertraging in ms")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    server = FixtureServer(("127.0.0.1", args.port), Fixtures(seed=args.seed), args.latency, args.jitter)
+    print(f"🧪 Fixture-server op {server.base_url} (latency {args.latency}±{args.jitter} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
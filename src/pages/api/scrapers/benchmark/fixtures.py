@@ -0,0 +1,141 @@
+"""
+Deterministic fixture pages for the offline benchmark.
+
+The Burger & Overheid listing is the recorded page in ../debug-pagina1.html with
+its article links rewritten per page; the other pages are generated with the
+markup the scrapers select on. Everything derives from `seed`, so two runs with
+the same settings serve byte-identical pages.
+"""
+import random
+import re
+from datetime import date, timedelta
+from html import escape
+from pathlib import Path
+from urllib.parse import quote
+
+SCRAPERS_DIR = Path(__file__).resolve().parent.parent
+BO_LISTING_TEMPLATE = SCRAPERS_DIR / "debug-pagina1.html"
+
+MAANDEN = ["januari", "februari", "maart", "april", "mei", "juni", "juli",
+           "augustus", "september", "oktober", "november", "december"]
+WOORDEN = ("bestuursrecht omgevingswet gemeente awb bezwaar beroep subsidie openbaarheid "
+           "handhaving vergunning raad college toezicht privacy woo grondwet rechter").split()
+
+# Padding so detail pages weigh roughly what the real ones do
+OPVULLING = "<p>" + ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40) + "</p>\n"
+
+
+def _titel(rng):
+    return " ".join(rng.choice(WOORDEN) for _ in range(rng.randint(4, 9))).capitalize()
+
+
+def _datum(rng, vanaf=date(2005, 1, 1), dagen=20 * 365):
+    return vanaf + timedelta(days=rng.randrange(dagen))
+
+
+def _nl_datum(d):
+    return f"{d.day} {MAANDEN[d.month - 1]} {d.year}"
+
+
+class Fixtures:
+    def __init__(self, seed=42, bo_pages=10, vng_pages=15, vng_per_page=10,
+                 leiden_details=200, oai_records=1000, oai_page_size=100):
+        self.seed = seed
+        self.bo_pages = bo_pages
+        self.vng_pages = vng_pages
+        self.vng_per_page = vng_per_page
+        self.leiden_details = leiden_details
+        self.oai_records = oai_records
+        self.oai_page_size = oai_page_size
+        self._bo_template = BO_LISTING_TEMPLATE.read_text(encoding="utf-8")
+        self._oai = self._build_oai_records()
+
+    def config(self):
+        return {k: v for k, v in vars(self).items() if not k.startswith("_")}
+
+    def _rng(self, *key):
+        return random.Random(f"{self.seed}:{':'.join(map(str, key))}")
+
+    # --- Burger & Overheid -------------------------------------------------
+
+    def bo_listing(self, base, page):
+        if not 1 <= page <= self.bo_pages:
+            return None
+        return re.sub(
+            r"https://www\.burgeroverheid\.nl/artikel/([^\"/]+)/",
+            lambda m: f"{base}/artikel/p{page}-{m.group(1)}/",
+            self._bo_template,
+        )
+
+    def bo_detail(self, slug):
+        rng = self._rng("bo", slug)
+        return (f"<html><body><article><h1>{escape(slug)}</h1>"
+                f"<div class=\"article-single__editor\"><p><em>Geplaatst op {_nl_datum(_datum(rng))}</em></p>"
+                f"{OPVULLING * 3}</div></article></body></html>")
+
+    # --- VNG ----------------------------------------------------------------
+
+    def vng_listing(self, query, page):
+        if not 0 <= page < self.vng_pages:
+            return "<html><body><div class=\"node-list\"></div></body></html>"
+        rng = self._rng("vng", query, page)
+        items = []
+        for i in range(self.vng_per_page):
+            slug = f"{quote(query, safe='')}-{page}-{i}"
+            items.append(
+                f"<div class=\"node-list__item\"><div class=\"field--node-post-date\">{_nl_datum(_datum(rng))}</div>"
+                f"<h2><a href=\"/publicaties/{slug}\">{escape(_titel(rng))}</a></h2>"
+                f"<p>{escape(_titel(rng))}</p></div>"
+            )
+        pager = "".join(
+            f"<li class=\"pager__item\"><a href=\"?{escape(query)}&amp;page={n}\">{n + 1}</a></li>"
+            for n in range(self.vng_pages)
+        )
+        return (f"<html><body><div class=\"node-list\">{''.join(items)}</div>"
+                f"<nav class=\"pager\" role=\"navigation\"><ul>{pager}</ul></nav>{OPVULLING}</body></html>")
+
+    # --- Leiden -------------------------------------------------------------
+
+    def leiden_detail_urls(self, base):
+        return [f"{base}/handle/1887/{3500000 + n}" for n in range(self.leiden_details)]
+
+    def leiden_detail(self, handle):
+        rng = self._rng("leiden", handle)
+        auteurs = "".join(f"<div class=\"dc-author\">{escape(_titel(rng).split()[0])}, A.</div>"
+                          for _ in range(rng.randint(1, 3)))
+        tags = "".join(f"<a href=\"#\">{w}</a>" for w in rng.sample(WOORDEN, 3))
+        return (f"<html><body><h1>{escape(_titel(rng))}</h1>{auteurs}"
+                f"<div class=\"dc-date\">{_datum(rng).isoformat()}</div>"
+                f"<div class=\"dc-description-tags\">{tags}</div>"
+                f"<div class=\"dc-collections\">Institute of Public Law</div>{OPVULLING * 4}</body></html>")
+
+    # --- Leiden OAI-PMH -----------------------------------------------------
+
+    def _build_oai_records(self):
+        rng = self._rng("oai")
+        records = []
+        for n in range(self.oai_records):
+            datestamp = _datum(rng).isoformat()
+            records.append({
+                "identifier": f"oai:scholarlypublications.universiteitleiden.nl:item_{n}",
+                "datestamp": datestamp,
+                "deleted": rng.random() < 0.02,
+                "title": _titel(rng),
+                "creator": [_titel(rng).split()[0] + ", B." for _ in range(rng.randint(1, 3))],
+                "language": "nl" if rng.random() < 0.8 else "en",
+                "handle": f"https://hdl.handle.net/1887/{4000000 + n}",
+            })
+        records.sort(key=lambda r: r["datestamp"])
+        return records
+
+    @property
+    def oai_earliest(self):
+        return self._oai[0]["datestamp"] if self._oai else "2005-01-01"
+
+    def oai_page(self, van=None, tot=None, offset=0):
+        """(records op deze pagina, totaal aantal matches, volgende offset of None)"""
+        matches = [r for r in self._oai
+                   if (not van or r["datestamp"] >= van[:10]) and (not tot or r["datestamp"] <= tot[:10])]
+        pagina = matches[offset:offset + self.oai_page_size]
+        volgende = offset + self.oai_page_size
+        return pagina, len(matches), volgende if volgende < len(matches) else None
@@ -0,0 +1,228 @@
+"""
+Offline benchmark of the HTTP scrapers against the local fixture server.
+
+Each scenario runs in a fresh child process (own HTTP cache, own working
+directory) so peak RSS and cache state do not leak between scenarios. Results
+are appended to results.jsonl together with the git commit and the full
+fixture/latency configuration; a run is compared with the most recent earlier
+commit that used the same configuration.
+
+    python benchmark/run_benchmark.py                      # alle scenario's
+    python benchmark/run_benchmark.py vng leiden-oai -n 3 --latency 100
+    python benchmark/run_benchmark.py --beleefd            # met de echte rate limits
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SCRAPERS_DIR = BENCHMARK_DIR.parent
+RESULTS_FILE = BENCHMARK_DIR / "results.jsonl"
+
+SCENARIOS = ["burgeroverheid", "vng", "leiden-detail", "leiden-oai", "leiden-oai-parallel"]
+
+
+# --- child: run one scenario against `base` ----------------------------------
+
+def _run_burgeroverheid(base, beleefd):
+    import scraper
+    scraper.base_url = base + "/blog/page/{}/"
+    scraper.base_domain = base
+    if beleefd:
+        return len(scraper.scrape_burgeroverheid())
+    return len(scraper.scrape_burgeroverheid(rate=None))
+
+
+def _run_vng(base, beleefd):
+    import scrape_vng
+    if not beleefd:
+        scrape_vng.RATE_PER_HOST = None
+    totaal = 0
+    for categorie in scrape_vng.VNG_CATEGORIEEN:
+        base_url = categorie["base_url"].replace("https://vng.nl", base + "/vng")
+        totaal += len(scrape_vng.scrape_vng_http(**dict(categorie, base_url=base_url)))
+    return totaal
+
+
+def _run_leiden_detail(base, beleefd, fixtures):
+    import scrape_leiden_detaildata
+    urls = fixtures.leiden_detail_urls(base)
+    kwargs = {} if beleefd else {"min_interval": 0}
+    return len(asyncio.run(scrape_leiden_detaildata.harvest_details(urls, **kwargs)))
+
+
+def _run_leiden_oai(base, beleefd):
+    import scrape_leiden_oai
+    from checkpoint_journal import CheckpointJournal
+    scrape_leiden_oai.OAI_ENDPOINT = base + "/oai/request"
+    journal = CheckpointJournal(scrape_leiden_oai.JOURNAL_FILE, key=scrape_leiden_oai.record_sleutel)
+    aantal, _ = scrape_leiden_oai.harvest_partitie(scrape_leiden_oai.OAI_SET, None, None, journal, threading.Lock())
+    journal.close()
+    return aantal
+
+
+def _run_leiden_oai_parallel(base, beleefd):
+    import scrape_leiden_oai
+    scrape_leiden_oai.OAI_ENDPOINT = base + "/oai/request"
+    return len(scrape_leiden_oai.run_parallel_harvest(workers=4))
+
+
+def run_child(scenario, base, beleefd, fixture_config):
+    sys.path.insert(0, str(SCRAPERS_DIR))
+    sys.path.insert(0, str(BENCHMARK_DIR))
+    from fixtures import Fixtures
+
+    runners = {
+        "burgeroverheid": lambda: _run_burgeroverheid(base, beleefd),
+        "vng": lambda: _run_vng(base, beleefd),
+        "leiden-detail": lambda: _run_leiden_detail(base, beleefd, Fixtures(**fixture_config)),
+        "leiden-oai": lambda: _run_leiden_oai(base, beleefd),
+        "leiden-oai-parallel": lambda: _run_leiden_oai_parallel(base, beleefd),
+    }
+    uitvoer = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(uitvoer):
+        items = runners[scenario]()
+    seconden = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    print(json.dumps({"items": items, "seconds": seconden,
+                      "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}))
+
+
+# --- parent: fixture server, repeats, reporting ------------------------------
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRAPERS_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--", "."], cwd=SCRAPERS_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "onbekend"
+
+
+def run_scenario(scenario, server, beleefd, fixture_config):
+    server.reset()
+    with tempfile.TemporaryDirectory(prefix="scraper-bench-") as tmp:
+        env = dict(os.environ, HTTP_CACHE_DIR=str(Path(tmp) / ".http_cache"),
+                   SCRAPER_METRICS_FILE=str(Path(tmp) / "metrics.jsonl"))
+        proces = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "--child", scenario, "--base", server.base_url,
+             "--fixture-config", json.dumps(fixture_config)] + (["--beleefd"] if beleefd else []),
+            cwd=tmp, env=env, capture_output=True, text=True,
+        )
+    if proces.returncode != 0:
+        raise RuntimeError(proces.stderr.strip().splitlines()[-1] if proces.stderr.strip() else "onbekende fout")
+    resultaat = json.loads(proces.stdout.strip().splitlines()[-1])
+    resultaat["requests"] = server.stats()
+    return resultaat
+
+
+def vorige_resultaten(config, commit):
+    """Laatste resultaat per scenario van een eerdere commit met dezelfde configuratie"""
+    vorige = {}
+    if not RESULTS_FILE.exists():
+        return vorige
+    with open(RESULTS_FILE, encoding="utf-8") as f:
+        for regel in f:
+            try:
+                r = json.loads(regel)
+            except json.JSONDecodeError:
+                continue
+            if r.get("config") == config and r.get("commit") != commit:
+                vorige[r["scenario"]] = r
+    return vorige
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper-benchmark tegen de fixture-server")
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help=f"scenario's om te draaien (standaard alle: {', '.join(SCENARIOS)})")
+    parser.add_argument("-n", "--herhalingen", type=int, default=1, help="herhalingen per scenario; de mediaan telt")
+    parser.add_argument("--latency", type=float, default=50, help="vertraging per request in ms")
+    parser.add_argument("--jitter", type=float, default=20, help="± spreiding op de vertraging in ms")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--beleefd", action="store_true", help="gebruik de rate limits van de scrapers zelf")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--base", help=argparse.SUPPRESS)
+    parser.add_argument("--fixture-config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        fixture_config = json.loads(args.fixture_config)
+        return run_child(args.child, args.base, args.beleefd, fixture_config)
+
+    onbekend = set(args.scenarios) - set(SCENARIOS)
+    if onbekend:
+        parser.error(f"onbekend scenario: {', '.join(sorted(onbekend))}")
+
+    sys.path.insert(0, str(BENCHMARK_DIR))
+    from fixture_server import start_server
+    from fixtures import Fixtures
+
+    fixtures = Fixtures(seed=args.seed)
+    server = start_server(fixtures, latency_ms=args.latency, jitter_ms=args.jitter)
+    config = {"fixtures": fixtures.config(), "latency_ms": args.latency, "jitter_ms": args.jitter,
+              "beleefd": args.beleefd}
+    commit = git_commit()
+    vorige = vorige_resultaten(config, commit)
+    print(f"🧪 Benchmark op {commit} tegen {server.base_url} (latency {args.latency}±{args.jitter} ms)")
+
+    regels = []
+    for scenario in args.scenarios or SCENARIOS:
+        metingen = []
+        for _ in range(args.herhalingen):
+            try:
+                metingen.append(run_scenario(scenario, server, args.beleefd, fixtures.config()))
+            except Exception as e:
+                print(f"❌ {scenario} mislukt: {e}")
+                break
+        if not metingen:
+            continue
+
+        mediaan = sorted(metingen, key=lambda m: m["seconds"])[len(metingen) // 2]
+        resultaat = {
+            "commit": commit,
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "scenario": scenario,
+            "config": config,
+            "items": mediaan["items"],
+            "seconds": round(mediaan["seconds"], 3),
+            "items_per_s": round(mediaan["items"] / mediaan["seconds"], 1) if mediaan["seconds"] else 0.0,
+            "peak_rss_mb": max(m["peak_rss_mb"] for m in metingen),
+            "requests": mediaan["requests"],
+            "spreiding_s": round(statistics.pstdev(m["seconds"] for m in metingen), 3),
+        }
+        regels.append(resultaat)
+        with open(RESULTS_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resultaat, ensure_ascii=False) + "\n")
+
+    server.shutdown()
+    if not regels:
+        return
+
+    print(f"\n   {'scenario':<22}{'items':>7}{'sec':>9}{'items/s':>9}{'RSS MB':>8}{'requests':>10}   vs vorige")
+    for r in regels:
+        v = vorige.get(r["scenario"])
+        vergelijk = ""
+        if v and v["items_per_s"]:
+            vergelijk = f"{(r['items_per_s'] / v['items_per_s'] - 1) * 100:+.0f}% t.o.v. {v['commit']}"
+        print(f"   {r['scenario']:<22}{r['items']:>7}{r['seconds']:>9}{r['items_per_s']:>9}"
+              f"{r['peak_rss_mb']:>8}{sum(r['requests'].values()):>10}   {vergelijk}")
+    print(f"\n✅ Resultaten toegevoegd aan {RESULTS_FILE.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Register van publicatiebronnen.
+
+Elke bron is een functie `ververs(incrementeel)` die de bron ophaalt en haar eigen
+JSON-bestand in public/content schrijft; `merge_publicaties.py` voegt die daarna
+samen. Een nieuwe bron toevoegen is een functie met `@bron("naam")` erboven.
+Scraper-modules worden pas in de functie geïmporteerd, zodat een bron die
+Playwright nodig heeft de andere bronnen niet blokkeert.
+"""
+
+BRONNEN = {}
+
+
+def bron(naam):
+    def registreer(ververs):
+        BRONNEN[naam] = ververs
+        return ververs
+    return registreer
+
+
+@bron("vng")
+def ververs_vng(incrementeel=False):
+    from scrape_vng import scrape_vng_publicaties
+    return scrape_vng_publicaties(incrementeel=incrementeel)
+
+
+@bron("burgeroverheid")
+def ververs_burgeroverheid(incrementeel=False):
+    from scraper import ververs_burgeroverheid
+    return ververs_burgeroverheid(incrementeel=incrementeel)
+
+
+@bron("leiden")
+def ververs_leiden(incrementeel=False):
+    # De Leidse zoekresultaten hebben geen stabiele volgorde; altijd volledig
+    from scrape_leiden import run_final_nl_scraper
+    return run_final_nl_scraper()
+
+
+@bron("stibbe")
+def ververs_stibbe(incrementeel=False):
+    # De RSS-feed is klein genoeg om altijd in zijn geheel op te halen
+    from scrape_stibbe import ververs_stibbe
+    return ververs_stibbe()
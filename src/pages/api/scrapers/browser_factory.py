@@ -0,0 +1,99 @@
+import os
+from urllib.parse import urlsplit
+
+import metrics
+import record_replay
+
+# Zet SCRAPER_DEBUG=1 om mee te kijken: zichtbare browser en vertraagde acties
+DEBUG = os.getenv("SCRAPER_DEBUG", "") not in ("", "0")
+DEBUG_SLOW_MO = int(os.getenv("SCRAPER_SLOW_MO", "150"))
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Safari/537.36"
+)
+VIEWPORT = {"width": 1280, "height": 800}
+
+# Resources die we voor het scrapen nooit nodig hebben
+GEBLOKKEERDE_TYPES = {"image", "media", "font"}
+TRACKER_DOMEINEN = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "hotjar.com",
+    "siteimproveanalytics.com",
+    "siteimproveanalytics.io",
+    "cookiebot.com",
+    "matomo.cloud",
+    "linkedin.com",
+    "twitter.com",
+)
+
+
+def is_tracker(url):
+    host = urlsplit(url).hostname or ""
+    return any(host == domein or host.endswith("." + domein) for domein in TRACKER_DOMEINEN)
+
+
+def _is_onnodig(request):
+    return request.resource_type in GEBLOKKEERDE_TYPES or is_tracker(request.url)
+
+
+def _blokkeer_onnodig(route):
+    if _is_onnodig(route.request):
+        route.abort()
+    else:
+        route.continue_()
+
+
+# Resource types waarvan de laadtijd in de metrics komt
+GEMETEN_TYPES = {"document", "xhr", "fetch"}
+
+
+def _meet_request(request):
+    if request.resource_type not in GEMETEN_TYPES:
+        return
+    # timing is onderdeel van het requestfinished-event, dus dit kost geen extra round-trip
+    eind_ms = request.timing.get("responseEnd", -1)
+    if eind_ms >= 0:
+        metrics.observe(f"playwright {request.resource_type}", eind_ms / 1000)
+
+
+def _meet_mislukt(request):
+    if request.resource_type in GEMETEN_TYPES and not is_tracker(request.url):
+        metrics.observe(f"playwright {request.resource_type}", 0, error=True)
+
+
+def launch_browser(p, debug=None, slow_mo=None):
+    """Start Chromium: headless en zonder slow_mo, tenzij debug aan staat."""
+    debug = DEBUG if debug is None else debug
+    if debug:
+        return p.chromium.launch(headless=False, slow_mo=DEBUG_SLOW_MO if slow_mo is None else slow_mo)
+    return p.chromium.launch(headless=True)
+
+
+def new_context(browser, blokkeer=True, stealth=True, **opties):
+    """Maak een browsercontext met vaste user-agent, NL-locale en resource-blokkering.
+
+    Stealth wordt één keer op de context gezet en geldt zo voor elke pagina die
+    daarin wordt geopend.
+    """
+    opties.setdefault("viewport", VIEWPORT)
+    opties.setdefault("user_agent", USER_AGENT)
+    opties.setdefault("locale", "nl-NL")
+    context = browser.new_context(**opties)
+
+    context.on("requestfinished", _meet_request)
+    context.on("requestfailed", _meet_mislukt)
+    if blokkeer:
+        context.route("**/*", _blokkeer_onnodig)
+    if record_replay.mode() != "off":
+        # Later geregistreerde routes gaan voor; wat geblokkeerd wordt valt terug op _blokkeer_onnodig
+        context.route("**/*", record_replay.playwright_route(overslaan=_is_onnodig if blokkeer else None))
+    if stealth:
+        from playwright_stealth import stealth_sync
+        # stealth_sync voegt alleen init-scripts toe; op de context geldt dat voor alle pagina's
+        stealth_sync(context)
+    return context
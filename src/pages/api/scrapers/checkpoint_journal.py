@@ -0,0 +1,101 @@
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class CheckpointJournal:
+    """
+    Append-only JSONL journal for long-running scrapes and batch runs.
+
+    Every finished record is written as one line, so saving progress costs
+    O(record) instead of rewriting the whole output file. A restarted run
+    calls `load()` to see which keys are already done, and `compact()` turns
+    the journal into the final JSON file once the run has completed.
+    """
+
+    def __init__(self, path, key: Callable[[Dict], str] = lambda record: record.get("url", "")):
+        self.path = Path(path)
+        self.key = key
+        self.records: Dict[str, Dict] = {}
+        self._handle = None
+
+    def load(self) -> List[Dict]:
+        """Read existing journal entries; a torn last line from a crash is ignored"""
+        self.records = {}
+        if not self.path.exists():
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self.records[self.key(record)] = record
+        if self.records:
+            print(f"📒 {len(self.records)} records hervat uit {self.path.name}")
+        return list(self.records.values())
+
+    def is_done(self, key: str) -> bool:
+        return key in self.records
+
+    def append(self, record: Dict) -> None:
+        """Append one record and flush it to disk"""
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.path, "a", encoding="utf-8")
+            # Start on a fresh line if the previous run died halfway through a write
+            if self._handle.tell() > 0:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._handle.write("\n")
+        self._handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._handle.flush()
+        self.records[self.key(record)] = record
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def compact(self, output_path, order: Optional[Iterable[str]] = None, indent: int = 2,
+                keep_journal: bool = False) -> List[Dict]:
+        """
+        Write all journaled records to `output_path` as a JSON list and remove the journal.
+
+        Args:
+            output_path: Final JSON file
+            order: Optional keys giving the output order; records not listed are appended
+            keep_journal: Keep the journal so a next run only retries what is still missing
+
+        Returns:
+            The records that were written
+        """
+        self.close()
+        if order is not None:
+            ordered = [self.records[k] for k in dict.fromkeys(order) if k in self.records]
+            listed = {self.key(r) for r in ordered}
+            ordered += [r for k, r in self.records.items() if k not in listed]
+        else:
+            ordered = list(self.records.values())
+
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(ordered, f, indent=indent, ensure_ascii=False)
+        os.replace(tmp_path, output_path)
+
+        if not keep_journal:
+            self.discard()
+        return ordered
+
+    def discard(self) -> None:
+        """Remove the journal file after its contents have been saved elsewhere"""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,64 @@
+"""
+Bulk-extractie van resultaatitems in één Playwright round-trip.
+
+Elke `.count()`, `.inner_text()` of `.get_attribute()` op een locator is een aparte
+IPC-aanroep naar de browser. `extract_items` draait in plaats daarvan één
+`page.evaluate` die alle items op de pagina in één keer uitleest en als JSON teruggeeft.
+
+Een veldspecificatie ziet er zo uit:
+
+    {
+        "titel": {"selectors": ["h3 a", "a"], "attribuut": "href", "negeer": ["..."]},
+        "auteurs": {"selectors": [".dc-author"], "alle": True},
+    }
+
+- `selectors`: geprobeerd in volgorde; de eerste met niet-lege tekst wint
+- `attribuut`: ook dit attribuut van hetzelfde element teruggeven, als `<veld>_<attribuut>`
+- `alle`: alle niet-lege teksten van de eerste selector met resultaten, als lijst
+- `negeer`: teksten die niet als geldige waarde tellen
+"""
+
+import metrics
+
+BULK_EXTRACT_JS = """([itemSelector, velden]) => {
+    const tekst = (el) => (el.innerText || el.textContent || '').trim();
+    return Array.from(document.querySelectorAll(itemSelector)).map((item) => {
+        const resultaat = {};
+        for (const [naam, spec] of Object.entries(velden)) {
+            const negeer = spec.negeer || [];
+            if (spec.alle) {
+                resultaat[naam] = [];
+                for (const selector of spec.selectors) {
+                    const waarden = Array.from(item.querySelectorAll(selector)).map(tekst).filter((t) => t);
+                    if (waarden.length) {
+                        resultaat[naam] = waarden;
+                        break;
+                    }
+                }
+                continue;
+            }
+            resultaat[naam] = '';
+            if (spec.attribuut) resultaat[naam + '_' + spec.attribuut] = null;
+            for (const selector of spec.selectors) {
+                const el = item.querySelector(selector);
+                if (!el) continue;
+                const waarde = tekst(el);
+                if (!waarde || negeer.includes(waarde)) continue;
+                resultaat[naam] = waarde;
+                if (spec.attribuut) resultaat[naam + '_' + spec.attribuut] = el.getAttribute(spec.attribuut);
+                break;
+            }
+        }
+        return resultaat;
+    });
+}"""
+
+
+def extract_items(page, item_selector, velden):
+    """Lees alle items die matchen op `item_selector` uit in één `page.evaluate`.
+
+    Returns:
+        Lijst met per item een dict volgens de veldspecificatie
+    """
+    with metrics.timed("playwright evaluate"):
+        return page.evaluate(BULK_EXTRACT_JS, [item_selector, velden])
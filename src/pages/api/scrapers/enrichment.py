@@ -0,0 +1,442 @@
+"""
+One enrichment engine for all OpenAI analysis of publications.
+
+The fields the model can fill in are defined once in FIELDS; a profile is a
+set of them plus the model settings. The page is fetched and cleaned once and
+the profile's fields are requested in a single chat completion, so the
+"enhanced" profile fills the basic fields (thema, auteur, samenvatting, type)
+in the same call. The "basic" profile stays available as the cheaper run.
+
+Only fields that are empty or invalid are asked for: the prompt, the JSON
+schema and max_tokens are built per publication from that set.
+
+    request = prepare_request(publication, "enhanced")
+    ... call the API with request["messages"], request["model"], request["max_tokens"] ...
+    updated = apply_response(publication, answer, request)
+
+or simply `enrich(publication, "basic")` for one publication. The analyzers in
+publication_analyzer_function.py, enhanced_publication_analyzer.py and
+analyze_publications_openai.py are thin wrappers around this module.
+"""
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from enrichment_cache import cache_key, shared_cache
+from hoofdtekst import extract_main_text, truncate_tokens
+from http_cache import fetch_cached
+import metrics
+import record_replay
+import token_ledger
+
+BASE = Path(__file__).resolve().parents[4]
+PAD_THEMES = BASE / "public" / "content" / "themes.json"
+PAD_TYPES = BASE / "public" / "content" / "types.json"
+
+# Bump when the prompt template changes, so cached answers of the old prompt are no longer used
+PROMPT_VERSION = 2
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/91.0.4472.124 Safari/537.36')
+
+# Per field: the instruction, the example value in the JSON answer, an optional
+# extra rule for the "Let op" list, the value used when the answer leaves the
+# field out (KEEP keeps what the publication already had), the output tokens the
+# answer may take, and optionally a check that an existing value is still valid.
+KEEP = object()
+FIELDS = {
+    "thema": {
+        "instructie": "THEMA: Kies het meest passende thema uit: {themes}",
+        "voorbeeld": '"gekozen thema"',
+        "let_op": "Gebruik alleen thema's uit de gegeven lijst",
+        "default": KEEP,
+        "tokens": 30,
+        "geldig": lambda value, themes, types: themes is None or value in themes,
+    },
+    "auteur": {
+        "instructie": "AUTEUR: Identificeer de hoofdauteur (één naam/organisatie)",
+        "voorbeeld": '"hoofdauteur naam"',
+        "let_op": "Geef slechts één hoofdauteur",
+        "default": KEEP,
+        "tokens": 30,
+    },
+    "samenvatting": {
+        "instructie": "SAMENVATTING: Uitgebreide samenvatting van 5-67 zinnen die de kerninhoud weergeeft",
+        "voorbeeld": '"uitgebreide samenvatting van 5-67 zinnen"',
+        "let_op": "Samenvatting moet informatief en volledig zijn",
+        "default": KEEP,
+        "tokens": 1200,
+    },
+    "type": {
+        "instructie": "TYPE: Bevestig/corrigeer uit: {types}",
+        "voorbeeld": '"gekozen type"',
+        "let_op": "Gebruik alleen types uit de gegeven lijst",
+        "default": KEEP,
+        "tokens": 20,
+        "geldig": lambda value, themes, types: types is None or value in types,
+    },
+    "keywords": {
+        "instructie": "KEYWORDS: 3-8 kernwoorden voor filtering/SEO (komma-gescheiden)",
+        "voorbeeld": '"keyword1, keyword2, keyword3, keyword4"',
+        "let_op": "Keywords moeten relevant zijn voor Nederlandse bestuursrecht",
+        "default": "",
+        "tokens": 60,
+    },
+    "audience": {
+        "instructie": 'AUDIENCE: Doelgroep (bv. "Beleidsmedewerkers", "Juridisch adviseurs", "Gemeenten")',
+        "voorbeeld": '"doelgroep beschrijving"',
+        "default": "",
+        "tokens": 40,
+    },
+    "impact": {
+        "instructie": "IMPACT: Korte inschatting van relevantie/impact op beleid",
+        "voorbeeld": '"korte impact inschatting"',
+        "let_op": "Impact moet specifiek zijn over beleidsrelevantie",
+        "default": "",
+        "tokens": 100,
+    },
+    "read_time": {
+        "instructie": 'READ_TIME: Geschatte leestijd in minuten (bv. "5 min")',
+        "voorbeeld": '"X min"',
+        "default": "",
+        "tokens": 10,
+    },
+    "takeaways": {
+        "instructie": "TAKEAWAYS: 3-5 belangrijkste punten als bulletpoints",
+        "voorbeeld": '[\n        "Belangrijk punt 1",\n        "Belangrijk punt 2",\n        "Belangrijk punt 3"\n    ]',
+        "let_op": "Takeaways als array van strings",
+        "default": [],
+        "tokens": 250,
+        "geldig": lambda value, themes, types: isinstance(value, list),
+    },
+    "summary_one_liner": {
+        "instructie": "SUMMARY_ONE_LINER: Samenvatting in één zin voor previews",
+        "voorbeeld": '"korte samenvatting in één zin"',
+        "default": "",
+        "tokens": 60,
+    },
+    "embargo_status": {
+        "instructie": ('EMBARGO_STATUS: Controleer of publicatie onder embargo valt - '
+                       '"Embargo tot [datum]" of "Geen embargo"'),
+        "voorbeeld": '"Embargo tot [datum]" of "Geen embargo"',
+        "let_op": 'Embargo_status: Zoek naar embargo-informatie in de tekst, anders "Geen embargo"',
+        "default": "Geen embargo",
+        "tokens": 20,
+    },
+    "subtype": {
+        "instructie": 'SUBTYPE: Meer specifiek dan type (bv. "Modelverordening", "Raadsvoorstel", "Nieuwsbericht")',
+        "voorbeeld": '"specifieke categorie"',
+        "default": "",
+        "tokens": 20,
+    },
+    "language_level": {
+        "instructie": 'LANGUAGE_LEVEL: "Beleidsmatig", "Juridisch technisch", of "Toegankelijk voor leken"',
+        "voorbeeld": '"taalniveau"',
+        "default": "",
+        "tokens": 20,
+    },
+    "expiry_or_validity": {
+        "instructie": ('EXPIRY_OR_VALIDITY: Tijdgevoeligheid (bv. "Geldig tot [datum]" of '
+                       '"Structureel toepasbaar")'),
+        "voorbeeld": '"tijdgevoeligheid"',
+        "default": "",
+        "tokens": 40,
+    },
+    "relevance_score": {
+        "instructie": "RELEVANCE_SCORE: Relevantiescore 1-10 voor beleidsrelevantie",
+        "voorbeeld": "8",
+        "let_op": "Relevance_score als getal 1-10",
+        "default": 5,
+        "tokens": 10,
+        "geldig": lambda value, themes, types: str(value).isdigit() and 1 <= int(value) <= 10,
+    },
+}
+
+# Room for the JSON braces, quotes and keys around the field values
+ANSWER_OVERHEAD_TOKENS = 100
+
+BASIC_FIELDS = ("thema", "auteur", "samenvatting", "type")
+ENHANCED_FIELDS = tuple(FIELDS)
+
+SYSTEM_PROMPT = "Je bent een expert in Nederlands bestuursrecht en juridische publicaties."
+PROFILES = {
+    "basic": {
+        "fields": BASIC_FIELDS,
+        "model": "gpt-4o",
+        "max_tokens": 1500,
+        "max_content_tokens": 2000,
+        "system": SYSTEM_PROMPT + " Analyseer publicaties nauwkeurig en geef gestructureerde informatie terug.",
+        "intro": "Analyseer de volgende publicatie en vul de ontbrekende gegevens in op basis van de webpagina-inhoud.",
+    },
+    "enhanced": {
+        "fields": ENHANCED_FIELDS,
+        "model": "gpt-4o",
+        "max_tokens": 2000,
+        "max_content_tokens": 3000,
+        "system": (SYSTEM_PROMPT + " Analyseer publicaties zeer uitgebreid en geef gestructureerde, complete "
+                   "informatie terug voor alle gevraagde velden."),
+        "intro": ("Analyseer de volgende Nederlandse juridische/bestuurlijke publicatie zeer uitgebreid en vul "
+                  "alle ontbrekende gegevens in op basis van de webpagina-inhoud."),
+    },
+}
+
+
+def load_themes() -> List[str]:
+    """Load available themes from themes.json"""
+    try:
+        with open(PAD_THEMES, 'r', encoding='utf-8') as f:
+            return json.load(f).get('themes', [])
+    except FileNotFoundError:
+        return ["Algemene beginselen van behoorlijk bestuur", "Handhaving", "Omgevingsrecht"]
+
+
+def load_types() -> List[str]:
+    """Load available types from types.json"""
+    try:
+        with open(PAD_TYPES, 'r', encoding='utf-8') as f:
+            return json.load(f).get('types', [])
+    except FileNotFoundError:
+        return ["Blog", "Handreiking"]
+
+
+def fetch_webpage_content(url: str) -> Optional[str]:
+    """Fetch content from a webpage, via the shared on-disk HTTP cache"""
+    try:
+        return fetch_cached(url, headers={'User-Agent': USER_AGENT}, timeout=30)
+    except Exception as e:
+        print(f"Error fetching {url}: {str(e)}")
+        return None
+
+
+def clean_html_content(html_content: str, max_tokens: int = 2000, url: str = "", model: str = "gpt-4o") -> str:
+    """
+    The main text of the page without navigation, footer and cookie banners, cut off at
+    `max_tokens` tokens of `model`; `url` selects the source's content selectors
+    """
+    return truncate_tokens(extract_main_text(html_content, url), max_tokens, model)
+
+
+def missing_fields(publication: Dict, profile: str = "enhanced", themes: Optional[List[str]] = None,
+                   types: Optional[List[str]] = None) -> List[str]:
+    """
+    The profile's fields that are empty or hold a value that is no longer valid, such as a
+    thema that is not in themes.json (any thema counts as valid when `themes` is None)
+    """
+    missing = []
+    for field in PROFILES[profile]["fields"]:
+        value = publication.get(field)
+        geldig = FIELDS[field].get("geldig")
+        if not value or (geldig is not None and not geldig(value, themes, types)):
+            missing.append(field)
+    return missing
+
+
+def needs_enrichment(publication: Dict, profile: str = "enhanced", themes: Optional[List[str]] = None,
+                     types: Optional[List[str]] = None) -> bool:
+    return bool(missing_fields(publication, profile, themes, types))
+
+
+def max_tokens_for(fields: Iterable[str], profile: str = "enhanced") -> int:
+    """Output token limit for an answer with just these fields, capped at the profile's limit"""
+    return min(PROFILES[profile]["max_tokens"],
+               ANSWER_OVERHEAD_TOKENS + sum(FIELDS[f]["tokens"] for f in fields))
+
+
+def build_prompt(publication: Dict, webpage_content: str, fields: Iterable[str], themes: List[str],
+                 types: List[str], intro: str) -> str:
+    """The user prompt asking for exactly `fields`"""
+    fields = [f for f in FIELDS if f in set(fields)]
+    themes_list, types_list = ", ".join(themes), ", ".join(types)
+    instructies = "\n".join(f"{i}. " + FIELDS[f]["instructie"].format(themes=themes_list, types=types_list)
+                            for i, f in enumerate(fields, 1))
+    voorbeeld = ",\n".join(f'    "{f}": {FIELDS[f]["voorbeeld"]}' for f in fields)
+    let_op = "\n".join(f"- {FIELDS[f]['let_op']}" for f in fields if FIELDS[f].get("let_op"))
+
+    return f"""
+{intro}
+
+PUBLICATIE INFORMATIE:
+Titel: {publication.get('titel', '')}
+URL: {publication.get('url', '')}
+Huidige datum: {publication.get('datum', '')}
+Bron: {publication.get('bron', '')}
+Huidig type: {publication.get('type', '')}
+
+WEBPAGINA INHOUD:
+{webpage_content}
+
+INSTRUCTIES - Analyseer en vul de volgende velden in:
+
+{instructies}
+
+Geef je antwoord in het volgende JSON-formaat:
+{{
+{voorbeeld}
+}}
+
+Let op:
+{let_op}
+- Alle velden zijn verplicht
+- Antwoord alleen met geldige JSON
+"""
+
+
+def fetch_content(publication: Dict, profile: str = "enhanced") -> Optional[str]:
+    """The cleaned text of the publication's webpage, or None when there is none"""
+    url = publication.get('url', '')
+    if not url:
+        print(f"No URL found for publication: {publication.get('titel', 'Unknown')}")
+        return None
+
+    webpage_content = fetch_webpage_content(url)
+    if not webpage_content:
+        print(f"Could not fetch content for: {url}")
+        return None
+    spec = PROFILES[profile]
+    return clean_html_content(webpage_content, spec["max_content_tokens"], url, spec["model"])
+
+
+def build_request(publication: Dict, clean_content: str, fields: List[str], profile: str = "enhanced",
+                  themes: Optional[List[str]] = None, types: Optional[List[str]] = None) -> Dict:
+    """
+    The chat request asking for `fields` of the publication
+
+    Returns:
+        {"messages", "model", "max_tokens", "fields", "profile", "prompt_version", "cache_key"}
+    """
+    spec = PROFILES[profile]
+    prompt = build_prompt(publication, clean_content, fields,
+                          themes if themes is not None else load_themes(),
+                          types if types is not None else load_types(),
+                          spec["intro"])
+    return {
+        "messages": [
+            {"role": "system", "content": spec["system"]},
+            {"role": "user", "content": prompt},
+        ],
+        "model": spec["model"],
+        "max_tokens": max_tokens_for(fields, profile),
+        "fields": fields,
+        "profile": profile,
+        "prompt_version": PROMPT_VERSION,
+        "cache_key": cache_key(clean_content, PROMPT_VERSION, spec["model"], fields),
+    }
+
+
+def fields_to_request(publication: Dict, profile: str = "enhanced", themes: Optional[List[str]] = None,
+                      types: Optional[List[str]] = None, fields: Optional[Iterable[str]] = None) -> List[str]:
+    """`fields` in FIELDS order when given, otherwise the missing and invalid fields of the profile"""
+    if fields is not None:
+        wanted = set(fields)
+        return [f for f in FIELDS if f in wanted]
+    return missing_fields(publication, profile, themes, types)
+
+
+def prepare_request(publication: Dict, profile: str = "enhanced", themes: Optional[List[str]] = None,
+                    types: Optional[List[str]] = None, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+    """
+    Fetch and clean the publication's webpage once and build the chat request for it.
+
+    Only the profile's fields that are missing or invalid are asked for, so the prompt,
+    the JSON schema and the output token limit shrink with what is already known.
+    Pass `fields` to ask for a fixed set instead, e.g. to redo a complete analysis.
+
+    Returns:
+        See `build_request`, or None when there is nothing to analyze
+    """
+    themes = themes if themes is not None else load_themes()
+    types = types if types is not None else load_types()
+    fields = fields_to_request(publication, profile, themes, types, fields)
+    if not fields:
+        return None
+
+    clean_content = fetch_content(publication, profile)
+    if clean_content is None:
+        return None
+    return build_request(publication, clean_content, fields, profile, themes, types)
+
+
+def apply_response(publication: Dict, response_text: str, request: Dict) -> Optional[Dict]:
+    """
+    Merge the model's JSON answer for the requested fields into a copy of the publication
+
+    Returns:
+        The updated publication, or None when the response holds no JSON object
+    """
+    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+    if not json_match:
+        return None
+    analysis_result = json.loads(json_match.group())
+
+    updated_publication = publication.copy()
+    for field in request["fields"]:
+        default = FIELDS[field]["default"]
+        updated_publication[field] = analysis_result.get(
+            field, publication.get(field, '') if default is KEEP else default)
+    return updated_publication
+
+
+def create_client(api_key: Optional[str] = None):
+    from openai import OpenAI
+
+    if api_key is None:
+        from config import OPENAI_API_KEY as api_key
+    return OpenAI(api_key=api_key, http_client=record_replay.openai_http_client())
+
+
+def enrich(publication: Dict, profile: str = "enhanced", api_key: Optional[str] = None, client=None,
+           themes: Optional[List[str]] = None, types: Optional[List[str]] = None,
+           fields: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Analyze a single publication with one API call for its missing fields, or none when
+    nothing is missing or the cache has the answer
+
+    Returns:
+        The updated publication, or the publication unchanged when the analysis failed
+    """
+    titel = publication.get('titel', 'Unknown')
+    request = prepare_request(publication, profile, themes, types, fields)
+    if request is None:
+        return publication
+
+    # An unchanged page with the same prompt and model was analyzed before
+    cache = shared_cache()
+    cached = cache.get(request["cache_key"])
+    if cached is not None:
+        updated_publication = apply_response(publication, cached, request)
+        if updated_publication is not None:
+            print(f"✓ From cache: {titel}")
+            return updated_publication
+
+    if token_ledger.over_budget():
+        print(f"💸 Budget reached, not analyzing: {titel}")
+        return publication
+
+    client = client or create_client(api_key)
+    try:
+        start = time.perf_counter()
+        with metrics.timed("openai"):
+            response = client.chat.completions.create(
+                model=request["model"],
+                messages=request["messages"],
+                temperature=0.3,
+                max_tokens=request["max_tokens"]
+            )
+        token_ledger.record(request["model"], response.usage, time.perf_counter() - start, profile,
+                            publication.get('url', ''))
+
+        response_text = response.choices[0].message.content.strip()
+        updated_publication = apply_response(publication, response_text, request)
+        if updated_publication is None:
+            print(f"Could not parse JSON response for: {titel}")
+            return publication
+        cache.put(request["cache_key"], response_text, profile, PROMPT_VERSION, request["model"],
+                  publication.get('url', ''))
+        print(f"✓ Successfully analyzed ({profile}): {titel}")
+        return updated_publication
+
+    except Exception as e:
+        print(f"Error analyzing publication {titel}: {str(e)}")
+        return publication
@@ -0,0 +1,125 @@
+"""
+Persistent cache of OpenAI enrichment results.
+
+An entry is keyed by a hash of the cleaned page text, the prompt template
+version, the model and the field set that was asked for, and holds the raw
+model answer. Analysing an unchanged page again is served from the cache
+without an API call; a changed page, a bumped prompt version or a different
+model simply produces a different key, so only what actually changed is paid
+for again. Old entries stay around until `prune` drops them.
+
+    python enrichment_cache.py stats
+    python enrichment_cache.py prune      # drop entries of outdated prompt versions
+"""
+import argparse
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from checkpoint_journal import CheckpointJournal
+
+CACHE_FILE = Path(os.getenv("ENRICHMENT_CACHE_FILE", Path(__file__).resolve().parent / ".enrichment_cache.jsonl"))
+
+
+def cache_key(content: str, prompt_version, model: str, fields: Iterable[str]) -> str:
+    digest = hashlib.sha256()
+    for part in (str(prompt_version), model, ",".join(sorted(fields))):
+        digest.update(part.encode("utf-8") + b"\0")
+    digest.update(content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EnrichmentCache:
+    """Append-only JSONL store of model answers by cache key; thread-safe"""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = Path(path)
+        self._journal = CheckpointJournal(self.path, key=lambda entry: entry["key"])
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> None:
+        if not self._loaded:
+            self._journal.load()
+            self._loaded = True
+
+    def get(self, key: str) -> Optional[str]:
+        """The cached answer for `key`, or None"""
+        with self._lock:
+            self._load()
+            entry = self._journal.records.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["response"]
+
+    def put(self, key: str, response: str, profile: str, prompt_version, model: str, url: str = "") -> None:
+        with self._lock:
+            self._load()
+            self._journal.append({"key": key, "profile": profile, "prompt_version": prompt_version,
+                                  "model": model, "url": url, "response": response,
+                                  "ts": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+    def entries(self) -> Dict[str, Dict]:
+        with self._lock:
+            self._load()
+            return dict(self._journal.records)
+
+    def compact(self, keep: Callable[[Dict], bool]) -> int:
+        """Rewrite the cache with only the entries for which `keep` is true; returns how many were dropped"""
+        with self._lock:
+            self._load()
+            self._journal.close()
+            kept = [entry for entry in self._journal.records.values() if keep(entry)]
+            dropped = len(self._journal.records) - len(kept)
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            self._journal = CheckpointJournal(tmp, key=lambda entry: entry["key"])
+            for entry in kept:
+                self._journal.append(entry)
+            self._journal.close()
+            os.replace(tmp, self.path)
+            self._journal.path = self.path
+            return dropped
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> EnrichmentCache:
+    """The process-wide cache on CACHE_FILE"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = EnrichmentCache()
+        return _shared
+
+
+def current_prompt_versions() -> Dict[str, object]:
+    from enrichment import PROFILES, PROMPT_VERSION
+
+    return {profile: PROMPT_VERSION for profile in PROFILES}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Beheer de cache met OpenAI-verrijkingen")
+    parser.add_argument("actie", choices=["stats", "prune"])
+    args = parser.parse_args()
+
+    cache = shared_cache()
+    if args.actie == "stats":
+        per_versie = Counter((e["profile"], e["prompt_version"], e["model"]) for e in cache.entries().values())
+        print(f"🗄️ {sum(per_versie.values())} antwoorden in {cache.path.name}")
+        for (profile, versie, model), aantal in sorted(per_versie.items(), key=str):
+            print(f"   {profile:<10} v{versie:<4} {model:<14} {aantal:>6}")
+    else:
+        actueel = current_prompt_versions()
+        weg = cache.compact(lambda e: actueel.get(e["profile"]) == e["prompt_version"])
+        print(f"🧹 {weg} verouderde antwoorden verwijderd uit {cache.path.name}")
@@ -0,0 +1,240 @@
+"""
+Hoofdtekst van een webpagina, zonder navigatie, footer en cookiebanners.
+
+`extract_main_text` haalt eerst head, scripts, styles en commentaar weg met één
+regex en leest de rest in één streaming pass met de HTML-parser uit de
+standaardbibliotheek. Onderweg wordt alles onder boilerplate-elementen overgeslagen
+(script, style, nav, formulieren, en elementen waarvan class of id op cookie, menu,
+breadcrumb, facet, pager e.d. wijst) en wordt de tekst per content-selector van de
+bron bijgehouden. De eerste selector met genoeg tekst wint; zonder treffer valt de
+extractie terug op de gefilterde tekst van de hele pagina.
+
+Selectors zijn eenvoudige samengestelde selectors: een tagnaam met optioneel
+`.class` en `#id` erachter, zoals `div.article-single__editor`, `main` of `#content`.
+
+`truncate_tokens` kort tekst af op een aantal tokens in plaats van tekens, met de
+tokenizer van het model uit tiktoken. Alleen als die niet te laden is (niet
+geïnstalleerd, of offline vóór de eerste download van het BPE-bestand) valt het
+terug op een schatting van vier tekens per token.
+"""
+import re
+import threading
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# Content-selectors per bron, op volgorde van voorkeur; de sleutel matcht ook subdomeinen
+CONTENT_SELECTORS: Dict[str, List[str]] = {
+    "burgeroverheid.nl": ["div.article-single__editor", "article"],
+    "vng.nl": ["div.node__content", "article", "main"],
+    "scholarlypublications.universiteitleiden.nl": ["div.region-content", "main"],
+    "stibbe.com": ["div.article-body", "article", "main"],
+}
+DEFAULT_SELECTORS = ["article", "main", "#content", "div.content"]
+
+# Een selector telt pas als hij minstens zoveel tekens oplevert
+MIN_CONTENT_CHARS = 200
+
+CHARS_PER_TOKEN = 4
+
+SKIP_TAGS = {"head", "script", "style", "noscript", "template", "svg", "iframe", "nav", "aside",
+             "form", "button", "select", "dialog"}
+# Alleen boilerplate als ze niet binnen de gevonden hoofdtekst staan (titel en auteur staan vaak in <header>)
+PAGE_CHROME_TAGS = {"header", "footer"}
+SKIP_ROLES = {"navigation", "banner", "contentinfo", "search", "dialog", "alertdialog"}
+BOILERPLATE = re.compile(
+    r"(?:^|[\s_-])(?:cookies?|consent|gdpr|banner|footer|copyright|breadcrumbs?|share|sharing|social|newsletter|"
+    r"menu|navbar|navigation|pager|pagination|skip-link|sidebar|facets?|related|element-invisible|"
+    r"visually-hidden|sr-only)"
+    r"(?:$|[\s_-])",
+    re.IGNORECASE,
+)
+# Op deze containers zegt een class als "menu-open" niets over de inhoud
+CONTAINER_TAGS = {"html", "body", "main", "article"}
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param",
+             "source", "track", "wbr"}
+BLOCK_TAGS = {"address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "h1", "h2",
+              "h3", "h4", "h5", "h6", "header", "footer", "hr", "li", "main", "ol", "p", "pre", "section",
+              "table", "td", "th", "tr", "ul"}
+
+# Blokken die nooit tekst opleveren; één regex-pass vooraf scheelt de parser veel werk
+NON_TEXT_BLOCKS = re.compile(r"<(head|script|style|svg|noscript|template)\b.*?</\1\s*>|<!--.*?-->",
+                             re.DOTALL | re.IGNORECASE)
+SELECTOR = re.compile(r"([a-z0-9]*)((?:[.#][\w-]+)*)$", re.IGNORECASE)
+HORIZONTAL_SPACE = re.compile(r"[^\S\n]+")
+
+Selector = Tuple[str, Optional[str], frozenset]
+
+
+def parse_selector(selector: str) -> Selector:
+    """`div.a.b#x` -> ("div", "x", {"a", "b"})"""
+    match = SELECTOR.match(selector.strip())
+    if not match:
+        raise ValueError(f"Niet-ondersteunde selector: {selector!r}")
+    tag, rest = match.group(1).lower(), match.group(2)
+    delen = re.findall(r"([.#])([\w-]+)", rest)
+    ids = [naam for soort, naam in delen if soort == "#"]
+    return tag, ids[0] if ids else None, frozenset(naam for soort, naam in delen if soort == ".")
+
+
+def selectors_for(url: str) -> List[str]:
+    """De content-selectors voor de bron van `url`, met de algemene selectors als terugval"""
+    host = urlparse(url).hostname or ""
+    for domein, selectors in CONTENT_SELECTORS.items():
+        if host == domein or host.endswith("." + domein):
+            return selectors + [s for s in DEFAULT_SELECTORS if s not in selectors]
+    return list(DEFAULT_SELECTORS)
+
+
+class _Extractor(HTMLParser):
+    def __init__(self, selectors: List[Selector]):
+        super().__init__(convert_charrefs=True)
+        self.selectors = selectors
+        # Per open element: (tag, slaat over, indices van matchende selectors)
+        self.stack: List[Tuple[str, bool, Tuple[int, ...]]] = []
+        self.skipping = 0
+        self.open_matches = [0] * len(selectors)
+        # Eén bak per selector, de laatste voor de hele pagina
+        self.buckets: List[List[str]] = [[] for _ in range(len(selectors) + 1)]
+
+    def _emit(self, text: str) -> None:
+        self.buckets[-1].append(text)
+        for i, open_count in enumerate(self.open_matches):
+            if open_count:
+                self.buckets[i].append(text)
+
+    def _is_boilerplate(self, tag: str, attrs: Dict[str, Optional[str]]) -> bool:
+        if tag in SKIP_TAGS:
+            return True
+        if tag in PAGE_CHROME_TAGS and not any(self.open_matches):
+            return True
+        if attrs.get("role") in SKIP_ROLES or attrs.get("aria-hidden") == "true" or "hidden" in attrs:
+            return True
+        if tag in CONTAINER_TAGS:
+            return False
+        return bool(BOILERPLATE.search(attrs.get("class") or "") or BOILERPLATE.search(attrs.get("id") or ""))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag in BLOCK_TAGS and not self.skipping:
+                self._emit("\n")
+            return
+        attrs = dict(attrs)
+        skip = self._is_boilerplate(tag, attrs)
+        matches = ()
+        if not skip:
+            element_id = attrs.get("id")
+            classes = set((attrs.get("class") or "").split())
+            matches = tuple(i for i, (s_tag, s_id, s_classes) in enumerate(self.selectors)
+                            if (not s_tag or s_tag == tag) and (s_id is None or s_id == element_id)
+                            and s_classes <= classes)
+        self.stack.append((tag, skip, matches))
+        self.skipping += skip
+        for i in matches:
+            self.open_matches[i] += 1
+        if tag in BLOCK_TAGS and not self.skipping:
+            self._emit("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS and not self.skipping:
+            self._emit("\n")
+
+    def handle_endtag(self, tag):
+        # Sluit ook elementen die impliciet dichtgaan (een <li> zonder </li>)
+        for diepte in range(len(self.stack) - 1, -1, -1):
+            if self.stack[diepte][0] == tag:
+                break
+        else:
+            return
+        while len(self.stack) > diepte:
+            _, skip, matches = self.stack.pop()
+            self.skipping -= skip
+            for i in matches:
+                self.open_matches[i] -= 1
+        if tag in BLOCK_TAGS and not self.skipping:
+            self._emit("\n")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self._emit(data)
+
+    def texts(self) -> List[str]:
+        return [normalize_whitespace("".join(bucket)) for bucket in self.buckets]
+
+
+def normalize_whitespace(text: str) -> str:
+    """Eén spatie binnen regels, geen lege regels tussen blokken"""
+    return "\n".join(regel for regel in (r.strip() for r in HORIZONTAL_SPACE.sub(" ", text).split("\n")) if regel)
+
+
+def extract_main_text(html: str, url: str = "", selectors: Optional[List[str]] = None) -> str:
+    """
+    De leesbare hoofdtekst van `html`
+
+    Args:
+        html: De volledige pagina
+        url: Adres van de pagina; bepaalt welke content-selectors van toepassing zijn
+        selectors: Eigen selectors in plaats van die van de bron
+    """
+    selectors = selectors if selectors is not None else selectors_for(url)
+    extractor = _Extractor([parse_selector(s) for s in selectors])
+    extractor.feed(NON_TEXT_BLOCKS.sub(" ", html))
+    extractor.close()
+    *per_selector, hele_pagina = extractor.texts()
+    for text in per_selector:
+        if len(text) >= MIN_CONTENT_CHARS:
+            return text
+    return hele_pagina
+
+
+_encodings = {}
+# Workers uit openai_batch en de async pipeline vragen tegelijk om dezelfde encoding
+_encodings_lock = threading.Lock()
+
+
+def _encoding(model: str):
+    """
+    De tiktoken-encoding voor `model`, of None als die niet te laden is: tiktoken niet
+    geïnstalleerd, of offline terwijl het BPE-bestand nog niet gedownload is
+    """
+    if model in _encodings:
+        return _encodings[model]
+    with _encodings_lock:
+        if model not in _encodings:
+            try:
+                import tiktoken
+
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                print(f"⚠️ Geen tokenizer voor {model} ({type(e).__name__}: {e}); "
+                      f"tokens worden geschat op {CHARS_PER_TOKEN} tekens per token")
+                encoding = None
+            _encodings[model] = encoding
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = "gpt-4o") -> str:
+    """`text` afgekort tot hoogstens `max_tokens` tokens, bij voorkeur op een woordgrens"""
+    encoding = _encoding(model)
+    if encoding is None:
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        afgekort = text[:max_chars]
+        spatie = afgekort.rfind(" ", max_chars * 9 // 10)
+        return afgekort[:spatie] if spatie > 0 else afgekort
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
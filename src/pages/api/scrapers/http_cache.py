@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+from http_client import get_session
+
+CACHE_DIR = Path(os.getenv("HTTP_CACHE_DIR", Path(__file__).resolve().parent / ".http_cache"))
+# Within MAX_AGE a cached page is served without touching the network; after that it is revalidated
+MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 24 * 3600))
+MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", 500)) * 1024 * 1024
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache keyed by URL.
+
+    Each entry is a body file plus a small JSON sidecar with the ETag,
+    Last-Modified, encoding and fetch time. Fresh entries are served directly,
+    stale ones are revalidated with a conditional GET, and the least recently
+    used entries are evicted once the cache grows beyond `max_bytes`.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_age: int = MAX_AGE, max_bytes: int = MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+
+    def _paths(self, url: str):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        folder = self.directory / digest[:2]
+        return folder / f"{digest}.json", folder / f"{digest}.body"
+
+    def _read_meta(self, meta_path: Path) -> Optional[Dict]:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f".{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _store(self, url: str, response: requests.Response) -> None:
+        meta_path, body_path = self._paths(url)
+        old_size = body_path.stat().st_size if body_path.exists() else 0
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding or response.apparent_encoding or "utf-8",
+            "fetched_at": time.time(),
+        }
+        self._write(body_path, response.content)
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+        self._grow(len(response.content) - old_size)
+
+    def _touch(self, meta_path: Path, meta: Dict) -> None:
+        meta["fetched_at"] = time.time()
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def _read_body(self, body_path: Path, meta: Dict) -> str:
+        # Bump the mtime so eviction sees this entry as recently used
+        os.utime(body_path, None)
+        return body_path.read_bytes().decode(meta["encoding"], errors="replace")
+
+    def _grow(self, delta: int) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(p.stat().st_size for p in self.directory.glob("*/*.body"))
+            else:
+                self._size += delta
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache is below 90% of its limit"""
+        bodies = sorted(self.directory.glob("*/*.body"), key=lambda p: p.stat().st_mtime)
+        target = self.max_bytes * 0.9
+        for body_path in bodies:
+            if self._size <= target:
+                break
+            size = body_path.stat().st_size
+            body_path.unlink(missing_ok=True)
+            body_path.with_suffix(".json").unlink(missing_ok=True)
+            self._size -= size
+
+    def get(self, url: str, headers: Optional[Dict] = None, timeout: int = 30,
+            session: Optional[requests.Session] = None) -> str:
+        """
+        Return the text of `url`, from cache when fresh or still valid.
+
+        Raises:
+            requests.RequestException when the page cannot be fetched and no cached copy exists
+        """
+        meta_path, body_path = self._paths(url)
+        meta = self._read_meta(meta_path) if body_path.exists() else None
+
+        if meta and time.time() - meta["fetched_at"] < self.max_age:
+            return self._read_body(body_path, meta)
+
+        request_headers = dict(headers or {})
+        if meta:
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = (session or get_session()).get(url, headers=request_headers, timeout=timeout)
+        if response.status_code == 304 and meta:
+            self._touch(meta_path, meta)
+            return self._read_body(body_path, meta)
+
+        response.raise_for_status()
+        self._store(url, response)
+        return response.text
+
+
+_default_cache = None
+
+
+def default_cache() -> HttpCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = HttpCache()
+    return _default_cache
+
+
+def fetch_cached(url: str, headers: Optional[Dict] = None, timeout: int = 30) -> str:
+    """Fetch `url` through the shared on-disk cache"""
+    return default_cache().get(url, headers=headers, timeout=timeout)
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+import record_replay
+from rate_limiter import HostRateLimiter
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+# (connect, read) in seconds; used whenever a caller does not pass its own timeout
+DEFAULT_TIMEOUT = (10, 30)
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", 5))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", 1.0))
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 16))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Per-host politeness limits for everything that goes through the shared session
+HOST_LIMITER = HostRateLimiter()
+
+
+def set_rate_limit(host: str, per_second: float) -> None:
+    """Allow at most `per_second` requests per second to `host` (e.g. "www.burgeroverheid.nl")"""
+    HOST_LIMITER.set_rate(host, per_second)
+
+
+class _TimeoutAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that applies DEFAULT_TIMEOUT and the per-host rate limit to every
+    request, records latency, bytes, retries and errors per host in `metrics`,
+    and records or replays traffic when `record_replay` is active.
+    """
+
+    def send(self, request, **kwargs):
+        if record_replay.mode() != "replay":
+            HOST_LIMITER.wait(request.url)
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = DEFAULT_TIMEOUT
+
+        transport = f"http {urlsplit(request.url).netloc}"
+        start = time.perf_counter()
+        try:
+            response = record_replay.requests_send(super().send, self.build_response, request, **kwargs)
+            # Read the body here (Session would do so right after) so latency includes the download
+            nbytes = 0 if kwargs.get("stream") else len(response.content)
+        except Exception:
+            metrics.observe(transport, time.perf_counter() - start, error=True)
+            raise
+        retries = getattr(response.raw, "retries", None)
+        metrics.observe(transport, time.perf_counter() - start, nbytes=nbytes,
+                        retries=len(retries.history) if retries else 0,
+                        error=response.status_code >= 400)
+        return response
+
+
+def create_session(max_retries: int = MAX_RETRIES, backoff_factor: float = BACKOFF_FACTOR,
+                   pool_maxsize: int = POOL_MAXSIZE) -> requests.Session:
+    """
+    Create a keep-alive session with per-host connection pooling and retries.
+
+    Connection errors and 429/5xx responses are retried with exponential backoff
+    (backoff_factor * 2^n seconds); a Retry-After header from the server wins.
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = _TimeoutAdapter(max_retries=retry, pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "nl-NL,nl;q=0.9"})
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """The process-wide shared session"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """GET through the shared session"""
+    return get_session().get(url, **kwargs)
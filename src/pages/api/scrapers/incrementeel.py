@@ -0,0 +1,53 @@
+"""
+Incrementeel crawlen: stop met pagineren zodra we bij bekende publicaties zijn.
+
+Overzichtspagina's staan op datum, nieuwste eerst. Na `STOP_NA_BEKEND` bekende
+items op rij is de rest van het archief dus al binnen; een dagelijkse run raakt
+dan maar één of twee overzichtspagina's per bron.
+"""
+import json
+from pathlib import Path
+
+from publicatie_index import canonieke_url
+
+STOP_NA_BEKEND = 10
+
+
+def laad_bestaande(pad):
+    """Lees de bestaande bron-JSON; lege lijst als die (nog) niet bestaat of stuk is."""
+    pad = Path(pad)
+    if not pad.exists():
+        return []
+    try:
+        with open(pad, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Kon {pad.name} niet laden, val terug op volledige crawl: {e}")
+        return []
+
+
+class BekendeUrls:
+    """Set van canonieke URL's uit een eerdere run, plus een teller van bekende items op rij."""
+
+    def __init__(self, publicaties, stop_na=STOP_NA_BEKEND):
+        self.urls = {canonieke_url(p.get("url")) for p in publicaties if p.get("url")}
+        self.stop_na = stop_na
+        self.op_rij = 0
+
+    def is_bekend(self, url):
+        """Registreer `url` in de volgorde van het overzicht; True als hij al bekend was."""
+        if canonieke_url(url) in self.urls:
+            self.op_rij += 1
+            return True
+        self.op_rij = 0
+        return False
+
+    @property
+    def klaar(self):
+        return self.op_rij >= self.stop_na
+
+
+def voeg_samen(nieuw, bestaand):
+    """Nieuwe publicaties vooraan, daarna de bestaande die niet opnieuw zijn opgehaald."""
+    gezien = {canonieke_url(p.get("url")) for p in nieuw}
+    return nieuw + [p for p in bestaand if canonieke_url(p.get("url")) not in gezien]
@@ -0,0 +1,232 @@
+"""
+Lightweight run metrics: per-stage throughput and per-transport latency.
+
+Stages are the steps a script walks through ("overzicht", "detail", "analyse");
+they count pages, items and errors and measure wall-clock time, so they report
+pages/sec and items/sec. Transports ("http", "playwright", "openai") collect a
+latency histogram plus bytes, retries and errors per call.
+
+    metrics.start_run("scrape_vng")
+    with metrics.stage("overzicht"):
+        ...
+        metrics.count("overzicht", pages=1, items=len(items))
+    with metrics.timed("playwright"):
+        page.goto(url)
+
+At exit the run is appended to METRICS_FILE (one JSON object per stage and per
+transport) and a summary table is printed. Nothing is written unless
+`start_run` was called, so importing modules that record metrics is free.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+METRICS_FILE = Path(os.getenv("SCRAPER_METRICS_FILE", Path(__file__).resolve().parent / "metrics.jsonl"))
+
+# Upper bounds of the latency buckets in milliseconds; the last bucket is open-ended
+BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class Histogram:
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p):
+        """Upper bound of the bucket that holds the p-th percentile, capped at the largest observation"""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return round(min(self.bounds[i], self.max_ms), 1) if i < len(self.bounds) else round(self.max_ms, 1)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip([str(b) for b in self.bounds] + ["inf"], self.counts)),
+        }
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.started = None
+        self.ended = None
+        self.pages = 0
+        self.items = 0
+        self.errors = 0
+
+    @property
+    def wall_s(self):
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.monotonic()) - self.started
+
+    def to_dict(self):
+        wall = self.wall_s
+        return {
+            "stage": self.name,
+            "wall_s": round(wall, 2),
+            "pages": self.pages,
+            "items": self.items,
+            "errors": self.errors,
+            "pages_per_s": round(self.pages / wall, 2) if wall else 0.0,
+            "items_per_s": round(self.items / wall, 2) if wall else 0.0,
+        }
+
+
+class Transport:
+    def __init__(self, name):
+        self.name = name
+        self.latency = Histogram()
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+
+    def to_dict(self):
+        return {"transport": self.name, "bytes": self.bytes, "retries": self.retries,
+                "errors": self.errors, **self.latency.to_dict()}
+
+
+class Metrics:
+    """Thread-safe collector for one run"""
+
+    def __init__(self):
+        self.run = None
+        self.run_id = None
+        self.stages = {}
+        self.transports = {}
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def start_run(self, name):
+        with self._lock:
+            if self.run is None:
+                atexit.register(self.report)
+            self.run = name
+            self.run_id = uuid.uuid4().hex[:12]
+            self.stages = {}
+            self.transports = {}
+            self._reported = False
+
+    def _stage(self, name):
+        if name not in self.stages:
+            self.stages[name] = Stage(name)
+        return self.stages[name]
+
+    def _transport(self, name):
+        if name not in self.transports:
+            self.transports[name] = Transport(name)
+        return self.transports[name]
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the wall-clock span of a stage; re-entering extends the same span"""
+        with self._lock:
+            stage = self._stage(name)
+            if stage.started is None:
+                stage.started = time.monotonic()
+        try:
+            yield stage
+        finally:
+            with self._lock:
+                stage.ended = time.monotonic()
+
+    def count(self, stage, pages=0, items=0, errors=0):
+        """Add to a stage's counters; outside `stage()` its span runs from the first to the last count"""
+        with self._lock:
+            s = self._stage(stage)
+            now = time.monotonic()
+            if s.started is None:
+                s.started = now
+            s.ended = now
+            s.pages += pages
+            s.items += items
+            s.errors += errors
+
+    def observe(self, transport, seconds, nbytes=0, retries=0, error=False):
+        with self._lock:
+            t = self._transport(transport)
+            t.latency.observe(seconds * 1000)
+            t.bytes += nbytes
+            t.retries += retries
+            t.errors += int(error)
+
+    @contextmanager
+    def timed(self, transport):
+        """Time a call on `transport`; an exception counts as an error and is re-raised"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.observe(transport, time.perf_counter() - start, error=True)
+            raise
+        self.observe(transport, time.perf_counter() - start)
+
+    def records(self):
+        base = {"run": self.run, "run_id": self.run_id, "ts": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with self._lock:
+            return ([{**base, "type": "stage", **s.to_dict()} for s in self.stages.values()]
+                    + [{**base, "type": "transport", **t.to_dict()} for t in self.transports.values()])
+
+    def report(self, path=None):
+        """Append this run to the metrics file and print a summary table"""
+        if self.run is None or self._reported:
+            return
+        self._reported = True
+        records = self.records()
+        if not records:
+            return
+
+        path = Path(path or METRICS_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        print(f"\n📈 Metrics voor {self.run} ({self.run_id}) → {path.name}")
+        stages = [r for r in records if r["type"] == "stage"]
+        if stages:
+            print(f"   {'stage':<22}{'wall s':>9}{'pages':>8}{'pages/s':>9}{'items':>8}{'items/s':>9}{'errors':>8}")
+            for r in stages:
+                print(f"   {r['stage']:<22}{r['wall_s']:>9}{r['pages']:>8}{r['pages_per_s']:>9}"
+                      f"{r['items']:>8}{r['items_per_s']:>9}{r['errors']:>8}")
+        transports = [r for r in records if r["type"] == "transport"]
+        if transports:
+            print(f"   {'transport':<22}{'calls':>9}{'p50 ms':>8}{'p95 ms':>9}{'max ms':>9}{'MB':>8}{'retries':>9}{'errors':>8}")
+            for r in transports:
+                print(f"   {r['transport']:<22}{r['count']:>9}{r['p50_ms']:>8}{r['p95_ms']:>9}{r['max_ms']:>9}"
+                      f"{round(r['bytes'] / 1e6, 1):>8}{r['retries']:>9}{r['errors']:>8}")
+
+
+METRICS = Metrics()
+
+start_run = METRICS.start_run
+stage = METRICS.stage
+count = METRICS.count
+observe = METRICS.observe
+timed = METRICS.timed
+report = METRICS.report
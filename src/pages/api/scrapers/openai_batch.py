@@ -0,0 +1,315 @@
+"""
+Bulk enrichment through the OpenAI Batch API.
+
+A batch costs half of the synchronous price and needs no rate limiting on our
+side. A run goes through four steps:
+
+1. build  - JSONL with one chat request per publication that still needs analysis
+2. submit - upload the JSONL and create the batch (state kept in batch/<profiel>_state.json)
+3. wait   - poll until the batch is finished
+4. merge  - stream the output file to disk and merge it into publicaties.json by custom_id
+
+Pages whose answer is already in the enrichment cache are merged straight
+away and left out of the batch; batch answers are added to the cache. The
+usage of every answer is logged to the token ledger at the batch price. With
+`--budget` the batch only takes as many requests as fit in the budget at
+their worst case: the full prompt plus max_tokens of completion.
+
+`python openai_batch.py enhanced` does all of that. If a batch from an earlier
+run is still pending it is picked up again, so a nightly cron job can simply
+rerun the same command. Use `--base-url` (or OPENAI_BASE_URL) to run against
+the local stand-in in benchmark/batch_stub_server.py.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import metrics
+import record_replay
+import enrichment
+from enrichment_cache import shared_cache
+from hoofdtekst import count_tokens
+from merge_publicaties import PAD_PUBLICATIES
+from publicatie_index import canonieke_url
+import token_ledger
+
+BATCH_DIR = Path(__file__).resolve().parent / "batch"
+ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+MAX_REQUESTS_PER_BATCH = 50000
+POLL_INTERVAL = 60
+FETCH_WORKERS = 8
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def custom_id_voor(publicatie: Dict) -> str:
+    """Stabiele id per publicatie, zodat resultaten terugvinden niet van de volgorde afhangt"""
+    return "pub-" + hashlib.sha256(canonieke_url(publicatie.get('url')).encode("utf-8")).hexdigest()[:24]
+
+
+def _paden(profiel: str) -> Dict[str, Path]:
+    return {soort: BATCH_DIR / f"{profiel}_{soort}.{'json' if soort == 'state' else 'jsonl'}"
+            for soort in ("input", "output", "errors", "state")}
+
+
+def laad_status(profiel: str) -> Optional[Dict]:
+    pad = _paden(profiel)["state"]
+    if pad.exists():
+        with open(pad, encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+def bewaar_status(profiel: str, status: Optional[Dict]) -> None:
+    pad = _paden(profiel)["state"]
+    if status is None:
+        pad.unlink(missing_ok=True)
+        return
+    pad.parent.mkdir(parents=True, exist_ok=True)
+    tmp = pad.with_name(pad.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(status, f, indent=2)
+    os.replace(tmp, pad)
+
+
+def laad_publicaties() -> List[Dict]:
+    with open(PAD_PUBLICATIES, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _kern(request: Dict) -> Dict:
+    """Wat na afloop van de batch nog nodig is om een antwoord te verwerken en te cachen"""
+    return {k: request[k] for k in ("cache_key", "fields", "model", "prompt_version")}
+
+
+def _hoogstens(request: Dict) -> Tuple[float, int]:
+    """Kosten en tokens van een batch-request als het antwoord max_tokens lang wordt"""
+    prompt = sum(count_tokens(m["content"], request["model"]) for m in request["messages"])
+    dollars = token_ledger.cost(request["model"], prompt, 0, request["max_tokens"], batch=True)
+    return dollars or 0.0, prompt + request["max_tokens"]
+
+
+def bouw_batch_input(profiel: str, publicaties: List[Dict], maximum: Optional[int] = None,
+                     budget: Optional[token_ledger.Budget] = None
+                     ) -> Tuple[int, List[Tuple[str, str]], Dict[str, Dict]]:
+    """
+    Schrijf de batch-JSONL voor alle publicaties die analyse nodig hebben, binnen `budget`.
+
+    Returns:
+        Het aantal requests in de batch, de antwoorden die al in de enrichment-cache stonden
+        als (custom_id, antwoord), en per custom_id de kern van het request (zie `_kern`)
+    """
+    themes, types = enrichment.load_themes(), enrichment.load_types()
+    kandidaten, gezien = [], set()
+    for pub in publicaties:
+        custom_id = custom_id_voor(pub)
+        if pub.get('url') and enrichment.needs_enrichment(pub, profiel, themes, types) and custom_id not in gezien:
+            gezien.add(custom_id)
+            kandidaten.append((custom_id, pub))
+    kandidaten = kandidaten[:maximum or MAX_REQUESTS_PER_BATCH]
+    print(f"📝 {len(kandidaten)} publicaties hebben een {profiel}-analyse nodig; pagina's ophalen...")
+
+    pad = _paden(profiel)["input"]
+    pad.parent.mkdir(parents=True, exist_ok=True)
+    cache = shared_cache()
+    aantal, uit_cache, verzoeken = 0, [], {}
+    kosten, tokens, buiten_budget = 0.0, 0, 0
+    # Pagina's ophalen is I/O; parallel gaat dat veel sneller dan een voor een
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool, open(pad, "w", encoding="utf-8") as f:
+        requests = pool.map(lambda k: enrichment.prepare_request(k[1], profiel, themes, types), kandidaten)
+        for (custom_id, _), request in zip(kandidaten, requests):
+            if request is None:
+                continue
+            cached = cache.get(request["cache_key"])
+            if cached is not None:
+                verzoeken[custom_id] = _kern(request)
+                uit_cache.append((custom_id, cached))
+                continue
+            if budget is not None:
+                extra_kosten, extra_tokens = _hoogstens(request)
+                if budget.reached(kosten + extra_kosten, tokens + extra_tokens):
+                    buiten_budget += 1
+                    continue
+                kosten, tokens = kosten + extra_kosten, tokens + extra_tokens
+            verzoeken[custom_id] = _kern(request)
+            f.write(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": ENDPOINT,
+                "body": {"model": request["model"], "messages": request["messages"],
+                         "temperature": 0.3, "max_tokens": request["max_tokens"]},
+            }, ensure_ascii=False) + "\n")
+            aantal += 1
+    print(f"✅ {aantal} requests in {pad.name}, {len(uit_cache)} antwoorden uit de cache")
+    if budget is not None:
+        print(f"💸 Hoogstens ${kosten:.2f} / {tokens:,} tokens binnen budget {budget}; "
+              f"{buiten_budget} publicaties schuiven door naar een volgende batch")
+    return aantal, uit_cache, verzoeken
+
+
+def dien_in(client, profiel: str, verzoeken: Dict[str, Dict]) -> Dict:
+    pad = _paden(profiel)["input"]
+    with open(pad, "rb") as f:
+        bestand = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(input_file_id=bestand.id, endpoint=ENDPOINT,
+                                  completion_window=COMPLETION_WINDOW, metadata={"profiel": profiel})
+    status = {"batch_id": batch.id, "input_file_id": bestand.id, "ingediend": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "verzoeken": verzoeken}
+    bewaar_status(profiel, status)
+    print(f"🚀 Batch {batch.id} ingediend ({profiel})")
+    return status
+
+
+def wacht_op(client, batch_id: str, interval: float = POLL_INTERVAL):
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        tellingen = batch.request_counts
+        voortgang = f" {tellingen.completed + tellingen.failed}/{tellingen.total}" if tellingen else ""
+        print(f"⏳ Batch {batch_id}: {batch.status}{voortgang}")
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        time.sleep(interval)
+
+
+def download(client, file_id: str, pad: Path) -> None:
+    """Stream een bestand van de Files API naar schijf zonder het geheel in het geheugen te laden"""
+    with client.files.with_streaming_response.content(file_id) as response:
+        response.stream_to_file(pad)
+
+
+def lees_output(pad: Path, profiel: Optional[str] = None) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    (custom_id, antwoord) per regel van een batch-outputbestand; antwoord is None bij een fout.
+    Het verbruik van elk antwoord wordt in het token-grootboek gezet.
+    """
+    with open(pad, encoding="utf-8") as f:
+        for regel in f:
+            if not regel.strip():
+                continue
+            resultaat = json.loads(regel)
+            response = resultaat.get("response") or {}
+            if response.get("status_code") == 200:
+                body = response["body"]
+                token_ledger.record(body.get("model", ""), body.get("usage"), profile=profiel,
+                                    ref=resultaat.get("custom_id", ""), batch=True)
+                # Een weigering of contentfilter levert een antwoord zonder content op
+                yield resultaat.get("custom_id"), (body["choices"][0]["message"].get("content") or "").strip() or None
+            else:
+                yield resultaat.get("custom_id"), None
+
+
+def voeg_samen(profiel: str, antwoorden: Iterable[Tuple[str, Optional[str]]], verzoeken: Dict[str, Dict],
+               naar_cache: bool = True) -> Dict[str, int]:
+    """Verwerk de antwoorden in publicaties.json; match op custom_id"""
+    publicaties = laad_publicaties()
+    posities = {}
+    for i, pub in enumerate(publicaties):
+        posities.setdefault(custom_id_voor(pub), []).append(i)
+
+    cache = shared_cache()
+    tellingen = {"ok": 0, "mislukt": 0, "onbekend": 0}
+    for custom_id, antwoord in antwoorden:
+        indices = posities.get(custom_id)
+        request = verzoeken.get(custom_id)
+        if not indices or request is None:
+            tellingen["onbekend"] += 1
+            continue
+        bijgewerkt = {}
+        if antwoord is not None:
+            # Dezelfde URL kan onder meerdere titels in de lijst staan; werk ze allemaal bij
+            for i in indices:
+                try:
+                    bijgewerkt[i] = enrichment.apply_response(publicaties[i], antwoord, request)
+                except ValueError:
+                    bijgewerkt[i] = None
+        if not bijgewerkt or None in bijgewerkt.values():
+            tellingen["mislukt"] += 1
+            metrics.count("batch merge", errors=1)
+            continue
+        for i, pub in bijgewerkt.items():
+            publicaties[i] = pub
+        if naar_cache:
+            cache.put(request["cache_key"], antwoord, profiel, request["prompt_version"], request["model"],
+                      publicaties[indices[0]].get('url', ''))
+        tellingen["ok"] += 1
+        metrics.count("batch merge", items=1)
+
+    tmp = PAD_PUBLICATIES.with_name(PAD_PUBLICATIES.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(publicaties, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, PAD_PUBLICATIES)
+    print(f"✅ {tellingen['ok']} publicaties bijgewerkt in {PAD_PUBLICATIES.name}; "
+          f"{tellingen['mislukt']} mislukt, {tellingen['onbekend']} onbekende custom_id's")
+    return tellingen
+
+
+def run(profiel: str, client, wacht: bool = True, interval: float = POLL_INTERVAL,
+        maximum: Optional[int] = None, budget: Optional[token_ledger.Budget] = None) -> Optional[Dict[str, int]]:
+    status = laad_status(profiel)
+    if status:
+        print(f"🔁 Openstaande batch {status['batch_id']} van {status['ingediend']} wordt hervat")
+    else:
+        aantal, uit_cache, verzoeken = bouw_batch_input(profiel, laad_publicaties(), maximum, budget)
+        if uit_cache:
+            # Ongewijzigde pagina's hoeven niet opnieuw naar de API
+            voeg_samen(profiel, uit_cache, verzoeken, naar_cache=False)
+        if not aantal:
+            print("Niets (meer) in te dienen: alle publicaties zijn al geanalyseerd")
+            return None
+        status = dien_in(client, profiel, verzoeken)
+
+    if not wacht:
+        batch = client.batches.retrieve(status["batch_id"])
+        if batch.status not in TERMINAL_STATUSES:
+            print(f"⏸️ Batch {batch.id} is {batch.status}; draai later opnieuw om samen te voegen")
+            return None
+    else:
+        batch = wacht_op(client, status["batch_id"], interval)
+
+    paden = _paden(profiel)
+    if batch.error_file_id:
+        download(client, batch.error_file_id, paden["errors"])
+        print(f"⚠️ Foutregels bewaard in {paden['errors'].name}")
+    tellingen = None
+    if batch.output_file_id:
+        download(client, batch.output_file_id, paden["output"])
+        tellingen = voeg_samen(profiel, lees_output(paden["output"], profiel), status["verzoeken"])
+    else:
+        print(f"❌ Batch {batch.id} eindigde als {batch.status} zonder output")
+    # Mislukte publicaties komen bij de volgende run vanzelf opnieuw in de batch
+    bewaar_status(profiel, None)
+    return tellingen
+
+
+def maak_client(base_url: Optional[str] = None):
+    from openai import OpenAI
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        from config import OPENAI_API_KEY as api_key
+    return OpenAI(api_key=api_key, base_url=base_url or os.getenv("OPENAI_BASE_URL") or None,
+                  http_client=record_replay.openai_http_client())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verrijk publicaties via de OpenAI Batch API")
+    parser.add_argument("profiel", choices=sorted(enrichment.PROFILES))
+    parser.add_argument("--niet-wachten", action="store_true",
+                        help="alleen indienen of de status bekijken; samenvoegen gebeurt bij een latere run")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="seconden tussen statuschecks")
+    parser.add_argument("--max", type=int, default=None, help="maximaal aantal publicaties in de batch")
+    parser.add_argument("--base-url", default=None, help="andere API-basis-URL, bijv. de lokale stub")
+    parser.add_argument("--budget", type=token_ledger.budget_arg, default=None,
+                        help="neem alleen zoveel requests op als in het budget passen, bijv. 5 ($) of 2m tokens")
+    args = parser.parse_args()
+
+    metrics.start_run(f"openai_batch_{args.profiel}")
+    token_ledger.start_run(f"openai_batch_{args.profiel}", args.budget)
+    run(args.profiel, maak_client(args.base_url), wacht=not args.niet_wachten,
+        interval=args.interval, maximum=args.max, budget=args.budget)
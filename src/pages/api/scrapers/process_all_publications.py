@@ -1,11 +1,20 @@
+import argparse
 import json
 import os
-from publication_analyzer_function import analyze_publication_from_config
+from publication_analyzer_function import PROFILE, analyze_publication_from_config
+from checkpoint_journal import CheckpointJournal
+import metrics
+from publicatie_index import PositieIndex, journal_sleutel
 import time
+import token_ledger
 
+PROGRESS_JOURNAL = 'publicaties_progress.jsonl'
 
-def process_all_publications():
-    """Process all publications that need analysis"""
+
+def process_all_publications(budget=None):
+    """Process all publications that need analysis; stops starting new ones once `budget` is spent"""
+    metrics.start_run("process_all_publications")
+    token_ledger.start_run("process_all_publications", budget)
     
     # Load publications
     try:
@@ -33,8 +42,13 @@ def process_all_publications():
     
     # Ask user for confirmation and settings
     print(f"\nThis will analyze {len(publications_to_analyze)} publications using OpenAI API.")
-    print("Each request costs approximately $0.01-0.03 depending on content length.")
-    print(f"Estimated total cost: ${len(publications_to_analyze) * 0.02:.2f}")
+    estimate = token_ledger.estimate_cost(len(publications_to_analyze), PROFILE)
+    if estimate is None:
+        print(f"Estimated total cost: unknown (no {PROFILE} calls in {token_ledger.LEDGER_FILE.name} yet)")
+    else:
+        print(f"Estimated total cost: ${estimate[0]:.2f} (mean of {estimate[1]} earlier calls)")
+    if budget is not None:
+        print(f"Budget: {budget} (no new publications are started once it is spent)")
     
     confirm = input("\nDo you want to proceed? (y/n): ").strip().lower()
     if confirm != 'y':
@@ -45,9 +59,6 @@ def process_all_publications():
     start_index = input("Start from index (default 0): ").strip()
     start_index = int(start_index) if start_index.isdigit() else 0
     
-    batch_size = input("Save progress every N publications (default 10): ").strip()
-    batch_size = int(batch_size) if batch_size.isdigit() else 10
-    
     max_to_process = input("Maximum publications to process (default: all): ").strip()
     if max_to_process.isdigit():
         publications_to_analyze = publications_to_analyze[:int(max_to_process)]
@@ -55,24 +66,36 @@ def process_all_publications():
     print(f"\nStarting analysis...")
     print(f"Processing {len(publications_to_analyze)} publications")
     print(f"Starting from index {start_index}")
-    print(f"Saving progress every {batch_size} publications")
+    print(f"Saving progress to {PROGRESS_JOURNAL} after every publication")
     
     # Create a copy of all publications for updating
     updated_publications = publications.copy()
     
+    # Position of every publication by canonical URL, built once
+    index = PositieIndex(updated_publications)
+    
+    # Resume results of an interrupted run from the progress journal
+    journal = CheckpointJournal(PROGRESS_JOURNAL, key=journal_sleutel)
+    for analyzed_pub in journal.load():
+        j = index.positie(analyzed_pub)
+        if j is not None:
+            updated_publications[j] = analyzed_pub
+    
     # Process publications
     processed_count = 0
     for i, pub_to_analyze in enumerate(publications_to_analyze[start_index:], start_index):
+        if journal.is_done(journal_sleutel(pub_to_analyze)):
+            continue
+        
+        if token_ledger.over_budget():
+            print(f"\n💸 Budget reached after {processed_count} publications; rerun to continue")
+            break
+        
         print(f"\n--- Processing {i+1}/{len(publications_to_analyze)} ---")
         print(f"Title: {pub_to_analyze.get('titel', 'Unknown')}")
         
         # Find the index in the original publications list
-        original_index = None
-        for j, original_pub in enumerate(updated_publications):
-            if (original_pub.get('titel') == pub_to_analyze.get('titel') and 
-                original_pub.get('url') == pub_to_analyze.get('url')):
-                original_index = j
-                break
+        original_index = index.positie(pub_to_analyze)
         
         if original_index is None:
             print("Warning: Could not find publication in original list")
@@ -80,23 +103,23 @@ def process_all_publications():
         
         # Analyze the publication
         analyzed_pub = analyze_publication_from_config(pub_to_analyze)
+        metrics.count("analyse", items=1, errors=int(analyzed_pub is pub_to_analyze))
         
-        # Update the publication in the main list
-        updated_publications[original_index] = analyzed_pub
-        processed_count += 1
-        
-        # Show brief results
-        print(f"✓ Thema: {analyzed_pub.get('thema', 'Not found')}")
-        print(f"✓ Auteur: {analyzed_pub.get('auteur', 'Not found')}")
-        print(f"✓ Type: {analyzed_pub.get('type', 'Not found')}")
-        
-        # Save progress periodically
-        if processed_count % batch_size == 0:
-            backup_filename = f'publicaties_progress_{processed_count}.json'
+        if analyzed_pub is pub_to_analyze:
+            print("⚠️ Analysis failed; not journaled, so a rerun retries it")
+        else:
+            # Update the publication in the main list
+            updated_publications[original_index] = analyzed_pub
+            
+            # Show brief results
+            print(f"✓ Thema: {analyzed_pub.get('thema', 'Not found')}")
+            print(f"✓ Auteur: {analyzed_pub.get('auteur', 'Not found')}")
+            print(f"✓ Type: {analyzed_pub.get('type', 'Not found')}")
+            
+            # Save progress: one line per analyzed publication
             try:
-                with open(backup_filename, 'w', encoding='utf-8') as f:
-                    json.dump(updated_publications, f, ensure_ascii=False, indent=2)
-                print(f"✓ Progress saved to {backup_filename}")
+                journal.append(analyzed_pub)
+                processed_count += 1
             except Exception as e:
                 print(f"Error saving progress: {str(e)}")
         
@@ -119,6 +142,8 @@ def process_all_publications():
         with open('../../../../public/content/publicaties.json', 'w', encoding='utf-8') as f:
             json.dump(updated_publications, f, ensure_ascii=False, indent=2)
         print(f"✓ Updated publicaties.json with {processed_count} analyzed publications")
+        print(f"💰 Actual cost: ${token_ledger.summary()['cost']:.2f}")
+        journal.discard()
         
         # Also save a copy in the current directory
         with open('publicaties_final_analyzed.json', 'w', encoding='utf-8') as f:
@@ -127,7 +152,7 @@ def process_all_publications():
         
     except Exception as e:
         print(f"Error saving final results: {str(e)}")
-        print("Your progress files are still available for manual recovery.")
+        print(f"Your progress is still available in {PROGRESS_JOURNAL}; rerun to resume.")
 
 def show_analysis_stats():
     """Show statistics about publications that need analysis"""
@@ -155,6 +180,11 @@ def show_analysis_stats():
     print(f"Completion rate: {((total - missing_any) / total * 100):.1f}%")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI analysis of all publications")
+    parser.add_argument("--budget", type=token_ledger.budget_arg, default=None,
+                        help="stop starting new analyses after this much is spent, e.g. 5 ($) or 500k tokens")
+    args = parser.parse_args()
+    
     print("OpenAI Publication Analysis - Batch Processor")
     print("=" * 60)
     
@@ -163,7 +193,7 @@ if __name__ == "__main__":
     if choice == "1":
         show_analysis_stats()
     elif choice == "2":
-        process_all_publications()
+        process_all_publications(args.budget)
     else:
         print("Invalid choice. Showing statistics...")
         show_analysis_stats()
@@ -1,13 +1,25 @@
+import argparse
+import asyncio
 import json
 import os
-from enhanced_publication_analyzer import analyze_enhanced_publication
-import time
+from enhanced_publication_analyzer import ENHANCED_FIELDS, PROFILE, load_themes, load_types
+from enrichment import missing_fields
+from async_enrichment import FETCH_WORKERS, IN_FLIGHT, RPM_LIMIT, TPM_LIMIT, enrich_all
+from checkpoint_journal import CheckpointJournal
+from enrichment_cache import shared_cache
+import metrics
+from publicatie_index import PositieIndex, journal_sleutel
+import token_ledger
 
 # Import OpenAI API key from config
 from config import OPENAI_API_KEY
 
-def process_enhanced_publications():
-    """Process all publications with enhanced analysis"""
+PROGRESS_JOURNAL = 'enhanced_publications_progress.jsonl'
+
+def process_enhanced_publications(budget=None):
+    """Process all publications with enhanced analysis; stops scheduling new work once `budget` is spent"""
+    metrics.start_run("process_enhanced_publications")
+    token_ledger.start_run("process_enhanced_publications", budget)
     
     # Load publications
     try:
@@ -21,25 +33,20 @@ def process_enhanced_publications():
         print(f"Error parsing publicaties.json: {str(e)}")
         return
     
-    # Find publications that need enhanced analysis
+    # Find publications that need enhanced analysis: any field missing or no longer valid
+    themes, types = load_themes(), load_types()
     publications_to_analyze = []
+    requested_fields = 0
     for pub in publications:
-        # Check if any enhanced fields are missing
-        needs_analysis = (
-            not pub.get('keywords') or 
-            not pub.get('audience') or 
-            not pub.get('impact') or 
-            not pub.get('takeaways') or 
-            not pub.get('summary_one_liner') or
-            not pub.get('subtype') or
-            not pub.get('language_level') or
-            not pub.get('expiry_or_validity') or
-            not pub.get('relevance_score')
-        )
-        if needs_analysis:
+        missing = missing_fields(pub, PROFILE, themes, types)
+        if missing:
             publications_to_analyze.append(pub)
+            requested_fields += len(missing)
     
     print(f"Found {len(publications_to_analyze)} publications that need enhanced analysis")
+    if publications_to_analyze:
+        print(f"Only missing fields are requested: {requested_fields} of "
+              f"{len(publications_to_analyze) * len(ENHANCED_FIELDS)} fields")
     
     if not publications_to_analyze:
         print("All publications already have complete enhanced data!")
@@ -49,8 +56,9 @@ def process_enhanced_publications():
     print(f"\n📊 ENHANCED ANALYSIS COST ESTIMATE:")
     print(f"=" * 60)
     print(f"Publications to analyze: {len(publications_to_analyze)}")
-    print(f"Cost per publication: $0.03-0.04")
-    print(f"Estimated total cost: ${len(publications_to_analyze) * 0.035:.2f}")
+    print_cost_estimate(len(publications_to_analyze))
+    if budget is not None:
+        print(f"Budget: {budget} (no new publications are started once it is spent)")
     print(f"=" * 60)
     
     print(f"\n🚀 ENHANCED FEATURES INCLUDED:")
@@ -75,9 +83,6 @@ def process_enhanced_publications():
     start_index = input("Start from index (default 0): ").strip()
     start_index = int(start_index) if start_index.isdigit() else 0
     
-    batch_size = input("Save progress every N publications (default 5): ").strip()
-    batch_size = int(batch_size) if batch_size.isdigit() else 5
-    
     max_to_process = input("Maximum publications to process (default: all): ").strip()
     if max_to_process.isdigit():
         publications_to_analyze = publications_to_analyze[:int(max_to_process)]
@@ -85,58 +90,55 @@ def process_enhanced_publications():
     print(f"\n🔄 STARTING ENHANCED ANALYSIS...")
     print(f"Processing {len(publications_to_analyze)} publications")
     print(f"Starting from index {start_index}")
-    print(f"Saving progress every {batch_size} publications")
-    print(f"Rate limit: 3 seconds between requests (for enhanced analysis)")
+    print(f"Saving progress to {PROGRESS_JOURNAL} after every publication")
+    print(f"Concurrency: {FETCH_WORKERS} page downloads alongside {IN_FLIGHT} requests in flight, "
+          f"limited to {RPM_LIMIT} requests and {TPM_LIMIT} tokens per minute")
     
     # Create a copy of all publications for updating
     updated_publications = publications.copy()
     
-    # Process publications
-    processed_count = 0
-    for i, pub_to_analyze in enumerate(publications_to_analyze[start_index:], start_index):
-        print(f"\n--- Processing {i+1}/{len(publications_to_analyze)} ---")
-        print(f"Title: {pub_to_analyze.get('titel', 'Unknown')}")
-        
+    # Position of every publication by canonical URL, built once
+    index = PositieIndex(updated_publications)
+    
+    # Resume results of an interrupted run from the progress journal
+    journal = CheckpointJournal(PROGRESS_JOURNAL, key=journal_sleutel)
+    for analyzed_pub in journal.load():
+        j = index.positie(analyzed_pub)
+        if j is not None:
+            updated_publications[j] = analyzed_pub
+    
+    # Process publications concurrently; each result is journaled as soon as it completes
+    te_doen = [pub for pub in publications_to_analyze[start_index:]
+               if not journal.is_done(journal_sleutel(pub))]
+
+    def bewaar_resultaat(pub_to_analyze, analyzed_pub):
         # Find the index in the original publications list
-        original_index = None
-        for j, original_pub in enumerate(updated_publications):
-            if (original_pub.get('titel') == pub_to_analyze.get('titel') and 
-                original_pub.get('url') == pub_to_analyze.get('url')):
-                original_index = j
-                break
-        
-        if original_index is None:
+        j = index.positie(pub_to_analyze)
+        if j is not None:
+            updated_publications[j] = analyzed_pub
+        else:
             print("Warning: Could not find publication in original list")
-            continue
-        
-        # Analyze the publication with enhanced features
-        analyzed_pub = analyze_enhanced_publication(pub_to_analyze, OPENAI_API_KEY)
-        
-        # Update the publication in the main list
-        updated_publications[original_index] = analyzed_pub
-        processed_count += 1
         
-        # Show brief results
-        print(f"✅ Thema: {analyzed_pub.get('thema', 'Not found')}")
-        print(f"✅ Keywords: {analyzed_pub.get('keywords', 'Not found')}")
-        print(f"✅ Audience: {analyzed_pub.get('audience', 'Not found')}")
-        print(f"✅ Relevance Score: {analyzed_pub.get('relevance_score', 'Not found')}")
-        print(f"✅ Read Time: {analyzed_pub.get('read_time', 'Not found')}")
-        
-        # Save progress periodically
-        if processed_count % batch_size == 0:
-            backup_filename = f'enhanced_publications_progress_{processed_count}.json'
-            try:
-                with open(backup_filename, 'w', encoding='utf-8') as f:
-                    json.dump(updated_publications, f, ensure_ascii=False, indent=2)
-                print(f"💾 Progress saved to {backup_filename}")
-            except Exception as e:
-                print(f"Error saving progress: {str(e)}")
-        
-        # Rate limiting - longer wait for enhanced analysis
-        if i < len(publications_to_analyze) - 1:
-            print("⏳ Waiting 3 seconds before next request...")
-            time.sleep(3)
+        # Save progress: one line per analyzed publication
+        try:
+            journal.append(analyzed_pub)
+        except Exception as e:
+            print(f"Error saving progress: {str(e)}")
+
+    tellingen = asyncio.run(enrich_all(
+        te_doen,
+        on_result=bewaar_resultaat,
+        api_key=OPENAI_API_KEY,
+        profile=PROFILE,
+        themes=themes,
+        types=types,
+        cache=shared_cache(),
+    ))
+    processed_count = tellingen["ok"] + tellingen["cached"]
+    print(f"\n📊 {tellingen['ok']} analyzed, {tellingen['cached']} from cache, {tellingen['failed']} failed, "
+          f"{tellingen['skipped']} skipped (no URL or content)")
+    if token_ledger.over_budget():
+        print(f"💸 Budget reached: {tellingen['over_budget']} prepared requests not sent; rerun to continue")
     
     # Save final results
     try:
@@ -152,6 +154,7 @@ def process_enhanced_publications():
         with open('../../../../public/content/publicaties.json', 'w', encoding='utf-8') as f:
             json.dump(updated_publications, f, ensure_ascii=False, indent=2)
         print(f"✅ Updated publicaties.json with {processed_count} enhanced publications")
+        journal.discard()
         
         # Also save a copy in the current directory
         with open('enhanced_publicaties_final.json', 'w', encoding='utf-8') as f:
@@ -162,7 +165,7 @@ def process_enhanced_publications():
         print(f"\n🎉 ENHANCED ANALYSIS COMPLETE!")
         print(f"=" * 60)
         print(f"✅ Processed: {processed_count} publications")
-        print(f"💰 Estimated cost: ${processed_count * 0.035:.2f}")
+        print(f"💰 Actual cost: ${token_ledger.summary()['cost']:.2f}")
         print(f"📊 Enhanced fields added to each publication:")
         print(f"   - Keywords, Audience, Impact, Read Time")
         print(f"   - Takeaways, One-liner Summary, Embargo Status")
@@ -172,7 +175,17 @@ def process_enhanced_publications():
         
     except Exception as e:
         print(f"Error saving final results: {str(e)}")
-        print("Your progress files are still available for manual recovery.")
+        print(f"Your progress is still available in {PROGRESS_JOURNAL}; rerun to resume.")
+
+def print_cost_estimate(count):
+    """Estimated cost from what earlier enhanced calls cost according to the token ledger"""
+    estimate = token_ledger.estimate_cost(count, PROFILE)
+    if estimate is None:
+        print(f"Estimated cost: unknown (no enhanced calls in {token_ledger.LEDGER_FILE.name} yet)")
+        return
+    total, calls = estimate
+    print(f"Cost per publication: ${total / count if count else 0:.4f} (mean of {calls} earlier calls)")
+    print(f"Estimated total cost: ${total:.2f}")
 
 def show_enhanced_analysis_stats():
     """Show statistics about publications that need enhanced analysis"""
@@ -203,17 +216,8 @@ def show_enhanced_analysis_stats():
     missing_relevance_score = sum(1 for pub in publications if not pub.get('relevance_score'))
     
     # Count publications needing enhanced analysis
-    missing_enhanced = sum(1 for pub in publications if (
-        not pub.get('keywords') or 
-        not pub.get('audience') or 
-        not pub.get('impact') or 
-        not pub.get('takeaways') or 
-        not pub.get('summary_one_liner') or
-        not pub.get('subtype') or
-        not pub.get('language_level') or
-        not pub.get('expiry_or_validity') or
-        not pub.get('relevance_score')
-    ))
+    themes, types = load_themes(), load_types()
+    missing_enhanced = sum(1 for pub in publications if missing_fields(pub, PROFILE, themes, types))
     
     print(f"📊 ENHANCED PUBLICATION ANALYSIS STATISTICS:")
     print(f"=" * 70)
@@ -239,10 +243,15 @@ def show_enhanced_analysis_stats():
     print(f"📈 SUMMARY:")
     print(f"Publications needing enhanced analysis: {missing_enhanced}")
     print(f"Enhanced completion rate: {((total - missing_enhanced) / total * 100):.1f}%")
-    print(f"Estimated cost for enhanced analysis: ${missing_enhanced * 0.035:.2f}")
+    print_cost_estimate(missing_enhanced)
     print(f"=" * 70)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Enhanced OpenAI analysis of all publications")
+    parser.add_argument("--budget", type=token_ledger.budget_arg, default=None,
+                        help="stop starting new analyses after this much is spent, e.g. 5 ($) or 500k tokens")
+    args = parser.parse_args()
+    
     print("🚀 Enhanced OpenAI Publication Analysis - Batch Processor")
     print("=" * 80)
     
@@ -251,7 +260,7 @@ if __name__ == "__main__":
     if choice == "1":
         show_enhanced_analysis_stats()
     elif choice == "2":
-        process_enhanced_publications()
+        process_enhanced_publications(args.budget)
     else:
         print("Invalid choice. Showing statistics...")
         show_enhanced_analysis_stats()
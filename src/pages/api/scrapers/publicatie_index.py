@@ -0,0 +1,100 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query-parameters die per zoeksessie verschillen en niets over de publicatie zeggen
+SESSIE_PARAMETERS = ("solr_nav", "utm_")
+
+
+def canonieke_url(url):
+    """Normaliseer een URL zodat dezelfde publicatie altijd dezelfde sleutel krijgt.
+
+    Verwijdert zoeksessie-parameters (zoals Leidens `solr_nav[...]`), het fragment
+    en een afsluitende slash, en zet schema en host in kleine letters.
+    """
+    if not url:
+        return ""
+    delen = urlsplit(url.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(delen.query, keep_blank_values=True)
+        if not k.startswith(SESSIE_PARAMETERS)
+    ]
+    pad = delen.path.rstrip("/") or "/"
+    return urlunsplit((delen.scheme.lower(), delen.netloc.lower(), pad, urlencode(query), ""))
+
+
+def url_en_titel(item):
+    return (canonieke_url(item.get("url")), item.get("titel", ""))
+
+
+class UniekeLijst:
+    """Lijst met resultaten plus een set van sleutels ernaast, zodat ontdubbelen O(1) per item is.
+
+    `sleutel` bepaalt wanneer twee items hetzelfde zijn; standaard de canonieke URL
+    (voor lijsten met alleen URL's) of, voor dicts, de combinatie van URL en titel.
+    """
+
+    def __init__(self, sleutel=None):
+        self.items = []
+        self._sleutel = sleutel or (lambda item: url_en_titel(item) if isinstance(item, dict) else canonieke_url(item))
+        self._gezien = set()
+
+    def voeg_toe(self, item):
+        """Voeg `item` toe als het nog niet bestaat; geeft True terug als het nieuw was."""
+        sleutel = self._sleutel(item)
+        if sleutel in self._gezien:
+            return False
+        self._gezien.add(sleutel)
+        self.items.append(item)
+        return True
+
+    def voeg_alle_toe(self, items):
+        """Voeg meerdere items toe; geeft het aantal nieuwe items terug."""
+        return sum(1 for item in items if self.voeg_toe(item))
+
+    def __contains__(self, item):
+        return self._sleutel(item) in self._gezien
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def publicatie_sleutel(publicatie):
+    """Stabiele sleutel van een publicatie: de canonieke URL, of de titel als er geen URL is."""
+    return canonieke_url(publicatie.get("url")) or "titel:" + publicatie.get("titel", "")
+
+
+def journal_sleutel(publicatie):
+    """Sleutel voor voortgangsjournals: de publicatiesleutel plus de titel.
+
+    Staat dezelfde URL met verschillende titels in de lijst, dan telt elke titel apart
+    als klaar, net zoals `PositieIndex` ze als aparte posities behandelt.
+    """
+    return publicatie_sleutel(publicatie) + "\t" + publicatie.get("titel", "")
+
+
+class PositieIndex:
+    """Index van publicatie naar positie in een lijst, eenmalig opgebouwd zodat opzoeken O(1) is.
+
+    Sleutel is de canonieke URL, dus twee publicaties met dezelfde titel maar een andere
+    URL lopen niet door elkaar. Staat dezelfde URL meerdere keren in de lijst, dan wint
+    de positie met dezelfde titel; heeft geen daarvan die titel, dan is er geen positie.
+    """
+
+    def __init__(self, publicaties):
+        self._posities = {}
+        self._titels = []
+        for i, publicatie in enumerate(publicaties):
+            self._posities.setdefault(publicatie_sleutel(publicatie), []).append(i)
+            self._titels.append(publicatie.get("titel", ""))
+
+    def positie(self, publicatie):
+        """Positie van `publicatie` in de lijst, of None als die er niet in staat."""
+        kandidaten = self._posities.get(publicatie_sleutel(publicatie))
+        if not kandidaten:
+            return None
+        if len(kandidaten) == 1:
+            return kandidaten[0]
+        titel = publicatie.get("titel", "")
+        return next((i for i in kandidaten if self._titels[i] == titel), None)
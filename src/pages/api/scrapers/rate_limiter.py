@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: on average `rate` acquisitions per second, with
+    bursts of at most `burst`.
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.capacity = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take `tokens` and return how long the caller has to wait before using them"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= tokens
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1) -> None:
+        with self._lock:
+            wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def release(self, tokens: float) -> None:
+        """Give back tokens that were acquired on an estimate but not used (negative to charge extra)"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+class AsyncTokenBucket(TokenBucket):
+    """Token bucket for asyncio code; waiting does not block the event loop"""
+
+    async def acquire(self, tokens: float = 1) -> None:
+        with self._lock:
+            wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class HostRateLimiter:
+    """
+    One token bucket per host, so politeness limits apply per site.
+
+    Hosts without an explicit rate fall back to `default_rate`; when that is
+    None they are not limited at all.
+    """
+
+    bucket_class = TokenBucket
+
+    def __init__(self, default_rate: Optional[float] = None, burst: float = 1):
+        self.default_rate = default_rate
+        self.burst = burst
+        self._rates: Dict[str, float] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def set_rate(self, host: str, rate: Optional[float]) -> None:
+        with self._lock:
+            self._rates[host.lower()] = rate
+            self._buckets.pop(host.lower(), None)
+
+    def bucket_for(self, url: str) -> Optional[TokenBucket]:
+        host = _host(url)
+        with self._lock:
+            if host not in self._buckets:
+                rate = self._rates.get(host, self.default_rate)
+                self._buckets[host] = self.bucket_class(rate, self.burst) if rate else None
+            return self._buckets[host]
+
+    def wait(self, url: str) -> None:
+        bucket = self.bucket_for(url)
+        if bucket is not None:
+            bucket.acquire()
+
+
+class AsyncHostRateLimiter(HostRateLimiter):
+    bucket_class = AsyncTokenBucket
+
+    async def wait(self, url: str) -> None:
+        bucket = self.bucket_for(url)
+        if bucket is not None:
+            await bucket.acquire()
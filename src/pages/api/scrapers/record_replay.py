@@ -0,0 +1,265 @@
+"""
+Record and replay HTTP traffic for offline, repeatable runs.
+
+In record mode every response that goes through the shared requests session,
+a Playwright context from browser_factory, or an OpenAI client built with
+`openai_http_client()` is stored in a zip archive. In replay mode those
+responses are served back from the archive without touching the network; a
+request that was never recorded fails like a connection error.
+
+Requests are matched on method, URL and a hash of the body. A request that
+was made more than once is replayed in the order it was recorded.
+
+    python record_replay.py record test_analysis.py
+    python record_replay.py replay --archive analyse.zip test_analysis.py
+
+Options for record_replay itself go before the script name; everything after
+it is passed to the script.
+
+or set SCRAPER_REPLAY=record|replay and SCRAPER_REPLAY_ARCHIVE yourself.
+"""
+import argparse
+import hashlib
+import json
+import os
+import runpy
+import sys
+import tempfile
+import threading
+import zipfile
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Tuple
+
+DEFAULT_ARCHIVE = Path(__file__).resolve().parent / ".replay" / "archive.zip"
+MODES = ("off", "record", "replay")
+
+# Bodies are stored decoded, so these no longer describe them
+_SKIP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class ReplayMiss(Exception):
+    """A request in replay mode that is not in the archive"""
+
+
+def request_key(method: str, url: str, body=None) -> str:
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha256(f"{method.upper()} {url}\n".encode("utf-8"))
+    digest.update(body or b"")
+    return digest.hexdigest()[:32]
+
+
+def clean_headers(headers) -> Dict[str, str]:
+    return {k: v for k, v in dict(headers).items() if k.lower() not in _SKIP_HEADERS}
+
+
+class Archive:
+    """
+    Zip archive of recorded responses: per response a small JSON member with
+    status and headers and a deflated body member.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._seen = Counter()
+        self._names = None
+        self._zip = None
+        self._fresh = True
+
+    def _member(self, key: str) -> str:
+        n = self._seen[key]
+        self._seen[key] += 1
+        return f"{key}.{n}"
+
+    def store(self, method: str, url: str, body, status: int, headers, content: bytes) -> None:
+        key = request_key(method, url, body)
+        meta = {"method": method.upper(), "url": url, "status": status, "headers": clean_headers(headers)}
+        with self._lock:
+            name = self._member(key)
+            if self._fresh:
+                # A recording session starts a new archive
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.unlink(missing_ok=True)
+                self._fresh = False
+            with zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr(f"{name}.json", json.dumps(meta, ensure_ascii=False))
+                zf.writestr(f"{name}.body", content or b"")
+
+    def lookup(self, method: str, url: str, body=None) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Raises:
+            ReplayMiss when the request (or this repetition of it) was not recorded
+        """
+        key = request_key(method, url, body)
+        with self._lock:
+            if self._zip is None:
+                if not self.path.exists():
+                    raise ReplayMiss(f"archief {self.path} bestaat niet")
+                self._zip = zipfile.ZipFile(self.path, "r")
+                self._names = set(self._zip.namelist())
+            n = self._seen[key]
+            self._seen[key] += 1
+            # Extra repetitions beyond what was recorded get the last recorded response
+            while n >= 0 and f"{key}.{n}.json" not in self._names:
+                n -= 1
+            if n < 0:
+                raise ReplayMiss(f"niet opgenomen: {method.upper()} {url}")
+            name = f"{key}.{n}"
+            meta = json.loads(self._zip.read(f"{name}.json"))
+            return meta["status"], meta["headers"], self._zip.read(f"{name}.body")
+
+
+_mode = os.getenv("SCRAPER_REPLAY", "off") or "off"
+_archive = Archive(os.getenv("SCRAPER_REPLAY_ARCHIVE", DEFAULT_ARCHIVE))
+
+
+def configure(mode: str, archive=None) -> None:
+    global _mode, _archive
+    if mode not in MODES:
+        raise ValueError(f"onbekende modus {mode!r}, kies uit {', '.join(MODES)}")
+    _mode = mode
+    if archive is not None:
+        _archive = Archive(archive)
+
+
+def mode() -> str:
+    return _mode
+
+
+def archive() -> Archive:
+    return _archive
+
+
+# --- requests ---------------------------------------------------------------
+
+def requests_send(adapter_send, build_response, request, **kwargs):
+    """Send a prepared requests request through the archive (used by http_client's adapter)"""
+    import io
+
+    import requests
+    from urllib3 import HTTPResponse
+
+    if _mode == "replay":
+        try:
+            status, headers, content = _archive.lookup(request.method, request.url, request.body)
+        except ReplayMiss as e:
+            raise requests.ConnectionError(str(e), request=request)
+        raw = HTTPResponse(body=io.BytesIO(content), headers=headers, status=status, preload_content=False,
+                           decode_content=False)
+        return build_response(request, raw)
+
+    response = adapter_send(request, **kwargs)
+    if _mode == "record" and not kwargs.get("stream"):
+        _archive.store(request.method, request.url, request.body,
+                       response.status_code, response.headers, response.content)
+    return response
+
+
+# --- Playwright -------------------------------------------------------------
+
+def playwright_route(overslaan=None):
+    """
+    Route handler for `context.route("**/*", ...)`. Requests for which
+    `overslaan(request)` is true fall through to the earlier registered handler.
+    """
+
+    def handler(route):
+        request = route.request
+        if overslaan is not None and overslaan(request):
+            route.fallback()
+            return
+        if _mode == "replay":
+            try:
+                status, headers, content = _archive.lookup(request.method, request.url, request.post_data_buffer)
+            except ReplayMiss:
+                route.abort("internetdisconnected")
+                return
+            route.fulfill(status=status, headers=headers, body=content)
+            return
+
+        response = route.fetch()
+        _archive.store(request.method, request.url, request.post_data_buffer,
+                       response.status, response.headers, response.body())
+        route.fulfill(response=response)
+
+    return handler
+
+
+# --- OpenAI (httpx) ---------------------------------------------------------
+
+def _replayed(request, body):
+    import httpx
+
+    try:
+        status, headers, content = _archive.lookup(request.method, str(request.url), body)
+    except ReplayMiss as e:
+        raise httpx.ConnectError(str(e), request=request)
+    return httpx.Response(status, headers=headers, content=content, request=request)
+
+
+def _recorded(request, body, response, content):
+    import httpx
+
+    _archive.store(request.method, str(request.url), body, response.status_code, response.headers, content)
+    return httpx.Response(response.status_code, headers=clean_headers(response.headers),
+                          content=content, request=request)
+
+
+def openai_http_client():
+    """httpx client for `OpenAI(http_client=...)` in record/replay mode; None (the default client) otherwise"""
+    if _mode == "off":
+        return None
+    import httpx
+
+    class ReplayTransport(httpx.BaseTransport):
+        def __init__(self):
+            self._inner = httpx.HTTPTransport()
+
+        def handle_request(self, request):
+            body = request.read()
+            if _mode == "replay":
+                return _replayed(request, body)
+            response = self._inner.handle_request(request)
+            return _recorded(request, body, response, response.read())
+
+    return httpx.Client(transport=ReplayTransport())
+
+
+def openai_async_http_client():
+    """Same as `openai_http_client`, for `AsyncOpenAI(http_client=...)`"""
+    if _mode == "off":
+        return None
+    import httpx
+
+    class AsyncReplayTransport(httpx.AsyncBaseTransport):
+        def __init__(self):
+            self._inner = httpx.AsyncHTTPTransport()
+
+        async def handle_async_request(self, request):
+            body = await request.aread()
+            if _mode == "replay":
+                return _replayed(request, body)
+            response = await self._inner.handle_async_request(request)
+            return _recorded(request, body, response, await response.aread())
+
+    return httpx.AsyncClient(transport=AsyncReplayTransport())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Draai een script met opgenomen of af te spelen HTTP-verkeer")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE,
+                        help="zip-archief, vóór de scriptnaam opgeven (default: %(default)s)")
+    parser.add_argument("modus", choices=["record", "replay"])
+    parser.add_argument("script", help="Python-script om te draaien, bijv. test_analysis.py")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="argumenten voor het script")
+    args = parser.parse_args()
+
+    # Via de omgeving, zodat ook de modules die het script zelf importeert de modus zien
+    os.environ["SCRAPER_REPLAY"] = args.modus
+    os.environ["SCRAPER_REPLAY_ARCHIVE"] = str(args.archive)
+    # Een gedeelde HTTP-cache zou responses buiten het archief om serveren, ook een die al ingesteld is
+    os.environ["HTTP_CACHE_DIR"] = tempfile.mkdtemp(prefix="replay-cache-")
+    sys.argv = [args.script] + args.args
+    runpy.run_path(args.script, run_name="__main__")
@@ -1,115 +1,85 @@
 from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
 import os
 import time
 import json
 
+from browser_factory import launch_browser, new_context
+from dom_extractie import extract_items
+import metrics
+from publicatie_index import UniekeLijst
+
 def take_screenshot(page, filename):
     pad = os.path.join("screenshots", f"{filename}.png")
     os.makedirs("screenshots", exist_ok=True)
     page.screenshot(path=pad, full_page=True)
     print(f"📸 Screenshot opgeslagen: {filename}.png")
 
-def extract_publication_data(item):
-    """Extract publication data from a result item"""
-    try:
-        # Try different selectors for title
-        title_selectors = [
+LEIDEN_BASE_URL = "https://scholarlypublications.universiteitleiden.nl"
+
+# Selectors per veld, in volgorde van voorkeur
+LEIDEN_VELDEN = {
+    "titel": {
+        "selectors": [
             "h3 a",
-            ".result-title a", 
+            ".result-title a",
             "dd.mods-titleinfo-title-custom-ms a",
             "a[href*='/handle/']",
             "a"  # fallback
-        ]
-        
-        titel = ""
-        url = ""
-        
-        for selector in title_selectors:
-            title_elem = item.locator(selector).first
-            if title_elem.count() > 0:
-                try:
-                    titel = title_elem.inner_text().strip()
-                    url = title_elem.get_attribute("href")
-                    if titel and titel != "Leiden University\nScholarly Publications" and titel != "":
-                        break
-                except:
-                    continue
-        
-        # Clean up title
-        if titel:
-            titel = titel.replace("\n", " ").strip()
-        
-        # Ensure full URL
-        if url and not url.startswith("http"):
-            url = "https://scholarlypublications.universiteitleiden.nl" + url
-        
-        # Try different selectors for author
-        author_selectors = [
+        ],
+        "attribuut": "href",
+        "negeer": ["Leiden University\nScholarly Publications"]
+    },
+    "auteurs": {
+        "selectors": [
             ".dc-author",
             ".result-author",
             "dd.mods-name-personal-ms",
             "[class*='author']"
-        ]
-        
-        auteurs = []
-        for selector in author_selectors:
-            try:
-                author_elems = item.locator(selector)
-                if author_elems.count() > 0:
-                    for i in range(author_elems.count()):
-                        author_text = author_elems.nth(i).inner_text().strip()
-                        if author_text:
-                            auteurs.append(author_text)
-                    if auteurs:
-                        break
-            except:
-                continue
-        
-        # Try different selectors for date
-        date_selectors = [
+        ],
+        "alle": True
+    },
+    "datum": {
+        "selectors": [
             ".dc-date",
-            ".result-date", 
+            ".result-date",
             "dd.mods-origininfo-dateissued-ms",
             "[class*='date']"
         ]
-        
-        datum = ""
-        for selector in date_selectors:
-            try:
-                date_elem = item.locator(selector).first
-                if date_elem.count() > 0:
-                    datum = date_elem.inner_text().strip()
-                    if datum:
-                        break
-            except:
-                continue
-        
-        return {
-            "titel": titel,
-            "url": url,
-            "auteur": ", ".join(auteurs),
-            "datum": datum,
-            "bron": "Leiden Scholarly Publications",
-            "type": "",
-            "thema": "",
-            "samenvatting": ""
-        }
-        
-    except Exception as e:
-        print(f"⚠️ Fout bij extractie: {e}")
-        return None
+    }
+}
+
+def publicatie_uit_item(ruw):
+    """Zet een bulk-geëxtraheerd resultaatitem om naar een publicatie-record"""
+    titel = (ruw.get("titel") or "").replace("\n", " ").strip()
+    url = ruw.get("titel_href") or ""
+
+    # Ensure full URL
+    if url and not url.startswith("http"):
+        url = LEIDEN_BASE_URL + url
+
+    return {
+        "titel": titel,
+        "url": url,
+        "auteur": ", ".join(ruw.get("auteurs") or []),
+        "datum": ruw.get("datum") or "",
+        "bron": "Leiden Scholarly Publications",
+        "type": "",
+        "thema": "",
+        "samenvatting": ""
+    }
+
+def extract_publications_on_page(page, item_selector):
+    """Extract all result items on the current page in a single round-trip"""
+    start = time.time()
+    ruwe_items = extract_items(page, item_selector, LEIDEN_VELDEN)
+    print(f"⏱️ {len(ruwe_items)} items geëxtraheerd in {round((time.time() - start) * 1000)} ms")
+    return [publicatie_uit_item(ruw) for ruw in ruwe_items]
 
 def run_final_nl_scraper():
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=500)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            locale="nl-NL"
-        )
+        browser = launch_browser(p)
+        context = new_context(browser)
         page = context.new_page()
-        stealth_sync(page)
 
         print("🌐 Open Leiden Scholarly Publications")
         page.goto("https://scholarlypublications.universiteitleiden.nl/", timeout=60000)
@@ -341,7 +311,7 @@ def run_final_nl_scraper():
 
         # Start scraping all pages
         print("📄 Start scraping van alle pagina's...")
-        publicaties = []
+        publicaties = UniekeLijst()
         page_num = 1
         max_pages = 200
         consecutive_empty_pages = 0
@@ -389,32 +359,27 @@ def run_final_nl_scraper():
             # Reset consecutive empty pages counter
             consecutive_empty_pages = 0
 
-            # Process items on current page
+            # Process items on current page (alle items in één page.evaluate)
             page_items_added = 0
-            for i in range(count):
-                try:
-                    item = items.nth(i)
-                    pub_data = extract_publication_data(item)
-                    if pub_data and pub_data["titel"] and pub_data["titel"] != "Leiden University\nScholarly Publications":
-                        # Check for duplicates
-                        is_duplicate = False
-                        for existing in publicaties:
-                            if existing["titel"] == pub_data["titel"] and existing["url"] == pub_data["url"]:
-                                is_duplicate = True
-                                break
-                        
-                        if not is_duplicate:
-                            publicaties.append(pub_data)
-                            page_items_added += 1
-                            print(f"✅ Toegevoegd ({len(publicaties)}): {pub_data['titel'][:50]}...")
-                        else:
-                            print(f"⚠️ Duplicaat overgeslagen: {pub_data['titel'][:50]}...")
+            try:
+                page_publicaties = extract_publications_on_page(page, selector)
+            except Exception as e:
+                print(f"⚠️ Fout bij extractie van pagina {page_num}: {e}")
+                page_publicaties = []
+
+            for i, pub_data in enumerate(page_publicaties):
+                if pub_data["titel"]:
+                    # Check for duplicates (O(1) via de sleutelindex)
+                    if publicaties.voeg_toe(pub_data):
+                        page_items_added += 1
+                        print(f"✅ Toegevoegd ({len(publicaties)}): {pub_data['titel'][:50]}...")
                     else:
-                        print(f"⚠️ Item {i+1} overgeslagen (geen geldige titel)")
-                except Exception as e:
-                    print(f"⚠️ Fout bij item {i+1}: {e}")
+                        print(f"⚠️ Duplicaat overgeslagen: {pub_data['titel'][:50]}...")
+                else:
+                    print(f"⚠️ Item {i+1} overgeslagen (geen geldige titel)")
 
             print(f"📊 Pagina {page_num} voltooid: {page_items_added} nieuwe items toegevoegd (totaal: {len(publicaties)})")
+            metrics.count("leiden overzicht", pages=1, items=page_items_added)
 
             # Try to go to next page - improved pagination logic
             next_page_found = False
@@ -531,21 +496,15 @@ def run_final_nl_scraper():
         os.makedirs(os.path.dirname(pad), exist_ok=True)
 
         with open(pad, "w", encoding="utf-8") as f:
-            json.dump(publicaties, f, indent=2, ensure_ascii=False)
+            json.dump(publicaties.items, f, indent=2, ensure_ascii=False)
 
         print(f"✅ {len(publicaties)} publicaties opgeslagen in {pad}")
 
         browser.close()
-        
-        # Run merge to update main publicaties.json
-        try:
-            import subprocess
-            subprocess.run(["python", "merge_publicaties.py"], cwd=os.path.dirname(__file__))
-            print("🔄 Merge publicaties uitgevoerd")
-        except Exception as e:
-            print(f"⚠️ Fout bij merge: {e}")
-        
-        return publicaties
+
+        # publicaties.json wordt één keer bijgewerkt door update_publicaties.py
+        return publicaties.items
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden")
     run_final_nl_scraper()
@@ -1,22 +1,20 @@
 import time, json
 from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
+
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
 
 BASE_URL = "https://scholarlypublications.universiteitleiden.nl"
 OUTPUT_FILE = "public/content/leiden_detail_urls.json"
 
 def run_scraper():
-    detail_urls = []
+    detail_urls = UniekeLijst()
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            locale="nl-NL"
-        )
+        browser = launch_browser(p)
+        context = new_context(browser)
         page = context.new_page()
-        stealth_sync(page)
 
         print("🌐 Open homepage")
         page.goto(BASE_URL + "/", timeout=60000)
@@ -33,7 +31,7 @@ def run_scraper():
         time.sleep(2)
         links_p1 = extract_links()
         print(f"🔗 {len(links_p1)} links op pagina 1")
-        detail_urls += links_p1
+        metrics.count("leiden overzicht", pages=1, items=detail_urls.voeg_alle_toe(links_p1))
 
         print("➡️ Klik naar pagina 2")
         try:
@@ -42,15 +40,17 @@ def run_scraper():
             print("📄 Verwerk pagina 2")
             links_p2 = extract_links()
             print(f"🔗 {len(links_p2)} links op pagina 2")
-            detail_urls += links_p2
+            metrics.count("leiden overzicht", pages=1, items=detail_urls.voeg_alle_toe(links_p2))
         except Exception as e:
             print(f"⚠️ Mislukt bij pagina 2: {e}")
+            metrics.count("leiden overzicht", errors=1)
 
         with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(detail_urls, f, ensure_ascii=False, indent=2)
+            json.dump(detail_urls.items, f, ensure_ascii=False, indent=2)
 
         print(f"✅ {len(detail_urls)} links opgeslagen in {OUTPUT_FILE}")
         browser.close()
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden_1000_resultaten")
     run_scraper()
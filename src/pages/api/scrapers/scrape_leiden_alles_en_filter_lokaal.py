@@ -1,9 +1,12 @@
 from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
 import json
 import time
 import os
 
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
+
 # Configureer deze naar wens
 MAX_PAGES = 5  # Test eerst met 5 pagina’s
 
@@ -54,17 +57,12 @@ def filter_result(item):
     return True
 
 def run_scraper():
-    all_results = []
+    all_results = UniekeLijst()
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=150)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            locale="nl-NL"
-        )
+        browser = launch_browser(p)
+        context = new_context(browser)
         page = context.new_page()
-        stealth_sync(page)
 
         for page_num in range(1, MAX_PAGES + 1):
             print(f"🔄 Bezoek pagina {page_num}")
@@ -72,18 +70,21 @@ def run_scraper():
             page.wait_for_selector("div.result-item", timeout=20000)
             time.sleep(1)
             items = page.query_selector_all("div.result-item")
+            nieuw = 0
             for item in items:
                 metadata = extract_metadata(item)
                 if filter_result(metadata):
-                    all_results.append(metadata)
+                    nieuw += all_results.voeg_toe(metadata)
+            metrics.count("leiden overzicht", pages=1, items=nieuw)
 
         browser.close()
 
     print(f"✅ Totaal gefilterde resultaten: {len(all_results)}")
     os.makedirs("public/content", exist_ok=True)
     with open("public/content/leiden_filtered.json", "w", encoding="utf-8") as f:
-        json.dump(all_results, f, indent=2, ensure_ascii=False)
+        json.dump(all_results.items, f, indent=2, ensure_ascii=False)
     print("📄 Bestand opgeslagen: public/content/leiden_filtered.json")
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden_alles_en_filter_lokaal")
     run_scraper()
@@ -2,7 +2,10 @@ import time
 import json
 import os
 from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
+
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
 
 MAX_PAGES = 5
 BASE_URL = "https://scholarlypublications.universiteitleiden.nl"
@@ -47,16 +50,11 @@ def scrape_resultaten_van_pagina(page):
 
 def run_scraper():
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            locale="nl-NL"
-        )
+        browser = launch_browser(p)
+        context = new_context(browser)
         page = context.new_page()
-        stealth_sync(page)
 
-        alle_resultaten = []
+        alle_resultaten = UniekeLijst()
 
         for pagina in range(1, MAX_PAGES + 1):
             url = f"{BASE_URL}/search?type=edismax&page={pagina}"
@@ -67,19 +65,22 @@ def run_scraper():
                 time.sleep(1)
                 resultaten = scrape_resultaten_van_pagina(page)
                 print(f"📄 {len(resultaten)} resultaten op pagina {pagina}")
-                alle_resultaten.extend(resultaten)
+                nieuw = alle_resultaten.voeg_alle_toe(resultaten)
+                metrics.count("leiden overzicht", pages=1, items=nieuw)
             except Exception as e:
                 print(f"❌ Fout bij pagina {pagina}: {e}")
+                metrics.count("leiden overzicht", errors=1)
                 continue
 
         pad = os.path.abspath(os.path.join("public", "content", "leiden_zoekresultaten.json"))
         os.makedirs(os.path.dirname(pad), exist_ok=True)
 
         with open(pad, "w", encoding="utf-8") as f:
-            json.dump(alle_resultaten, f, ensure_ascii=False, indent=2)
+            json.dump(alle_resultaten.items, f, ensure_ascii=False, indent=2)
 
         print(f"✅ Totaal {len(alle_resultaten)} publicaties opgeslagen in {pad}")
         browser.close()
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden_clicknavigatie")
     run_scraper()
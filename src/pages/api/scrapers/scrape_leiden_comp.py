@@ -1,23 +1,21 @@
 import time, json
 from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
+
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
 
 BASE_URL = "https://scholarlypublications.universiteitleiden.nl"
 OUTPUT_FILE = "public/content/leiden_detail_urls.json"
 MAX_PAGES = 10  # Haal pagina 1 t/m 10 op → ~200 resultaten
 
 def run_scraper():
-    detail_urls = []
+    detail_urls = UniekeLijst()
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            locale="nl-NL"
-        )
+        browser = launch_browser(p)
+        context = new_context(browser)
         page = context.new_page()
-        stealth_sync(page)
 
         print("🌐 Open homepage")
         page.goto(BASE_URL + "/", timeout=60000)
@@ -39,20 +37,19 @@ def run_scraper():
 
                 links = extract_links()
                 print(f"🔗 {len(links)} links op pagina {pagina}")
-                detail_urls += links
+                metrics.count("leiden overzicht", pages=1, items=detail_urls.voeg_alle_toe(links))
 
                 time.sleep(1.5)
             except Exception as e:
                 print(f"⚠️ Fout bij pagina {pagina}: {e}")
-
-        # Deduplicatie
-        detail_urls = list(dict.fromkeys(detail_urls))
+                metrics.count("leiden overzicht", errors=1)
 
         with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(detail_urls, f, ensure_ascii=False, indent=2)
+            json.dump(detail_urls.items, f, ensure_ascii=False, indent=2)
 
         print(f"✅ {len(detail_urls)} unieke links opgeslagen in {OUTPUT_FILE}")
         browser.close()
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden_comp")
     run_scraper()
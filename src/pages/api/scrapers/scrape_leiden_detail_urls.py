@@ -1,24 +1,20 @@
 import time, json
 from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
+
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
 
 BASE_URL = "https://scholarlypublications.universiteitleiden.nl"
 OUTPUT_FILE = "public/content/leiden_detail_urls.json"
 MAX_PAGES = 1000
 
 def run_scraper():
-    detail_urls = []
+    detail_urls = UniekeLijst()
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) "
-                        "Chrome/124.0.0.0 Safari/537.36"),
-            locale="nl-NL"
-        )
+        browser = launch_browser(p)
+        context = new_context(browser)
         page = context.new_page()
-        stealth_sync(page)
 
         print("🌐 Open homepage")
         page.goto(BASE_URL + "/", timeout=60000)
@@ -36,9 +32,10 @@ def run_scraper():
             for link in links:
                 href = link.get_attribute("href")
                 if href and "/handle/" in href:
-                    detail_urls.append(BASE_URL + href)
-                    found += 1
+                    if detail_urls.voeg_toe(BASE_URL + href):
+                        found += 1
             print(f"🔗 {found} links op pagina {current_page} (totaal: {len(detail_urls)})")
+            metrics.count("leiden overzicht", pages=1, items=found)
 
             next_locator = page.locator(f"a[aria-label='Go to page {current_page + 1}']")
             if next_locator.count() == 0:
@@ -51,12 +48,14 @@ def run_scraper():
                 current_page += 1
             except Exception as e:
                 print(f"⚠️ Fout bij klikken op volgende pagina: {e}")
+                metrics.count("leiden overzicht", errors=1)
                 break
 
         with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(detail_urls, f, ensure_ascii=False, indent=2)
+            json.dump(detail_urls.items, f, ensure_ascii=False, indent=2)
         print(f"✅ {len(detail_urls)} links opgeslagen in {OUTPUT_FILE}")
         browser.close()
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden_detail_urls")
     run_scraper()
@@ -2,22 +2,19 @@ import json
 import time
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
+
 BASE_URL = "https://scholarlypublications.universiteitleiden.nl"
 OUTPUT_FILE = "public/content/leiden_detail_urls.json"
 MAX_PAGES = 5  # Pas aan naar bijvoorbeeld 1000 zodra stabiel
 
 def run_scraper():
-    all_urls = []
+    all_urls = UniekeLijst()
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 900},
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/124.0.0.0 Safari/537.36"
-            )
-        )
+        browser = launch_browser(p)
+        context = new_context(browser, viewport={"width": 1280, "height": 900})
         page = context.new_page()
         print("🌐 Open homepage")
         page.goto(BASE_URL, timeout=60000)
@@ -32,15 +29,18 @@ def run_scraper():
                 page.wait_for_selector("div.result-item", timeout=20000)
                 items = page.query_selector_all("div.result-item")
                 print(f"🔗 {len(items)} items gevonden op pagina {pagina}")
+                nieuw = 0
                 for item in items:
                     a_tag = item.query_selector("dd.mods-titleinfo-title-custom-ms a")
                     if a_tag:
                         href = a_tag.get_attribute("href")
                         if href and href.startswith("/handle/"):
                             full_url = BASE_URL + href
-                            all_urls.append(full_url)
+                            nieuw += all_urls.voeg_toe(full_url)
+                metrics.count("leiden overzicht", pages=1, items=nieuw)
             except PlaywrightTimeout:
                 print(f"⚠️ Timeout bij pagina {pagina}, resultaten niet gevonden.")
+                metrics.count("leiden overzicht", errors=1)
                 break
 
             # Volgende pagina aanklikken
@@ -55,15 +55,18 @@ def run_scraper():
                 time.sleep(1)
             except PlaywrightTimeout:
                 print(f"⚠️ Timeout bij klikken op pagina {pagina + 1}")
+                metrics.count("leiden overzicht", errors=1)
                 break
             except Exception as e:
                 print(f"⚠️ Andere fout bij klikken op pagina {pagina + 1}: {e}")
+                metrics.count("leiden overzicht", errors=1)
                 break
 
         # Sla resultaten op
         with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(all_urls, f, ensure_ascii=False, indent=2)
+            json.dump(all_urls.items, f, ensure_ascii=False, indent=2)
         print(f"✅ {len(all_urls)} links opgeslagen in {OUTPUT_FILE}")
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden_detail_urls_paginated")
     run_scraper()
\ No newline at end of file
@@ -1,28 +1,131 @@
+import argparse
+import asyncio
 import json, time
-from pathlib import Path
-from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
+from urllib.parse import urlsplit
+
+from checkpoint_journal import CheckpointJournal
+import metrics
+from rate_limiter import AsyncHostRateLimiter
 
 INPUT_FILE = "public/content/leiden_detail_urls.json"
 OUTPUT_FILE = "public/content/leiden.json"
+JOURNAL_FILE = "public/content/leiden.journal.jsonl"
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+
+# Instellingen voor de HTTP-modus
+CONCURRENCY = 8        # maximaal aantal gelijktijdige requests
+PER_HOST_LIMIT = 4     # maximaal aantal open verbindingen per host
+MIN_INTERVAL = 0.25    # beleefdheid: minimaal aantal seconden tussen twee requests naar dezelfde host
+TIMEOUT = 60
+
+
+def parse_detail_html(html, url):
+    """Haal dezelfde velden uit een /handle/-pagina als de browsermodus."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+
+    def safe_text(selector, default=""):
+        element = soup.select_one(selector)
+        return element.get_text(" ", strip=True) if element else default
+
+    def all_texts(selector):
+        return [el.get_text(" ", strip=True) for el in soup.select(selector)]
+
+    return {
+        "titel": safe_text("h1"),
+        "auteur": ", ".join(all_texts("div.dc-author")),
+        "datum": safe_text("div.dc-date"),
+        "bron": "Leiden Scholarly Publications",
+        "url": url,
+        "thema": ", ".join(all_texts("div.dc-description-tags > a")),
+        "rechtsgebied": "",
+        "collectie": safe_text("div.dc-collections")
+    }
+
+
+async def harvest_details(urls, concurrency=CONCURRENCY, per_host=PER_HOST_LIMIT, min_interval=MIN_INTERVAL, journal=None):
+    """Haal alle detailpagina's op via HTTP; resultaten in dezelfde volgorde als `urls`.
+
+    Met een `journal` wordt elk resultaat direct weggeschreven zodra het binnen is.
+    """
+    import aiohttp
+
+    semafoor = asyncio.Semaphore(concurrency)
+    limiter = AsyncHostRateLimiter(default_rate=1 / min_interval if min_interval else None)
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    headers = {"User-Agent": USER_AGENT, "Accept-Language": "nl-NL,nl;q=0.9"}
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+
+        async def haal_op(i, url):
+            async with semafoor:
+                await limiter.wait(url)
+                start = time.time()
+                transport = f"http {urlsplit(url).netloc}"
+                try:
+                    async with session.get(url) as response:
+                        response.raise_for_status()
+                        body = await response.read()
+                        html = body.decode(response.get_encoding(), errors="replace")
+                    metrics.observe(transport, time.time() - start, nbytes=len(body))
+                    resultaat = parse_detail_html(html, url)
+                    if journal is not None:
+                        journal.append(resultaat)
+                    metrics.count("leiden detail", pages=1, items=1)
+                    print(f"✅ [{i+1}/{len(urls)}] {resultaat['titel'][:60]} ({round(time.time() - start, 1)}s)")
+                    return resultaat
+                except Exception as e:
+                    metrics.observe(transport, time.time() - start, error=True)
+                    metrics.count("leiden detail", pages=1, errors=1)
+                    print(f"⚠️ Fout bij {url[:80]}...: {e}")
+                    return None
+
+        resultaten = await asyncio.gather(*(haal_op(i, url) for i, url in enumerate(urls)))
+
+    return [r for r in resultaten if r]
+
+
+def run_http_scraper():
+    with open(INPUT_FILE, "r", encoding="utf-8") as f:
+        urls = json.load(f)
+
+    journal = CheckpointJournal(JOURNAL_FILE)
+    journal.load()
+    te_doen = [url for url in urls if not journal.is_done(url)]
+
+    start = time.time()
+    print(f"🌐 Haal {len(te_doen)} detailpagina's op via HTTP (max {CONCURRENCY} tegelijk)")
+    asyncio.run(harvest_details(te_doen, journal=journal))
+
+    ontbrekend = [url for url in urls if not journal.is_done(url)]
+    resultaten = journal.compact(OUTPUT_FILE, order=urls, keep_journal=bool(ontbrekend))
+    if ontbrekend:
+        print(f"⚠️ {len(ontbrekend)} URL's mislukt; journaal blijft staan zodat een volgende run alleen deze opnieuw probeert")
+    print(f"\n✅ Totaal {len(resultaten)} publicaties opgeslagen in {OUTPUT_FILE} ({round(time.time() - start, 1)}s)")
+    return resultaten
+
 
 def run_scraper():
+    from playwright.sync_api import sync_playwright
+    from browser_factory import launch_browser, new_context
+
     with open(INPUT_FILE, "r", encoding="utf-8") as f:
         urls = json.load(f)
 
-    resultaten = []
+    journal = CheckpointJournal(JOURNAL_FILE)
+    journal.load()
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=50)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            locale="nl-NL"
-        )
+        browser = launch_browser(p)
+        context = new_context(browser, user_agent=USER_AGENT)
         page = context.new_page()
-        stealth_sync(page)
 
         for i, url in enumerate(urls):
+            if journal.is_done(url):
+                continue
             try:
                 start = time.time()
                 print(f"\n🔎 [{i+1}/{len(urls)}] Verwerk: {url}")
@@ -52,18 +155,28 @@ def run_scraper():
                     "collectie": safe_text("div.dc-collections")
                 }
 
-                resultaten.append(resultaat)
+                # Tussentijds opslaan: één regel per record in het journaal
+                journal.append(resultaat)
                 print(f"✅ Opgeslagen ({round(time.time() - start, 1)}s)")
 
-                # Tussentijds opslaan
-                with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-                    json.dump(resultaten, f, indent=2, ensure_ascii=False)
-
             except Exception as e:
                 print(f"⚠️ Fout bij {url[:80]}...: {e}")
 
         browser.close()
-        print(f"\n✅ Totaal {len(resultaten)} publicaties opgeslagen in {OUTPUT_FILE}")
+
+    ontbrekend = [url for url in urls if not journal.is_done(url)]
+    resultaten = journal.compact(OUTPUT_FILE, order=urls, keep_journal=bool(ontbrekend))
+    if ontbrekend:
+        print(f"⚠️ {len(ontbrekend)} URL's mislukt; journaal blijft staan zodat een volgende run alleen deze opnieuw probeert")
+    print(f"\n✅ Totaal {len(resultaten)} publicaties opgeslagen in {OUTPUT_FILE}")
 
 if __name__ == "__main__":
-    run_scraper()
+    parser = argparse.ArgumentParser(description="Haal Leiden-detaildata op")
+    parser.add_argument("--browser", action="store_true", help="gebruik Playwright in plaats van HTTP")
+    args = parser.parse_args()
+
+    metrics.start_run("scrape_leiden_detaildata")
+    if args.browser:
+        run_scraper()
+    else:
+        run_http_scraper()
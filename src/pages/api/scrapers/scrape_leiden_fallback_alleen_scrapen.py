@@ -1,10 +1,13 @@
 
 from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
 import json
 import time
 import os
 
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
+
 MAX_PAGES = 5  # Begin met 5, verhoog zodra stabiel
 
 def extract_metadata(result):
@@ -37,17 +40,12 @@ def extract_metadata(result):
         return None
 
 def run_scraper():
-    all_results = []
+    all_results = UniekeLijst()
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=150)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            locale="nl-NL"
-        )
+        browser = launch_browser(p)
+        context = new_context(browser)
         page = context.new_page()
-        stealth_sync(page)
 
         print("🌐 Ga naar homepage en klik door naar zoekpagina")
         page.goto("https://scholarlypublications.universiteitleiden.nl/", timeout=60000)
@@ -59,10 +57,12 @@ def run_scraper():
             print(f"📄 Verwerk pagina {page_num}")
             page.wait_for_selector("div.result-item", timeout=20000)
             items = page.query_selector_all("div.result-item")
+            nieuw = 0
             for item in items:
                 metadata = extract_metadata(item)
                 if metadata:
-                    all_results.append(metadata)
+                    nieuw += all_results.voeg_toe(metadata)
+            metrics.count("leiden overzicht", pages=1, items=nieuw)
 
             # Klik op volgende pagina (als mogelijk)
             next_button = page.locator("a[title='Go to next page']")
@@ -79,8 +79,9 @@ def run_scraper():
     print(f"✅ Totaal gevonden publicaties: {len(all_results)}")
     os.makedirs("public/content", exist_ok=True)
     with open("public/content/leiden_alle_ongefilterd.json", "w", encoding="utf-8") as f:
-        json.dump(all_results, f, indent=2, ensure_ascii=False)
+        json.dump(all_results.items, f, indent=2, ensure_ascii=False)
     print("📄 Bestand opgeslagen: public/content/leiden_alle_ongefilterd.json")
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden_fallback_alleen_scrapen")
     run_scraper()
@@ -2,10 +2,15 @@ from playwright.sync_api import sync_playwright
 import time
 import json
 
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
+
 def run():
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=100)
-        page = browser.new_page()
+        browser = launch_browser(p)
+        context = new_context(browser)
+        page = context.new_page()
         page.goto("https://scholarlypublications.universiteitleiden.nl/")
         print("🌐 Open Leiden Scholarly Publications")
 
@@ -56,17 +61,19 @@ def run():
         page.wait_for_selector("div.result-item")
         print("📄 Resultaten geladen, begin scraping")
 
-        urls = []
+        urls = UniekeLijst()
         max_pages = 3  # Pas dit aan naar 83 of meer
         for i in range(max_pages):
             print(f"🔎 Verwerk pagina {i+1}")
             items = page.locator("div.result-item")
             count = items.count()
+            nieuw = 0
             for j in range(count):
                 link = items.nth(j).locator("a").get_attribute("href")
                 if link:
                     full_url = "https://scholarlypublications.universiteitleiden.nl" + link
-                    urls.append(full_url)
+                    nieuw += urls.voeg_toe(full_url)
+            metrics.count("leiden overzicht", pages=1, items=nieuw)
 
             # Ga naar volgende pagina
             next_button = page.locator("li.pager__item--next a")
@@ -79,10 +86,11 @@ def run():
 
         # Bewaar output
         with open("leiden_permalinks.json", "w", encoding="utf-8") as f:
-            json.dump(urls, f, indent=2, ensure_ascii=False)
+            json.dump(urls.items, f, indent=2, ensure_ascii=False)
         print(f"✅ {len(urls)} permalinks opgeslagen in leiden_permalinks.json")
 
         browser.close()
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden_filtered_paginated")
     run()
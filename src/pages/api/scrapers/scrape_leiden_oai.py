@@ -1,53 +1,330 @@
 from sickle import Sickle
-from sickle.models import Record
+from sickle.oaiexceptions import BadResumptionToken, NoRecordsMatch
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from pathlib import Path
+import argparse
 import json
-import re
+import os
+import threading
 
-# Initialiseer OAI-endpoint
-sickle = Sickle("https://scholarlypublications.universiteitleiden.nl/oai2")
+from checkpoint_journal import CheckpointJournal
+import metrics
 
-# Ophalen van records uit Scholarly Repository
-records = sickle.ListRecords(metadataPrefix="oai_dc", set="hdl_1887_20765")
+OAI_ENDPOINT = "https://scholarlypublications.universiteitleiden.nl/oai2"
+OAI_SET = "hdl_1887_20765"
 
-resultaten = []
+OUTPUT_FILE = Path("leiden_oai_nl.json")
+JOURNAL_FILE = Path("leiden_oai_nl.journal.jsonl")
+STATE_FILE = Path("leiden_oai_state.json")
 
-print("⏳ Ophalen records... (alleen Nederlandstalig)")
 
-for i, record in enumerate(records):
-    try:
-        md = record.metadata
-        if "language" not in md or "nl" not in md["language"]:
+def record_sleutel(item):
+    return item.get("oai_identifier") or item.get("url") or ""
+
+
+def uitvoer_sleutel(item):
+    """Sleutel in OUTPUT_FILE: de handle-URL, die ook rijen van vóór de OAI-identifier al hebben."""
+    return item.get("url") or item.get("oai_identifier") or ""
+
+
+def laad_status():
+    if STATE_FILE.exists():
+        with open(STATE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    return {"high_water_mark": None, "resumption_token": None, "hoogste_datestamp": None,
+            "volledige_harvest": False}
+
+
+def bewaar_status(status):
+    tmp = STATE_FILE.with_name(STATE_FILE.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(status, f, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+
+def record_naar_publicatie(record):
+    """Zet een OAI-record om; verwijderde en niet-Nederlandstalige records worden een verwijdermarkering."""
+    identifier = record.header.identifier
+    if record.header.deleted:
+        return {"oai_identifier": identifier, "verwijderd": True}
+
+    md = record.metadata
+    url = next((u for u in md.get("identifier", []) if u.startswith("https://hdl.handle.net")), None)
+    if "language" not in md or "nl" not in md["language"]:
+        return {"oai_identifier": identifier, "url": url, "verwijderd": True}
+
+    return {
+        "titel": md.get("title", ["[geen titel]"])[0],
+        "auteurs": md.get("creator", []),
+        "datum": md.get("date", [""])[0],
+        "url": url,
+        "taal": "nl",
+        "onderwerpen": md.get("subject", []),
+        "bron": "Leiden Scholarly Publications (OAI)",
+        "oai_identifier": identifier,
+    }
+
+
+def harvest(records, journal, status, max_records=None):
+    """Loop door een ListRecords-iterator en journaliseer elk record.
+
+    Het resumption token waarmee de huidige pagina is opgehaald wordt bewaard,
+    zodat een onderbroken harvest die pagina opnieuw ophaalt en verder gaat.
+    """
+    token_huidige_pagina = status.get("resumption_token")
+    vorig_token = getattr(records, "resumption_token", None)
+    aantal = 0
+
+    for record in records:
+        nieuw_token = getattr(records, "resumption_token", None)
+        if nieuw_token is not vorig_token:
+            token_huidige_pagina = vorig_token.token if vorig_token else token_huidige_pagina
+            vorig_token = nieuw_token
+            status["resumption_token"] = token_huidige_pagina
+            bewaar_status(status)
+
+        try:
+            journal.append(record_naar_publicatie(record))
+            datestamp = record.header.datestamp
+            if datestamp and (not status.get("hoogste_datestamp") or datestamp > status["hoogste_datestamp"]):
+                status["hoogste_datestamp"] = datestamp
+        except Exception as e:
+            print(f"⚠️ Fout bij record {aantal}: {e}")
+            metrics.count("oai harvest", errors=1)
             continue
+        metrics.count("oai harvest", items=1)
+
+        aantal += 1
+        if aantal % 50 == 0:
+            print(f"✅ {aantal} records verwerkt...")
+        if max_records is not None and aantal >= max_records:
+            print(f"🛑 Limiet van {max_records} records bereikt")
+            return aantal, False
+
+    return aantal, True
+
+
+def voeg_samen(journal, volledig=False, journal_bewaren=False):
+    """Verwerk het journaal in het bestaande JSON-bestand: nieuwe en gewijzigde records erin, verwijderde eruit.
+
+    Rijen worden op handle-URL gematcht, zodat rijen zonder `oai_identifier` (van vóór
+    de OAI-harvest) niet dubbel terugkomen. Een verwijderd record zonder metadata heeft
+    alleen zijn identifier en wordt via die identifier opgezocht. Na een volledige,
+    afgeronde harvest (`volledig`) verdwijnen rijen zonder identifier die de harvest niet
+    meer tegenkwam: die staan niet meer in de set. Met `journal_bewaren` blijft het
+    journaal staan voor een run die nog niet af is.
+    """
+    bestaand = []
+    if OUTPUT_FILE.exists():
+        with open(OUTPUT_FILE, encoding="utf-8") as f:
+            bestaand = json.load(f)
+
+    resultaat = {uitvoer_sleutel(item): item for item in bestaand}
+    per_identifier = {item["oai_identifier"]: sleutel for sleutel, item in resultaat.items()
+                      if item.get("oai_identifier")}
+    toegevoegd = verwijderd = 0
+    for item in journal.records.values():
+        sleutel = item.get("url") or per_identifier.get(item["oai_identifier"]) or item["oai_identifier"]
+        if item.get("verwijderd"):
+            if resultaat.pop(sleutel, None) is not None:
+                verwijderd += 1
+        else:
+            if sleutel not in resultaat:
+                toegevoegd += 1
+            resultaat[sleutel] = item
+
+    if volledig:
+        for sleutel in [s for s, item in resultaat.items() if not item.get("oai_identifier")]:
+            del resultaat[sleutel]
+            verwijderd += 1
+
+    tmp = OUTPUT_FILE.with_name(OUTPUT_FILE.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(list(resultaat.values()), f, indent=2, ensure_ascii=False)
+    os.replace(tmp, OUTPUT_FILE)
+    if not journal_bewaren:
+        journal.discard()
+
+    print(f"📊 {toegevoegd} nieuw, {verwijderd} verwijderd, {len(resultaat)} totaal")
+    return list(resultaat.values())
+
+
+def run_harvest(volledig=False, max_records=None):
+    sickle = Sickle(OAI_ENDPOINT)
+    status = laad_status()
+    journal = CheckpointJournal(JOURNAL_FILE, key=record_sleutel)
+    journal.load()
+
+    if status.get("resumption_token"):
+        print("⏯️ Hervat onderbroken harvest met resumption token")
+        try:
+            records = sickle.ListRecords(resumptionToken=status["resumption_token"])
+        except BadResumptionToken:
+            print("⚠️ Resumption token verlopen, begin opnieuw vanaf de high-water mark")
+            status["resumption_token"] = None
+            records = None
+    else:
+        records = None
+
+    if records is None:
+        params = {"metadataPrefix": "oai_dc", "set": OAI_SET}
+        vanaf = None if volledig else status.get("high_water_mark")
+        if vanaf:
+            params["from"] = vanaf
+            print(f"⏳ Incrementele harvest vanaf {vanaf}... (alleen Nederlandstalig)")
+        else:
+            print("⏳ Volledige harvest... (alleen Nederlandstalig)")
+        # Blijft staan als de harvest wordt onderbroken en later met het resumption token verder gaat
+        status["volledige_harvest"] = not vanaf
+        status["hoogste_datestamp"] = status.get("hoogste_datestamp") or vanaf
+        try:
+            records = sickle.ListRecords(**params)
+        except NoRecordsMatch:
+            records = iter(())
+
+    aantal, compleet = harvest(records, journal, status, max_records)
+    journal.close()
+
+    resultaten = voeg_samen(journal, volledig=compleet and status.get("volledige_harvest", False))
+
+    if compleet:
+        # Alleen na een volledige, geslaagde run schuift de high-water mark op
+        status["high_water_mark"] = status.get("hoogste_datestamp") or status.get("high_water_mark")
+        status["resumption_token"] = None
+        status["hoogste_datestamp"] = None
+        status["volledige_harvest"] = False
+        bewaar_status(status)
+        print(f"🔖 High-water mark: {status['high_water_mark']}")
+
+    print(f"\n🎉 Klaar! {aantal} records opgehaald, {len(resultaten)} Nederlandstalige publicaties opgeslagen in {OUTPUT_FILE}")
+    return resultaten
+
+
+def datumvensters(vanaf, tot, aantal):
+    """Verdeel [vanaf, tot] in `aantal` aansluitende, niet-overlappende vensters op dagniveau."""
+    dagen = (tot - vanaf).days + 1
+    aantal = max(1, min(aantal, dagen))
+    vensters = []
+    for i in range(aantal):
+        begin = vanaf + timedelta(days=dagen * i // aantal)
+        einde = vanaf + timedelta(days=dagen * (i + 1) // aantal - 1)
+        vensters.append((begin.isoformat(), einde.isoformat()))
+    return vensters
+
+
+def harvest_partitie(oai_set, van, tot, journal, lock):
+    """Harvest één set/datumvenster; geeft (aantal records, hoogste datestamp) terug."""
+    params = {"metadataPrefix": "oai_dc", "set": oai_set}
+    if van:
+        params["from"] = van
+    if tot:
+        params["until"] = tot
+
+    try:
+        records = Sickle(OAI_ENDPOINT).ListRecords(**params)
+    except NoRecordsMatch:
+        return 0, None
+
+    aantal = 0
+    hoogste = None
+    for record in records:
+        publicatie = record_naar_publicatie(record)
+        datestamp = record.header.datestamp
+        with lock:
+            vorige = journal.records.get(record_sleutel(publicatie))
+            # Een record op de venstergrens kan twee keer langskomen; de nieuwste wint
+            if vorige is None or (datestamp or "") >= vorige.get("_datestamp", ""):
+                journal.append(dict(publicatie, _datestamp=datestamp))
+        if datestamp and (hoogste is None or datestamp > hoogste):
+            hoogste = datestamp
+        aantal += 1
+        metrics.count("oai harvest", items=1)
+    return aantal, hoogste
+
+
+def run_parallel_harvest(workers=4, vensters=None, sets=None):
+    """Volledige harvest, verdeeld over datumvensters en/of sub-sets en uitgevoerd op een worker-pool.
+
+    Afgeronde partities worden in STATE_FILE bijgehouden. Mislukt er een, dan blijven
+    journaal en partitieplan staan en haalt een volgende run alleen de rest op.
+    """
+    sets = sets or [OAI_SET]
+    status = laad_status()
+    plan = status.get("parallel")
+    if plan and plan["sets"] == sets:
+        partities = [tuple(p) for p in plan["partities"]]
+        print(f"⏯️ Hervat parallelle harvest: {len(plan['klaar'])} van {len(partities)} partities al klaar")
+    else:
+        vensters = vensters or workers * 4
+        earliest = Sickle(OAI_ENDPOINT).Identify().earliestDatestamp
+        partities = [
+            (oai_set, van, tot)
+            for oai_set in sets
+            for van, tot in datumvensters(date.fromisoformat(earliest[:10]), date.today(), vensters)
+        ]
+        # Het plan wordt bewaard, zodat een hervatte run dezelfde vensters gebruikt (ook op een andere dag)
+        plan = status["parallel"] = {"sets": sets, "partities": partities, "klaar": [], "hoogste": None}
+        bewaar_status(status)
+    klaar = {tuple(p) for p in plan["klaar"]}
+    te_doen = [partitie for partitie in partities if partitie not in klaar]
+    print(f"⏳ Parallelle harvest: {len(te_doen)} partities over {workers} workers")
+
+    journal = CheckpointJournal(JOURNAL_FILE, key=record_sleutel)
+    journal.load()
+    lock = threading.Lock()
+    mislukt = 0
+    totaal = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(harvest_partitie, *partitie, journal, lock): partitie for partitie in te_doen}
+        for future in as_completed(futures):
+            oai_set, van, tot = futures[future]
+            try:
+                aantal, datestamp = future.result()
+            except Exception as e:
+                mislukt += 1
+                print(f"⚠️ Partitie {oai_set} {van}..{tot} mislukt: {e}")
+                continue
+            totaal += aantal
+            if datestamp and (plan["hoogste"] is None or datestamp > plan["hoogste"]):
+                plan["hoogste"] = datestamp
+            plan["klaar"].append([oai_set, van, tot])
+            bewaar_status(status)
+            print(f"✅ {oai_set} {van}..{tot}: {aantal} records")
+
+    journal.close()
+    for item in journal.records.values():
+        item.pop("_datestamp", None)
+    resultaten = voeg_samen(journal, volledig=not mislukt and sets == [OAI_SET], journal_bewaren=bool(mislukt))
+
+    if not mislukt:
+        # Een geslaagde volledige harvest is ook een geldig startpunt voor incrementele runs
+        status["high_water_mark"] = plan["hoogste"] or status.get("high_water_mark")
+        status["resumption_token"] = None
+        del status["parallel"]
+        bewaar_status(status)
+        print(f"🔖 High-water mark: {status['high_water_mark']}")
+    else:
+        print(f"⚠️ {mislukt} partities mislukt; high-water mark niet bijgewerkt, draai opnieuw om ze op te halen")
+
+    print(f"\n🎉 Klaar! {totaal} records opgehaald, {len(resultaten)} Nederlandstalige publicaties opgeslagen in {OUTPUT_FILE}")
+    return resultaten
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Harvest Leiden Scholarly Publications via OAI-PMH")
+    parser.add_argument("--volledig", action="store_true", help="negeer de high-water mark en haal alles opnieuw op")
+    parser.add_argument("--max", type=int, default=None, help="stop na dit aantal records")
+    parser.add_argument("--parallel", type=int, default=0, metavar="N",
+                        help="volledige harvest, verdeeld over datumvensters op N workers")
+    parser.add_argument("--vensters", type=int, default=None, help="aantal datumvensters (standaard 4 per worker)")
+    parser.add_argument("--sets", default=None, help="komma-gescheiden OAI sub-sets in plaats van de hoofdset")
+    args = parser.parse_args()
 
-        title = md.get("title", ["[geen titel]"])[0]
-        authors = md.get("creator", [])
-        date = md.get("date", [""])[0]
-        subjects = md.get("subject", [])
-        url_candidates = md.get("identifier", [])
-        url = next((u for u in url_candidates if u.startswith("https://hdl.handle.net")), None)
-
-        resultaten.append({
-            "titel": title,
-            "auteurs": authors,
-            "datum": date,
-            "url": url,
-            "taal": "nl",
-            "onderwerpen": subjects,
-            "bron": "Leiden Scholarly Publications (OAI)"
-        })
-
-        if i % 50 == 0:
-            print(f"✅ {i} records verwerkt...")
-
-        if i >= 2000:
-            break  # tijdelijk limiet voor snelheid, pas aan naar wens
-
-    except Exception as e:
-        print(f"⚠️ Fout bij record {i}: {e}")
-        continue
-
-# Opslaan naar JSON
-with open("leiden_oai_nl.json", "w", encoding="utf-8") as f:
-    json.dump(resultaten, f, indent=2, ensure_ascii=False)
-
-print(f"\n🎉 Klaar! {len(resultaten)} Nederlandstalige publicaties opgeslagen in leiden_oai_nl.json")
+    metrics.start_run("scrape_leiden_oai")
+    if args.parallel:
+        sets = args.sets.split(",") if args.sets else None
+        run_parallel_harvest(workers=args.parallel, vensters=args.vensters, sets=sets)
+    else:
+        run_harvest(volledig=args.volledig, max_records=args.max)
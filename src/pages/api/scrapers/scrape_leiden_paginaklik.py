@@ -2,13 +2,18 @@ from playwright.sync_api import sync_playwright
 import json
 import time
 
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
+
 def run_scraper():
     base_url = "https://scholarlypublications.universiteitleiden.nl/search"
-    all_results = []
+    all_results = UniekeLijst()
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+        browser = launch_browser(p)
+        context = new_context(browser)
+        page = context.new_page()
 
         print("🌐 Ga naar zoekresultatenpagina")
         page.goto(base_url, timeout=60000)
@@ -22,6 +27,7 @@ def run_scraper():
             items = page.locator("div.result-item")
             count = items.count()
 
+            nieuw = 0
             for i in range(count):
                 try:
                     item = items.nth(i)
@@ -29,12 +35,13 @@ def run_scraper():
                     url = item.locator("h3 > a").get_attribute("href")
                     full_url = page.url.split("/search")[0] + url if url.startswith("/handle") else url
 
-                    all_results.append({
+                    nieuw += all_results.voeg_toe({
                         "titel": title.strip(),
                         "url": full_url.strip()
                     })
                 except:
                     continue
+            metrics.count("leiden overzicht", pages=1, items=nieuw)
 
             if paginanr == 1:
                 print("➡️ Klik op pagina 2")
@@ -49,13 +56,15 @@ def run_scraper():
                         break
                 except:
                     print("❌ Fout bij klikken op pagina 2")
+                    metrics.count("leiden overzicht", errors=1)
                     break
 
         print(f"✅ Totaal verzameld: {len(all_results)} publicaties")
         with open("leiden_paginas_1_en_2.json", "w", encoding="utf-8") as f:
-            json.dump(all_results, f, ensure_ascii=False, indent=2)
+            json.dump(all_results.items, f, ensure_ascii=False, indent=2)
 
         browser.close()
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden_paginaklik")
     run_scraper()
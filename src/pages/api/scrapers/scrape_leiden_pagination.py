@@ -1,21 +1,20 @@
 from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
 import json, time
 
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
+
 OUTPUT_FILE = "public/content/leiden_urls_filtered.json"
 MAX_PAGES = 83  # We willen pagina 1 t/m 83 aflopen
 
-resultaten = []
+resultaten = UniekeLijst()
+metrics.start_run("scrape_leiden_pagination")
 
 with sync_playwright() as p:
-    browser = p.chromium.launch(headless=False, slow_mo=50)
-    context = browser.new_context(
-        viewport={"width": 1280, "height": 800},
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-        locale="nl-NL"
-    )
+    browser = launch_browser(p)
+    context = new_context(browser)
     page = context.new_page()
-    stealth_sync(page)
 
     print("🌐 Open startpagina...")
     page.goto("https://scholarlypublications.universiteitleiden.nl/", timeout=60000)
@@ -48,20 +47,23 @@ with sync_playwright() as p:
                     page.wait_for_timeout(2000)
             except Exception as e:
                 print(f"⚠️ Volgende pagina niet gevonden op pagina {pagina}: {e}")
+                metrics.count("leiden overzicht", errors=1)
                 break
 
         publicaties = page.locator(".search-result-title a")
         count = publicaties.count()
+        nieuw = 0
         for i in range(count):
             try:
                 href = publicaties.nth(i).get_attribute("href")
                 if href and href.startswith("/handle/1887/"):
-                    resultaten.append("https://scholarlypublications.universiteitleiden.nl" + href)
+                    nieuw += resultaten.voeg_toe("https://scholarlypublications.universiteitleiden.nl" + href)
             except:
                 continue
+        metrics.count("leiden overzicht", pages=1, items=nieuw)
 
     browser.close()
 
     print(f"✅ Totaal {len(resultaten)} links gevonden. Sla op in {OUTPUT_FILE}...")
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(resultaten, f, indent=2, ensure_ascii=False)
+        json.dump(resultaten.items, f, indent=2, ensure_ascii=False)
@@ -1,9 +1,12 @@
 import time
 from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
 import json
 import os
 
+import metrics
+from browser_factory import launch_browser, new_context
+from publicatie_index import UniekeLijst
+
 BASE_URL = "https://scholarlypublications.universiteitleiden.nl"
 START_URL = f"{BASE_URL}/search?type=edismax"
 MAX_PAGES = 5  # Pas dit aan voor meer
@@ -46,16 +49,11 @@ def scrape_page(page):
 
 def run_scraper():
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            locale="nl-NL"
-        )
+        browser = launch_browser(p)
+        context = new_context(browser)
         page = context.new_page()
-        stealth_sync(page)
 
-        all_results = []
+        all_results = UniekeLijst()
 
         for page_num in range(1, MAX_PAGES + 1):
             url = f"{START_URL}&page={page_num}"
@@ -69,23 +67,27 @@ def run_scraper():
                     page.goto(url, timeout=60000)
                 except Exception as e2:
                     print(f"❌ Tweede poging ook mislukt: {e2}")
+                    metrics.count("leiden overzicht", errors=1)
                     continue
 
             try:
                 page.wait_for_selector("div.result-item", timeout=20000)
                 page_results = scrape_page(page)
-                all_results.extend(page_results)
+                nieuw = all_results.voeg_alle_toe(page_results)
+                metrics.count("leiden overzicht", pages=1, items=nieuw)
                 time.sleep(1)
             except Exception as e:
                 print(f"⚠️ Fout bij verwerken pagina {page_num}: {e}")
+                metrics.count("leiden overzicht", errors=1)
 
         output_path = "public/content/leiden_zoekresultaten.json"
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(all_results, f, ensure_ascii=False, indent=2)
+            json.dump(all_results.items, f, ensure_ascii=False, indent=2)
 
         print(f"✅ {len(all_results)} publicaties opgeslagen in {output_path}")
         browser.close()
 
 if __name__ == "__main__":
+    metrics.start_run("scrape_leiden_zoekresultaten")
     run_scraper()
@@ -0,0 +1,91 @@
+import json
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from html import unescape
+from pathlib import Path
+
+import http_client
+import metrics
+
+BASE = Path(__file__).resolve().parents[4]
+PAD_STIBBE = BASE / "public" / "content" / "stibbe.json"
+
+FEED_URL = "https://www.stibbe.com/publications-insights/all/all/all/all/all/all/all/285,286/rss.xml"
+DC_CREATOR = "{http://purl.org/dc/elements/1.1/}creator"
+
+
+def naar_iso_datum(pub_date):
+    """RFC 822- of ISO-datum uit de feed naar YYYY-MM-DD; lege string als die niet te lezen is."""
+    pub_date = (pub_date or "").strip()
+    try:
+        return parsedate_to_datetime(pub_date).date().isoformat()
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(pub_date).date().isoformat()
+    except ValueError:
+        pass
+    for formaat in ("%d %B %Y", "%B %d, %Y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(pub_date, formaat).date().isoformat()
+        except ValueError:
+            continue
+    return ""
+
+
+def pub_date_van(item):
+    """
+    De pubDate van een item; staat soms als <pubDate><time datetime="...">...</time></pubDate>
+    in de feed, en dan is de tekst van het element zelf leeg.
+    """
+    element = item.find("pubDate")
+    if element is None:
+        return ""
+    tijd = element.find("time")
+    if tijd is not None and tijd.get("datetime"):
+        return tijd.get("datetime")
+    return "".join(element.itertext())
+
+
+def platte_tekst(html):
+    return " ".join(unescape(re.sub(r"<[^>]+>", " ", html or "")).split())
+
+
+def parse_feed(xml):
+    """Zet de RSS-items om naar publicatie-records, zoals update-publicaties.js dat deed."""
+    publicaties = []
+    for item in ET.fromstring(xml).iter("item"):
+        publicaties.append({
+            "titel": (item.findtext("title") or "").strip(),
+            "url": (item.findtext("link") or "").strip(),
+            "auteur": item.findtext(DC_CREATOR) or item.findtext("author") or "Stibbe",
+            "datum": naar_iso_datum(pub_date_van(item)),
+            "bron": "Stibbe",
+            "type": "Blog",
+            "thema": "",
+            "samenvatting": platte_tekst(item.findtext("description")),
+        })
+    # Nieuwste eerst; items zonder datum achteraan
+    publicaties.sort(key=lambda p: p["datum"], reverse=True)
+    return publicaties
+
+
+def ververs_stibbe():
+    response = http_client.get(FEED_URL)
+    response.raise_for_status()
+    publicaties = parse_feed(response.content)
+    metrics.count("stibbe feed", pages=1, items=len(publicaties))
+
+    PAD_STIBBE.parent.mkdir(parents=True, exist_ok=True)
+    with open(PAD_STIBBE, "w", encoding="utf-8") as f:
+        json.dump(publicaties, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ Aantal Stibbe-publicaties opgeslagen: {len(publicaties)}")
+    return publicaties
+
+
+if __name__ == "__main__":
+    metrics.start_run("scrape_stibbe")
+    ververs_stibbe()
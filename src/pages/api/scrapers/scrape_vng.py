@@ -1,8 +1,18 @@
-from playwright.sync_api import sync_playwright
+import argparse
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import subprocess
+from urllib.parse import parse_qs, urlsplit
 import re
+import time
+
+from bs4 import BeautifulSoup
+
+import http_client
+import metrics
+from browser_factory import launch_browser, new_context
+from dom_extractie import extract_items
+from incrementeel import STOP_NA_BEKEND, BekendeUrls, laad_bestaande, voeg_samen
 
 # ✅ Hersteld: pad naar project root
 BASE = Path(__file__).resolve().parents[4]
@@ -13,7 +23,54 @@ MAX_PAGINAS = None # Geen limiet voor testen
 # Tijdelijk pad voor tests (niet je echte bestand overschrijven)
 PAD_VNG = BASE / "public/content/vng_publicaties.json"
 
-def scrape_vng_filtered(page, base_url, thema=None, type_=None):
+# Overzichtspagina's die via HTTP tegelijk worden opgehaald
+WORKERS = 6
+RATE_PER_HOST = 4.0   # beleefdheid: requests per seconde naar vng.nl
+
+VNG_CATEGORIEEN = [
+    # Alles met onderwerp 'Recht'
+    {"base_url": "https://vng.nl/publicaties?rubriek[]=380591", "thema": "Recht"},
+    # Alles met publicatiesoort 'Handreiking'
+    {"base_url": "https://vng.nl/publicaties?publicatie-soort=381222", "type_": "Handreiking"},
+]
+
+VNG_VELDEN = {
+    "titel": {"selectors": ["h2 a"], "attribuut": "href"},
+    "datum": {"selectors": [".field--node-post-date"]},
+}
+
+def vng_publicatie(item, thema=None, type_=None):
+    """Zet een bulk-geëxtraheerd VNG-item om naar een publicatie-record"""
+    titel = item["titel"]
+    link = item["titel_href"]
+    if not titel:
+        raise ValueError("geen titel gevonden")
+
+    # Datum staat direct boven de titel
+    datum = ""
+    match = re.search(r'\d{1,2} \w+ \d{4}', item.get("datum") or "")
+    if match:
+        datum = match.group(0)
+    else:
+        print(f"❌ Geen herkenbare datum bij: {titel}")
+
+    return {
+        "titel": titel,
+        "url": f"https://vng.nl{link}" if link and link.startswith("/") else link,
+        "datum": datum,
+        "bron": "VNG",
+        "type": type_ or "",
+        "thema": thema or "",
+        "auteur": "",
+        "samenvatting": ""
+    }
+
+def scrape_vng_filtered(page, base_url, thema=None, type_=None, bekend=None):
+    """Scrape één gefilterd VNG-overzicht, pagina voor pagina.
+
+    Met `bekend` (een `BekendeUrls`) worden alleen nieuwe publicaties teruggegeven
+    en stopt het pagineren na genoeg bekende publicaties op rij.
+    """
     print(f"Start scraping van: {base_url}")
     publicaties = []
     page_nr = 0
@@ -33,102 +90,180 @@ def scrape_vng_filtered(page, base_url, thema=None, type_=None):
         if sluiten_button.is_visible():
             sluiten_button.click()
 
-        items = page.locator('.node-list__item')
-        count = items.count()
-        print(f"📦 Aantal items op pagina {page_nr}: {count}")
+        start = time.time()
+        items = extract_items(page, ".node-list__item", VNG_VELDEN)
+        metrics.count("vng overzicht", pages=1, items=len(items))
+        print(f"📦 Aantal items op pagina {page_nr}: {len(items)} ({round((time.time() - start) * 1000)} ms)")
 
-        if count == 0:
+        if not items:
             print("❌ Geen items meer, klaar met deze categorie.\n")
             break
 
-        for i in range(count):
-            item = items.nth(i)
+        for i, item in enumerate(items):
             try:
-                # 🔍 HTML dump voor analyse
-                if i == 0:
-                    html = item.inner_html()
-                    print(f"🧩 HTML-inhoud eerste item op pagina {page_nr}:\n{html}\n")
-
-                title_locator = item.locator('h2 a')
-                title_locator.wait_for(timeout=7000)
-                titel = title_locator.inner_text()
-                link = title_locator.get_attribute('href')
-
-                # Nieuw: datum direct boven titel
-                datum = ""
-                try:
-                    datum_locator = item.locator(".field--node-post-date")
-                    if datum_locator.count() > 0:
-                        datum_text = datum_locator.inner_text(timeout=3000).strip()
-                        print(f"📆 Gevonden datumtekst: '{datum_text}'")
-                        match = re.search(r'\d{1,2} \w+ \d{4}', datum_text)
-                        if match:
-                            datum = match.group(0)
-                            print(f"✅ Datum geëxtraheerd: {datum}")
-                        else:
-                            print(f"❌ Geen herkenbare datum in tekst: '{datum_text}'")
-                    else:
-                        print(f"❌ Geen .field--node-post-date gevonden bij: {titel}")
-                except Exception as e:
-                    print(f"⚠️ Fout bij extractie datum ({titel}): {e}")
-
-
-                publicaties.append({
-                    "titel": titel,
-                    "url": f"https://vng.nl{link}" if link and link.startswith("/") else link,
-                    "datum": datum,
-                    "bron": "VNG",
-                    "type": type_ or "",
-                    "thema": thema or "",
-                    "auteur": "",
-                    "samenvatting": ""
-                })
-
+                publicatie = vng_publicatie(item, thema, type_)
             except Exception as e:
                 print(f"⚠️ Fout bij publicatie {i} op pagina {page_nr}: {e}")
+                continue
+            if bekend is not None and bekend.is_bekend(publicatie["url"]):
+                if bekend.klaar:
+                    break
+                continue
+            publicaties.append(publicatie)
+
+        if bekend is not None and bekend.klaar:
+            print(f"🛑 {bekend.stop_na} bekende publicaties op rij, klaar met deze categorie.\n")
+            break
 
     return publicaties
 
 
-def scrape_vng_publicaties():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=300)
-        page = browser.new_page()
+def parse_vng_overzicht(html):
+    """Lees de items van een (server-side gerenderde) overzichtspagina uit.
 
-        try:
-            # Alles met onderwerp 'Recht'
-            data_recht = scrape_vng_filtered(
-                page,
-                "https://vng.nl/publicaties?rubriek[]=380591",
-                thema="Recht"
-            )
+    Geeft dezelfde dicts terug als `extract_items(page, ".node-list__item", VNG_VELDEN)`,
+    zodat `vng_publicatie` ze ongewijzigd kan omzetten.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    items = []
+    for node in soup.select(".node-list__item"):
+        link = node.select_one("h2 a")
+        datum = node.select_one(".field--node-post-date")
+        items.append({
+            "titel": link.get_text(" ", strip=True) if link else "",
+            "titel_href": link.get("href") if link else None,
+            "datum": datum.get_text(" ", strip=True) if datum else "",
+        })
+    return items, soup
 
-            # Alles met publicatiesoort 'Handreiking'
-            data_handreiking = scrape_vng_filtered(
-                page,
-                "https://vng.nl/publicaties?publicatie-soort=381222",
-                type_="Handreiking"
-            )
 
-            alle = data_recht + data_handreiking
-            uniek = {item["url"]: item for item in alle}
-            resultaat = list(uniek.values())
+def laatste_pagina(soup):
+    """Hoogste `page`-parameter in de Drupal-pager (0-based); 0 als er geen pager is."""
+    hoogste = 0
+    for link in soup.select(".pager a[href], nav[role=navigation] a[href]"):
+        waarden = parse_qs(urlsplit(link["href"]).query).get("page")
+        if waarden and waarden[0].isdigit():
+            hoogste = max(hoogste, int(waarden[0]))
+    return hoogste
 
-            print(f"Totaal gevonden publicaties (voor ontdubbelen): {len(alle)}")
-            print(f"Unieke publicaties op URL: {len(uniek)}")
 
-            PAD_VNG.parent.mkdir(parents=True, exist_ok=True)
-            with open(PAD_VNG, "w", encoding="utf-8") as f:
-                json.dump(resultaat, f, indent=2, ensure_ascii=False)
+def scrape_vng_http(base_url, thema=None, type_=None, bekend=None, workers=WORKERS):
+    """Browserloze variant van `scrape_vng_filtered`: zelfde records, via HTTP.
 
-            print(f"✅ {len(resultaat)} unieke publicaties opgeslagen in {PAD_VNG}")
+    De eerste pagina levert via de pager het aantal pagina's; de rest wordt in
+    blokken van `workers` pagina's tegelijk opgehaald. Een venster- of mini-pager
+    toont niet altijd de laatste pagina, dus daarna gaan de blokken door tot een
+    pagina zonder items (zoals de browservariant). Tussen de blokken wordt
+    gekeken of de incrementele stopconditie (`bekend`) al bereikt is.
+    """
+    print(f"Start scraping van: {base_url}")
+    http_client.set_rate_limit(urlsplit(base_url).netloc, RATE_PER_HOST)
 
-            # ✅ Merge tijdelijk overslaan tijdens testen
-            subprocess.run(["python", "merge_publicaties.py"])
-            print("🛑 Merge wordt overgeslagen tijdens test. Draai handmatig merge_publicaties.py als alles goed is.")
+    def haal_op(nr):
+        response = http_client.get(f"{base_url}&page={nr}")
+        response.raise_for_status()
+        return parse_vng_overzicht(response.text)
 
+    eerste_items, soup = haal_op(0)
+    laatste = laatste_pagina(soup)
+    if MAX_PAGINAS is not None:
+        laatste = min(laatste, MAX_PAGINAS - 1)
+    print(f"📑 {laatste + 1} pagina's gevonden in de pager; daarna door tot een lege pagina")
+
+    publicaties = []
+
+    def verwerk(page_nr, items):
+        print(f"📦 Aantal items op pagina {page_nr + 1}: {len(items)}")
+        metrics.count("vng overzicht", pages=1, items=len(items))
+        for i, item in enumerate(items):
+            try:
+                publicatie = vng_publicatie(item, thema, type_)
+            except Exception as e:
+                print(f"⚠️ Fout bij publicatie {i} op pagina {page_nr + 1}: {e}")
+                continue
+            if bekend is not None and bekend.is_bekend(publicatie["url"]):
+                if bekend.klaar:
+                    return False
+                continue
+            publicaties.append(publicatie)
+        return True
+
+    if not eerste_items:
+        print("⚠️ Geen items gevonden op de eerste pagina, klaar met deze categorie.\n")
+        return publicaties
+    if not verwerk(0, eerste_items):
+        print(f"🛑 {bekend.stop_na} bekende publicaties op rij, klaar met deze categorie.\n")
+        return publicaties
+
+    volgende = 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while MAX_PAGINAS is None or volgende < MAX_PAGINAS:
+            # Binnen de pager tot de laatste bekende pagina, daarbuiten hele blokken tot een lege pagina
+            eind = volgende + workers if volgende > laatste else min(volgende + workers, laatste + 1)
+            if MAX_PAGINAS is not None:
+                eind = min(eind, MAX_PAGINAS)
+            blok = range(volgende, eind)
+            for page_nr, (items, _) in zip(blok, pool.map(haal_op, blok)):
+                if not items:
+                    print(f"⚠️ Geen items gevonden op pagina {page_nr + 1}, klaar met deze categorie.\n")
+                    return publicaties
+                if not verwerk(page_nr, items):
+                    print(f"🛑 {bekend.stop_na} bekende publicaties op rij, klaar met deze categorie.\n")
+                    return publicaties
+            volgende = eind
+
+    return publicaties
+
+
+def _scrape_met_browser(categorieen):
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        browser = launch_browser(p)
+        context = new_context(browser)
+        page = context.new_page()
+        try:
+            return [scrape_vng_filtered(page, **categorie) for categorie in categorieen]
         finally:
             browser.close()
 
+
+def scrape_vng_publicaties(incrementeel=False, stop_na=STOP_NA_BEKEND, browser=False):
+    bestaand = laad_bestaande(PAD_VNG) if incrementeel else []
+    categorieen = [
+        dict(categorie, bekend=BekendeUrls(bestaand, stop_na) if incrementeel else None)
+        for categorie in VNG_CATEGORIEEN
+    ]
+
+    if browser:
+        resultaten = _scrape_met_browser(categorieen)
+    else:
+        resultaten = [scrape_vng_http(**categorie) for categorie in categorieen]
+
+    alle = [item for resultaat in resultaten for item in resultaat]
+    uniek = {item["url"]: item for item in alle}
+    resultaat = voeg_samen(list(uniek.values()), bestaand)
+
+    print(f"Totaal gevonden publicaties (voor ontdubbelen): {len(alle)}")
+    print(f"Unieke publicaties op URL: {len(uniek)}")
+
+    PAD_VNG.parent.mkdir(parents=True, exist_ok=True)
+    with open(PAD_VNG, "w", encoding="utf-8") as f:
+        json.dump(resultaat, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ {len(resultaat)} unieke publicaties opgeslagen in {PAD_VNG}")
+    print("ℹ️ Draai update_publicaties.py om publicaties.json bij te werken.")
+    return resultaat
+
 if __name__ == "__main__":
-    scrape_vng_publicaties()
+    parser = argparse.ArgumentParser(description="Scrape VNG-publicaties")
+    parser.add_argument("--incrementeel", action="store_true",
+                        help="alleen nieuwe publicaties; stop per categorie na een reeks bekende URL's")
+    parser.add_argument("--stop-na", type=int, default=STOP_NA_BEKEND,
+                        help="aantal bekende publicaties op rij waarna gestopt wordt (default: %(default)s)")
+    parser.add_argument("--browser", action="store_true",
+                        help="gebruik Playwright in plaats van HTTP (terugvaloptie)")
+    args = parser.parse_args()
+
+    metrics.start_run("scrape_vng")
+    scrape_vng_publicaties(incrementeel=args.incrementeel, stop_na=args.stop_na, browser=args.browser)
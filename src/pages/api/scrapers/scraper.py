@@ -1,13 +1,24 @@
-import requests
 from bs4 import BeautifulSoup
+import argparse
 import json
-import time
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import http_client
+import metrics
+from http_cache import fetch_cached
+from incrementeel import STOP_NA_BEKEND, BekendeUrls, laad_bestaande, voeg_samen
 
 base_url = "https://www.burgeroverheid.nl/blog/page/{}/"
 base_domain = "https://www.burgeroverheid.nl"
-publicaties = []
+
+MAX_PAGINAS = 10
+WORKERS = 8           # gelijktijdige detailpagina-requests
+RATE_PER_HOST = 2.0   # beleefdheid: requests per seconde naar burgeroverheid.nl
+OUTPUT_FILE = Path(__file__).resolve().parents[4] / "public" / "content" / "burgeroverheid.json"
 
 def parse_nl_datum(nl_datum):
     maanden = {
@@ -29,8 +40,8 @@ def parse_nl_datum(nl_datum):
 
 def extract_datum(detail_url):
     try:
-        res = requests.get(detail_url)
-        soup = BeautifulSoup(res.text, 'html.parser')
+        html = fetch_cached(detail_url)
+        soup = BeautifulSoup(html, 'html.parser')
 
         # Zoek specifiek naar de eerste p > em onder de hoofdcontent
         em_element = soup.select_one("div.article-single__editor p em")
@@ -59,14 +70,11 @@ def extract_datum(detail_url):
         print(f"⚠️ Fout bij ophalen datum van {detail_url}: {e}")
     return ""
 
-# Begin scraping
-for page_num in range(1, 11):
-    url = base_url.format(page_num)
-    print(f"🔄 Bezoek pagina {page_num}: {url}")
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-
+def parse_overzicht(html):
+    """Lees de artikelen van een overzichtspagina uit, nog zonder datum."""
+    soup = BeautifulSoup(html, 'html.parser')
     artikelen = soup.select("div.article-item.has-image")
+    resultaten = []
 
     for artikel in artikelen:
         link_element = artikel.select_one("a")
@@ -77,23 +85,84 @@ for page_num in range(1, 11):
         if link_element and titel_element:
             relative_url = link_element['href']
             full_url = base_domain + relative_url if relative_url.startswith("/") else relative_url
-            datum = extract_datum(full_url)
 
-            publicaties.append({
+            resultaten.append({
                 "titel": titel_element.get_text(strip=True),
                 "url": full_url,
                 "auteur": auteur_element.get_text(strip=True) if auteur_element else "",
-                "datum": datum,
+                "datum": "",
                 "bron": "Burger & Overheid",
                 "type": "Blog",
                 "thema": thema_element.get_text(strip=True) if thema_element else "",
                 "samenvatting": ""
             })
+    return resultaten
+
+def scrape_burgeroverheid(max_paginas=MAX_PAGINAS, workers=WORKERS, rate=RATE_PER_HOST, bekend=None):
+    """Haal overzichtspagina's op en de datums van alle artikelen gelijktijdig.
+
+    De detailpagina's worden parallel opgehaald achter een token bucket per host
+    (`rate` requests per seconde); de volgorde overzicht → artikel blijft behouden.
+    Met `bekend` (een `BekendeUrls`) worden alleen nieuwe artikelen opgehaald en
+    stopt het pagineren na genoeg bekende artikelen op rij.
+    """
+    http_client.set_rate_limit(urlsplit(base_domain).netloc, rate)
+    publicaties = []
+    datums = []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for page_num in range(1, max_paginas + 1):
+            url = base_url.format(page_num)
+            print(f"🔄 Bezoek pagina {page_num}: {url}")
+            response = http_client.get(url)
+            gevonden = parse_overzicht(response.text)
+            metrics.count("burgeroverheid overzicht", pages=1, items=len(gevonden))
+
+            for publicatie in gevonden:
+                if bekend is not None and bekend.is_bekend(publicatie["url"]):
+                    if bekend.klaar:
+                        break
+                    continue
+                publicaties.append(publicatie)
+                datums.append(pool.submit(extract_datum, publicatie["url"]))
+
+            if bekend is not None and bekend.klaar:
+                print(f"🛑 {bekend.stop_na} bekende artikelen op rij, stop na pagina {page_num}.")
+                break
+
+        with metrics.stage("burgeroverheid detail"):
+            for publicatie, datum in zip(publicaties, datums):
+                publicatie["datum"] = datum.result()
+                metrics.count("burgeroverheid detail", pages=1, items=1)
+                if not publicatie["datum"]:
+                    # Geen fout: de pagina is gelezen, alleen staat er geen datum op
+                    metrics.count("burgeroverheid zonder datum", items=1)
+
+    return publicaties
+
+def ververs_burgeroverheid(incrementeel=False, stop_na=STOP_NA_BEKEND):
+    """Scrape de blog en schrijf burgeroverheid.json; incrementeel alleen de nieuwe artikelen."""
+    bestaand = laad_bestaande(OUTPUT_FILE) if incrementeel else []
+    bekend = BekendeUrls(bestaand, stop_na) if incrementeel else None
+
+    nieuw = scrape_burgeroverheid(bekend=bekend)
+    publicaties = voeg_samen(nieuw, bestaand)
+
+    # Schrijf naar JSON in juiste map
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+        json.dump(publicaties, f, ensure_ascii=False, indent=2)
 
-            time.sleep(0.5)  # beleefdheidspauze
+    print(f"✅ {len(publicaties)} publicaties opgeslagen in burgeroverheid.json ({len(nieuw)} nieuw)")
+    return publicaties
 
-# Schrijf naar JSON in juiste map
-with open("../../../../public/content/burgeroverheid.json", "w", encoding="utf-8") as f:
-    json.dump(publicaties, f, ensure_ascii=False, indent=2)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape de blog van Burger & Overheid")
+    parser.add_argument("--incrementeel", action="store_true",
+                        help="alleen nieuwe artikelen; stop na een reeks bekende URL's")
+    parser.add_argument("--stop-na", type=int, default=STOP_NA_BEKEND,
+                        help="aantal bekende artikelen op rij waarna gestopt wordt (default: %(default)s)")
+    args = parser.parse_args()
 
-print(f"✅ {len(publicaties)} publicaties opgeslagen in burgeroverheid.json")
+    metrics.start_run("scraper")
+    ververs_burgeroverheid(incrementeel=args.incrementeel, stop_na=args.stop_na)
@@ -0,0 +1,69 @@
+"""
+Controleer dat voeg_samen het bestaande leiden_oai_nl.json niet verdubbelt.
+
+De rijen in dat bestand zijn van vóór de OAI-identifier. Dit script speelt een
+eerste volledige harvest na over een kopie ervan (elke rij komt terug mét
+identifier, één rij niet meer, één publicatie is nieuw) en daarna een
+incrementele run met een verwijderd en een niet-Nederlandstalig record.
+
+    python test_oai_samenvoegen.py
+"""
+import json
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+import scrape_leiden_oai
+from checkpoint_journal import CheckpointJournal
+
+BESTAND = Path(__file__).resolve().parent / "leiden_oai_nl.json"
+
+
+def identifier_voor(item):
+    return "oai:scholarlypublications.universiteitleiden.nl:" + item["url"].rsplit("/", 1)[-1]
+
+
+def samenvoegen(map_, records, volledig):
+    journal = CheckpointJournal(map_ / "journal.jsonl", key=scrape_leiden_oai.record_sleutel)
+    for record in records:
+        journal.append(record)
+    journal.close()
+    return scrape_leiden_oai.voeg_samen(journal, volledig=volledig)
+
+
+def dubbele_urls(resultaten):
+    return [url for url, n in Counter(item.get("url") for item in resultaten).items() if n > 1]
+
+
+def main():
+    bestaand = json.loads(BESTAND.read_text(encoding="utf-8"))
+    print(f"📂 {len(bestaand)} rijen in {BESTAND.name}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        map_ = Path(tmp)
+        scrape_leiden_oai.OUTPUT_FILE = map_ / BESTAND.name
+        scrape_leiden_oai.OUTPUT_FILE.write_text(BESTAND.read_text(encoding="utf-8"), encoding="utf-8")
+
+        # Eerste volledige harvest: alles komt terug behalve de laatste rij, plus één nieuwe publicatie
+        nieuw = {"titel": "Nieuwe publicatie", "url": "https://hdl.handle.net/1887/999999999",
+                 "taal": "nl", "oai_identifier": "oai:scholarlypublications.universiteitleiden.nl:999999999"}
+        harvest = [dict(item, oai_identifier=identifier_voor(item)) for item in bestaand[:-1]] + [nieuw]
+        resultaten = samenvoegen(map_, harvest, volledig=True)
+        assert not dubbele_urls(resultaten), dubbele_urls(resultaten)
+        assert len(resultaten) == len(bestaand), len(resultaten)
+        assert bestaand[-1]["url"] not in {item["url"] for item in resultaten}
+        assert all(item.get("oai_identifier") for item in resultaten)
+        print(f"✅ Volledige harvest: 0 duplicaten, {len(resultaten)} rijen")
+
+        # Incrementeel: een verwijderd record (alleen identifier) en een niet-Nederlandstalig record
+        verwijderd = {"oai_identifier": identifier_voor(bestaand[0]), "verwijderd": True}
+        anderstalig = {"oai_identifier": identifier_voor(bestaand[1]), "url": bestaand[1]["url"], "verwijderd": True}
+        resultaten = samenvoegen(map_, [verwijderd, anderstalig], volledig=False)
+        urls = {item["url"] for item in resultaten}
+        assert bestaand[0]["url"] not in urls and bestaand[1]["url"] not in urls
+        assert len(resultaten) == len(bestaand) - 2, len(resultaten)
+        print(f"✅ Incrementele run: verwijderde rijen eruit, {len(resultaten)} rijen")
+
+
+if __name__ == "__main__":
+    main()
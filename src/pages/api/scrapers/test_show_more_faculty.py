@@ -1,9 +1,10 @@
 from playwright.sync_api import sync_playwright
-from playwright_stealth import stealth_sync
 import os
 import time
 import json
 
+from browser_factory import launch_browser, new_context
+
 def take_screenshot(page, filename):
     pad = os.path.join("screenshots", f"{filename}.png")
     os.makedirs("screenshots", exist_ok=True)
@@ -12,14 +13,9 @@ def take_screenshot(page, filename):
 
 def run_test():
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=150)
-        context = browser.new_context(
-            viewport={"width": 1280, "height": 800},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-            locale="nl-NL"
-        )
+        browser = launch_browser(p)
+        context = new_context(browser)
         page = context.new_page()
-        stealth_sync(page)
 
         print("🌐 Open Leiden Scholarly Publications")
         page.goto("https://scholarlypublications.universiteitleiden.nl/", timeout=60000)
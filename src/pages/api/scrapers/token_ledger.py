@@ -0,0 +1,285 @@
+"""
+Ledger of every OpenAI call: tokens, cost, latency and model.
+
+Each call is appended to LEDGER_FILE as one JSON line holding prompt, cached and
+completion tokens, the latency (None for Batch API requests), the model and the
+cost computed from PRICES. A run reports its actual cost and p50/p95 latency at
+exit, and an optional budget stops the drivers from scheduling new work once the
+run has spent a number of dollars or tokens.
+
+    token_ledger.start_run("process_enhanced_publications", Budget.parse("5"))
+    if token_ledger.over_budget():
+        ...stop scheduling...
+    token_ledger.record(model, response.usage, latency_s, profile="enhanced", ref=url)
+
+Unlike metrics, calls are recorded whether or not a run was started, so the
+ledger also covers one-off analyses; `estimate_cost` uses that history to
+estimate a run before it starts.
+
+    python token_ledger.py          # totals per model and profile over the whole ledger
+"""
+import argparse
+import atexit
+import json
+import os
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+LEDGER_FILE = Path(os.getenv("TOKEN_LEDGER_FILE", Path(__file__).resolve().parent / "token_ledger.jsonl"))
+
+# USD per million tokens; dated snapshots ("gpt-4o-2024-08-06") use the price of their base model
+PRICES = {
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+    "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+}
+BATCH_DISCOUNT = 0.5
+
+
+def price_for(model: str) -> Optional[Dict[str, float]]:
+    if model in PRICES:
+        return PRICES[model]
+    basis = [naam for naam in PRICES if model.startswith(naam + "-")]
+    return PRICES[max(basis, key=len)] if basis else None
+
+
+def cost(model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int,
+         batch: bool = False) -> Optional[float]:
+    """Price of one call in USD, or None for a model without a known price"""
+    prijs = price_for(model)
+    if prijs is None:
+        return None
+    dollars = ((prompt_tokens - cached_tokens) * prijs["input"] + cached_tokens * prijs["cached_input"]
+               + completion_tokens * prijs["output"]) / 1e6
+    return dollars * (BATCH_DISCOUNT if batch else 1.0)
+
+
+def usage_tokens(usage) -> Tuple[int, int, int]:
+    """(prompt, cached, completion) tokens from a response's usage, as object or as dict"""
+    if usage is None:
+        return 0, 0, 0
+    if not isinstance(usage, dict):
+        usage = usage.model_dump() if hasattr(usage, "model_dump") else vars(usage)
+    details = usage.get("prompt_tokens_details") or {}
+    if not isinstance(details, dict):
+        details = vars(details)
+    return (usage.get("prompt_tokens") or 0, details.get("cached_tokens") or 0,
+            usage.get("completion_tokens") or 0)
+
+
+def percentile(values, p: float) -> Optional[float]:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(p) - 1]
+
+
+class Budget:
+    """Ceiling on what one run may spend, in dollars and/or tokens"""
+
+    def __init__(self, max_cost: Optional[float] = None, max_tokens: Optional[int] = None):
+        self.max_cost = max_cost
+        self.max_tokens = max_tokens
+
+    @classmethod
+    def parse(cls, text: str) -> "Budget":
+        """`5` or `$5` is five dollars; `200000 tokens`, `200k tokens` or `1.5m tok` is a token ceiling"""
+        match = re.fullmatch(r"\s*\$?\s*(\d+(?:\.\d+)?)\s*([km])?\s*(tok|tokens)?\s*", text, re.IGNORECASE)
+        if not match:
+            raise ValueError(f"Ongeldig budget: {text!r} (bijv. 5, $2.50 of 200k tokens)")
+        waarde = float(match.group(1)) * {"k": 1e3, "m": 1e6, "": 1}[(match.group(2) or "").lower()]
+        if match.group(3):
+            return cls(max_tokens=int(waarde))
+        if match.group(2):
+            raise ValueError(f"Ongeldig budget: {text!r}; k en m alleen bij tokens")
+        return cls(max_cost=waarde)
+
+    def reached(self, spent_cost: float, spent_tokens: int) -> bool:
+        return ((self.max_cost is not None and spent_cost >= self.max_cost)
+                or (self.max_tokens is not None and spent_tokens >= self.max_tokens))
+
+    def __str__(self):
+        delen = []
+        if self.max_cost is not None:
+            delen.append(f"${self.max_cost:.2f}")
+        if self.max_tokens is not None:
+            delen.append(f"{self.max_tokens:,} tokens")
+        return " / ".join(delen) or "geen"
+
+
+def budget_arg(text: str) -> Budget:
+    """argparse type for a --budget option"""
+    try:
+        return Budget.parse(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+class Ledger:
+    """Thread-safe append-only ledger plus the totals of the current run"""
+
+    def __init__(self, path=LEDGER_FILE):
+        self.path = Path(path)
+        self.run = None
+        self.run_id = None
+        self.budget: Optional[Budget] = None
+        self._lock = threading.Lock()
+        self._handle = None
+        self._reset()
+
+    def _reset(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.unpriced = 0
+        self.latencies_ms = []
+        self._reported = False
+
+    def start_run(self, name: str, budget: Optional[Budget] = None) -> None:
+        with self._lock:
+            if self.run is None:
+                atexit.register(self.report)
+            self.run = name
+            self.run_id = uuid.uuid4().hex[:12]
+            self.budget = budget
+            self._reset()
+        if budget is not None:
+            print(f"💸 Budget voor deze run: {budget}")
+
+    def record(self, model: str, usage, latency_s: Optional[float] = None, profile: Optional[str] = None,
+               ref: str = "", batch: bool = False) -> Dict:
+        """
+        Log one call; `ref` is the publication's URL or the batch custom_id
+
+        Returns:
+            The ledger entry
+        """
+        prompt, cached, completion = usage_tokens(usage)
+        dollars = cost(model, prompt, cached, completion, batch)
+        entry = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "run": self.run, "run_id": self.run_id,
+                 "model": model, "profile": profile, "batch": batch, "prompt_tokens": prompt,
+                 "cached_tokens": cached, "completion_tokens": completion,
+                 "latency_ms": round(latency_s * 1000, 1) if latency_s is not None else None,
+                 "cost": round(dollars, 6) if dollars is not None else None, "ref": ref}
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt
+            self.cached_tokens += cached
+            self.completion_tokens += completion
+            if dollars is None:
+                self.unpriced += 1
+            else:
+                self.cost += dollars
+            if latency_s is not None:
+                self.latencies_ms.append(latency_s * 1000)
+            if self._handle is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._handle = open(self.path, "a", encoding="utf-8")
+            self._handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._handle.flush()
+        return entry
+
+    @property
+    def tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def over_budget(self) -> bool:
+        """True once the run has spent its budget; calls already in flight still complete"""
+        with self._lock:
+            return self.budget is not None and self.budget.reached(self.cost, self.tokens)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            latencies = sorted(self.latencies_ms)
+            return {"calls": self.calls, "prompt_tokens": self.prompt_tokens, "cached_tokens": self.cached_tokens,
+                    "completion_tokens": self.completion_tokens, "cost": round(self.cost, 4),
+                    "unpriced_calls": self.unpriced,
+                    "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+                    "p95_ms": round(percentile(latencies, 95), 1) if latencies else None}
+
+    def report(self) -> None:
+        """Print what this run actually used"""
+        if self.run is None or self._reported:
+            return
+        self._reported = True
+        s = self.summary()
+        if not s["calls"]:
+            return
+        print(f"\n💰 OpenAI-verbruik voor {self.run} ({self.run_id}) → {self.path.name}")
+        print(f"   {s['calls']} calls, {s['prompt_tokens']:,} prompt-tokens ({s['cached_tokens']:,} uit de "
+              f"prompt-cache), {s['completion_tokens']:,} completion-tokens")
+        latentie = f", latency p50 {s['p50_ms']} ms / p95 {s['p95_ms']} ms" if s["p50_ms"] is not None else ""
+        print(f"   Werkelijke kosten: ${s['cost']:.4f}{latentie}")
+        if s["unpriced_calls"]:
+            print(f"   ⚠️ {s['unpriced_calls']} calls met een model zonder prijs in PRICES tellen niet mee")
+        if self.budget is not None and self.budget.reached(self.cost, self.tokens):
+            print(f"   Budget ({self.budget}) bereikt; niet alles is ingepland")
+
+
+def entries(path=None):
+    path = Path(path or LEDGER_FILE)
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for regel in f:
+            try:
+                yield json.loads(regel)
+            except json.JSONDecodeError:
+                continue
+
+
+def estimate_cost(publications: int, profile: str, batch: bool = False) -> Optional[Tuple[float, int]]:
+    """
+    Expected cost of `publications` calls from the mean cost of earlier calls with the profile
+
+    Returns:
+        (estimated dollars, number of earlier calls it is based on), or None without history
+    """
+    # Batch entries are counted at their synchronous price, then the discount is applied as asked
+    kosten = [e["cost"] / BATCH_DISCOUNT if e.get("batch") else e["cost"]
+              for e in entries() if e.get("profile") == profile and e.get("cost") is not None]
+    if not kosten:
+        return None
+    per_call = statistics.fmean(kosten) * (BATCH_DISCOUNT if batch else 1.0)
+    return per_call * publications, len(kosten)
+
+
+LEDGER = Ledger()
+
+start_run = LEDGER.start_run
+record = LEDGER.record
+over_budget = LEDGER.over_budget
+summary = LEDGER.summary
+report = LEDGER.report
+
+
+if __name__ == "__main__":
+    totalen = defaultdict(lambda: {"calls": 0, "prompt": 0, "cached": 0, "completion": 0, "cost": 0.0, "ms": []})
+    for e in entries():
+        t = totalen[(e.get("model") or "?", e.get("profile") or "-", "batch" if e.get("batch") else "sync")]
+        t["calls"] += 1
+        t["prompt"] += e.get("prompt_tokens") or 0
+        t["cached"] += e.get("cached_tokens") or 0
+        t["completion"] += e.get("completion_tokens") or 0
+        t["cost"] += e.get("cost") or 0.0
+        if e.get("latency_ms") is not None:
+            t["ms"].append(e["latency_ms"])
+    print(f"💰 {sum(t['calls'] for t in totalen.values())} calls in {LEDGER_FILE.name}")
+    print(f"   {'model':<20}{'profiel':<10}{'soort':<7}{'calls':>7}{'prompt':>11}{'cached':>10}"
+          f"{'completion':>12}{'kosten $':>11}{'p50 ms':>9}{'p95 ms':>9}")
+    for (model, profiel, soort), t in sorted(totalen.items()):
+        ms = sorted(t["ms"])
+        p50 = round(percentile(ms, 50)) if ms else "-"
+        p95 = round(percentile(ms, 95)) if ms else "-"
+        print(f"   {model:<20}{profiel:<10}{soort:<7}{t['calls']:>7}{t['prompt']:>11,}{t['cached']:>10,}"
+              f"{t['completion']:>12,}{t['cost']:>11.4f}{p50:>9}{p95:>9}")
@@ -1,7 +1,63 @@
-import subprocess
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# 1. Scrape VNG-publicaties
-subprocess.run(["python", "scrape_vng.py"])
+import merge_publicaties
+import metrics
+from bronnen import BRONNEN
 
-# 2. Merge alles in publicaties.json
-subprocess.run(["python", "merge_publicaties.py"])
+
+def ververs_bron(naam, incrementeel):
+    start = time.time()
+    with metrics.stage(f"bron {naam}"):
+        BRONNEN[naam](incrementeel=incrementeel)
+    return round(time.time() - start, 1)
+
+
+def update_publicaties(namen=None, incrementeel=False):
+    """Ververs de bronnen tegelijk en voeg daarna alles één keer samen in publicaties.json.
+
+    Een bron die faalt houdt de andere niet tegen; merge gebruikt dan het
+    JSON-bestand van de vorige succesvolle run van die bron.
+
+    Returns:
+        Dict met per bron de duur in seconden, of de foutmelding
+    """
+    namen = namen or list(BRONNEN)
+    resultaten = {}
+
+    # 1. Scrape alle bronnen tegelijk
+    with ThreadPoolExecutor(max_workers=len(namen)) as pool:
+        futures = {pool.submit(ververs_bron, naam, incrementeel): naam for naam in namen}
+        for future in as_completed(futures):
+            naam = futures[future]
+            try:
+                resultaten[naam] = future.result()
+                print(f"✅ Bron {naam} ververst ({resultaten[naam]}s)")
+            except Exception as e:
+                resultaten[naam] = f"fout: {e}"
+                print(f"❌ Bron {naam} mislukt: {e}")
+
+    # 2. Merge alles in publicaties.json
+    with metrics.stage("merge"):
+        merge_publicaties.main()
+
+    print("\n📊 Samenvatting bronnen:")
+    for naam in namen:
+        print(f"   {naam}: {resultaten[naam]}")
+    return resultaten
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ververs alle publicatiebronnen en werk publicaties.json bij")
+    parser.add_argument("bronnen", nargs="*", metavar="bron",
+                        help=f"alleen deze bronnen (keuze uit: {', '.join(sorted(BRONNEN))})")
+    parser.add_argument("--incrementeel", action="store_true",
+                        help="alleen nieuwe publicaties ophalen waar de bron dat ondersteunt")
+    args = parser.parse_args()
+    onbekend = set(args.bronnen) - set(BRONNEN)
+    if onbekend:
+        parser.error(f"onbekende bron(nen): {', '.join(sorted(onbekend))}")
+
+    metrics.start_run("update_publicaties")
+    update_publicaties(args.bronnen, incrementeel=args.incrementeel)